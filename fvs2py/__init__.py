@@ -1,3 +1,4 @@
 from ._base import FVS
+from .pool import FvsWorkerPool
 
-__all__ = ["FVS"]
+__all__ = ["FVS", "FvsWorkerPool"]
@@ -1,13 +1,39 @@
+from __future__ import annotations
+
+import contextlib
 import ctypes as ct
 import logging
 import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
 from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+import pandas as pd
+from numpy.typing import ArrayLike
 
-from fvs2py._core import FvsCore
+from fvs2py._core import FvsCore, synchronized
+from fvs2py.collectors import TreeListCollector
 from fvs2py.constants import (
+    ADD_TREES_COLUMNS,
+    DEFAULT_SCRATCH_DIR,
+    FORTRAN_TMPDIR_ENV_VAR,
+    FVS_ITRNCD_GOOD_RUNNING_STATE,
+    FVS_RESTART_CODE_DONE_RUNNING_STAND,
+    KEYFILE_INPUT_SUFFIXES,
+    MAIN_OUTPUT_SUFFIX,
     MGMT_ID_COLUMN_NAME,
+    SCRATCH_DIR_ENV_VAR,
     STAND_CN_COLUMN_NAME,
     STAND_ID_COLUMN_NAME,
+    STOP_POINT_AFTER_FIRST_EVMON,
+    STOP_POINT_AFTER_INPUT,
+    STOP_POINT_YEAR_EVERY_CYCLE,
     STR_MAXCYCLES,
     STR_MAXPLOTS,
     STR_MAXSPECIES,
@@ -15,14 +41,106 @@ from fvs2py.constants import (
     STR_NCYCLES,
     STR_NPLOTS,
     STR_NTREES,
+    SUMMARY_COLUMNS,
+    TREE_ATTRS,
+    YEAR_COLUMN_NAME,
 )
+from fvs2py.state import RunState
+from fvs2py.stops import StopCapture, StopPlan, StopPoint
+
+if TYPE_CHECKING:
+    from fvs2py.metrics import FvsMetrics
+
+
+class _PipelineFailure(NamedTuple):
+    exc: Exception
+
+
+_PIPELINE_DONE = object()
+
+
+def _capture_stop(fvs: FVS, stop: StopPoint) -> StopCapture:
+    """Copies the stand ids and tree list at a stop."""
+    return StopCapture(stop, fvs.stand_ids, fvs.get_tree_attrs())
+
+
+def _stand_finished(fvs: FVS) -> bool:
+    """Whether FVS finished the stand (or the run) rather than stopping."""
+    return (
+        fvs.itrncd != FVS_ITRNCD_GOOD_RUNNING_STATE
+        or fvs.restart_code == FVS_RESTART_CODE_DONE_RUNNING_STAND
+    )
+
+
+def scratch_root() -> Path | None:
+    """Returns a memory-backed directory for scratch files, if there is one.
+
+    Uses the `FVS2PY_SCRATCH_DIR` environment variable when set, or
+    `/dev/shm` when it exists and is writable. Returns None otherwise, so
+    callers fall back to the default temporary directory.
+    """
+    path = os.environ.get(SCRATCH_DIR_ENV_VAR, DEFAULT_SCRATCH_DIR)
+    if os.path.isdir(path) and os.access(path, os.W_OK):
+        return Path(path)
+    return None
+
+
+class _FortranScratch:
+    """Reference-counted `GFORTRAN_TMPDIR` override for redirected instances.
+
+    The variable is process-wide, so it is set when the first instance
+    redirects its output and restored when the last one stops. Fortran
+    scratch files of every instance share one directory, which lives until
+    then.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._saved: str | None = None
+        self.path: Path | None = None
+
+    def acquire(self) -> Path:
+        """Starts using the directory, creating it for the first user."""
+        with self._lock:
+            if self._users == 0:
+                root = scratch_root()
+                self.path = Path(
+                    tempfile.mkdtemp(
+                        prefix="fvs2py_scratch_",
+                        dir=None if root is None else root,
+                    )
+                )
+                self._saved = os.environ.get(FORTRAN_TMPDIR_ENV_VAR)
+                os.environ[FORTRAN_TMPDIR_ENV_VAR] = str(self.path)
+            self._users += 1
+            return self.path
+
+    def release(self) -> None:
+        """Stops using the directory; the last user restores the variable."""
+        with self._lock:
+            self._users -= 1
+            if self._users > 0:
+                return
+            if self._saved is None:
+                os.environ.pop(FORTRAN_TMPDIR_ENV_VAR, None)
+            else:
+                os.environ[FORTRAN_TMPDIR_ENV_VAR] = self._saved
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path = None
+            self._saved = None
+
+        return
+
+
+_fortran_scratch = _FortranScratch()
 
 
 class FVS(FvsCore):
     """Main class for interacting with FVS at runtime."""
 
-    def __init__(self, lib_path: str | os.PathLike):
-        super().__init__(lib_path=lib_path)
+    def __init__(self, lib_path: str | os.PathLike, backend: str | None = None):
+        super().__init__(lib_path=lib_path, backend=backend)
 
         self._exit_code = ct.c_int(0)
         self._itrncd = ct.c_int(-1)
@@ -34,12 +152,24 @@ class FVS(FvsCore):
         self._nplots = ct.c_int(0)
         self._ntrees = ct.c_int(0)
         self._restart_code = ct.c_int(0)
+        self._stand_id = ct.create_string_buffer(26)
+        self._stand_cn = ct.create_string_buffer(40)
+        self._mgmt_id = ct.create_string_buffer(4)
+        self._evmon_cycle = ct.c_double(0)
+        self._evmon_rtn_code = ct.c_int(0)
+        self._state = RunState()
         self._stop_point_code = None
         self._stop_point_year = None
         self.keyfile_path: Path | None = None
         self.keyfile: str | None = None
+        self.output_dir: Path | None = None
+        self._owns_output_dir = False
+        self._staged_dir: Path | None = None
+        self._fortran_tmpdir: Path | None = None
+        self.metrics: FvsMetrics | None = None
 
     @property
+    @synchronized
     def dims(self) -> dict:
         """Return the max dimensions of important FVS data storage."""
         self._fvsDimSizes.argtypes = [
@@ -75,6 +205,7 @@ class FVS(FvsCore):
         return {key: val.value for key, val in self._dims.items()}
 
     @property
+    @synchronized
     def exit_code(self) -> int:
         """Gets the integer code returned when FVS exits.
 
@@ -92,6 +223,7 @@ class FVS(FvsCore):
         return self._exit_code.value
 
     @property
+    @synchronized
     def itrncd(self) -> int:
         """Returns with the current return code value in FVS.
 
@@ -110,6 +242,7 @@ class FVS(FvsCore):
         return self._itrncd.value
 
     @property
+    @synchronized
     def restart_code(self) -> int:
         """A code indicating when FVS stopped.
 
@@ -130,6 +263,7 @@ class FVS(FvsCore):
         return self._restart_code.value
 
     @property
+    @synchronized
     def stand_ids(self) -> dict:
         """Return stand identification codes."""
         self._fvsStandID.argtypes = [
@@ -149,9 +283,18 @@ class FVS(FvsCore):
             msg = "No inventory data loaded yet. Call `run` method."
             raise RuntimeError(msg)
 
-        self._stand_id = ct.create_string_buffer(26)
-        self._stand_cn = ct.create_string_buffer(40)
-        self._mgmt_id = ct.create_string_buffer(4)
+        stand_id, stand_cn, mgmt_id = self._read_stand_ids()
+
+        return {
+            STAND_ID_COLUMN_NAME: stand_id,
+            STAND_CN_COLUMN_NAME: stand_cn,
+            MGMT_ID_COLUMN_NAME: mgmt_id,
+        }
+
+    def _read_stand_ids(self) -> tuple[str, str, str]:
+        """Reads stand identifiers into the persistent string buffers."""
+        for buffer in (self._stand_id, self._stand_cn, self._mgmt_id):
+            ct.memset(buffer, 0, ct.sizeof(buffer))
 
         self._fvsStandID(
             self._stand_id,
@@ -162,11 +305,104 @@ class FVS(FvsCore):
             ct.c_int(0),
         )
 
-        return {
-            STAND_ID_COLUMN_NAME: self._stand_id.value.decode().strip(),
-            STAND_CN_COLUMN_NAME: self._stand_cn.value.decode().strip(),
-            MGMT_ID_COLUMN_NAME: self._mgmt_id.value.decode().strip(),
-        }
+        return (
+            self._stand_id.value.decode().strip(),
+            self._stand_cn.value.decode().strip(),
+            self._mgmt_id.value.decode().strip(),
+        )
+
+    @property
+    def state(self) -> RunState:
+        """The `RunState` as of the last call to `refresh_state`."""
+        return self._state
+
+    @synchronized
+    def refresh_state(self) -> RunState:
+        """Reads dimensions, return codes and stand identifiers in one pass.
+
+        All values are read into buffers allocated once per `FVS` instance.
+        The returned `RunState` is updated in place and flags whether the
+        stand or cycle changed since the previous refresh, so downstream code
+        can skip recomputing derived values when they did not. Stand
+        identifiers and the cycle are only read once FVS has been run.
+        """
+        int_ptr = ct.POINTER(ct.c_int)
+        self._fvsDimSizes.argtypes = [int_ptr] * 7
+        self._fvsDimSizes.restype = None
+        for routine in (
+            self._fvsGetRtnCode,
+            self._fvsGetRestartCode,
+            self._fvsGetICCode,
+        ):
+            routine.argtypes = [int_ptr]
+            routine.restype = None
+
+        self._fvsDimSizes(
+            self._ntrees,
+            self._ncycles,
+            self._nplots,
+            self._maxtrees,
+            self._maxspecies,
+            self._maxplots,
+            self._maxcycles,
+        )
+        self._fvsGetRtnCode(self._itrncd)
+        self._fvsGetRestartCode(self._restart_code)
+        self._fvsGetICCode(self._exit_code)
+
+        stand = (
+            self._state.stand_id,
+            self._state.stand_cn,
+            self._state.mgmt_id,
+        )
+        cycle = self._state.cycle
+        if self.stop_point_code is not None:
+            self._fvsStandID.argtypes = [
+                ct.c_char_p,
+                ct.c_char_p,
+                ct.c_char_p,
+                int_ptr,
+                int_ptr,
+                int_ptr,
+            ]
+            self._fvsStandID.restype = None
+            stand = self._read_stand_ids()
+
+            self._fvsEvmonAttr.argtypes = [
+                ct.c_char_p,
+                int_ptr,
+                ct.c_char_p,
+                ct.POINTER(ct.c_double),
+                int_ptr,
+            ]
+            self._fvsEvmonAttr.restype = None
+            self._fvsEvmonAttr(
+                b"cycle",
+                ct.c_int(5),
+                b"get",
+                self._evmon_cycle,
+                self._evmon_rtn_code,
+            )
+            if self._evmon_rtn_code.value == 0:
+                cycle = int(self._evmon_cycle.value)
+
+        self._state.update(
+            dims=(
+                self._ntrees.value,
+                self._ncycles.value,
+                self._nplots.value,
+                self._maxtrees.value,
+                self._maxspecies.value,
+                self._maxplots.value,
+                self._maxcycles.value,
+            ),
+            itrncd=self._itrncd.value,
+            restart_code=self._restart_code.value,
+            exit_code=self._exit_code.value,
+            stand=stand,
+            cycle=cycle,
+        )
+        return self._state
 
     @property
     def stop_point_code(self) -> int | None:
@@ -201,12 +437,702 @@ class FVS(FvsCore):
             return self._stop_point_year.value
         return None
 
-    def load_keyfile(self, keywordfile: str | os.PathLike) -> None:
+    @property
+    def summary(self) -> pd.DataFrame:
+        """Return the summary statistics table of the current stand.
+
+        One row is returned for each cycle simulated so far, with the columns
+        listed in `fvs2py.constants.SUMMARY_COLUMNS`.
+        """
+        return pd.DataFrame(self.get_summary(), columns=list(SUMMARY_COLUMNS))
+
+    @synchronized
+    def get_summary(self, out: np.ndarray | None = None) -> np.ndarray:
+        """Gets the summary statistics table of the current stand as an array.
+
+        Args:
+            out (np.ndarray): optional C-contiguous int32 array of shape
+                `(rows, len(SUMMARY_COLUMNS))` to read rows into, e.g. a
+                shared-memory buffer. It needs a row for each cycle plus one.
+
+        Returns:
+            an int32 array with one row per cycle simulated so far; a view
+            into `out` when it is given.
+        """
+        self._fvsSummary.argtypes = [
+            ct.POINTER(ct.c_int),  # summary row
+            ct.POINTER(ct.c_int),  # cycle requested
+            ct.POINTER(ct.c_int),  # number of cycles
+            ct.POINTER(ct.c_int),  # max number of rows
+            ct.POINTER(ct.c_int),  # max number of columns
+            ct.POINTER(ct.c_int),  # return code
+        ]
+        self._fvsSummary.restype = None
+
+        row = (ct.c_int * len(SUMMARY_COLUMNS))()
+        ncycle = ct.c_int(0)
+        maxrow = ct.c_int(0)
+        maxcol = ct.c_int(0)
+        rtn_code = ct.c_int(0)
+
+        self._fvsSummary(row, ct.c_int(0), ncycle, maxrow, maxcol, rtn_code)
+        if out is None:
+            out = np.zeros((ncycle.value + 1, len(SUMMARY_COLUMNS)), np.int32)
+        nrows = 0
+        for icycle in range(1, min(ncycle.value + 1, len(out)) + 1):
+            self._fvsSummary(
+                out[nrows].ctypes.data_as(ct.POINTER(ct.c_int)),
+                ct.c_int(icycle),
+                ncycle,
+                maxrow,
+                maxcol,
+                rtn_code,
+            )
+            if rtn_code.value != 0:
+                break
+            nrows += 1
+
+        return out[:nrows]
+
+    @synchronized
+    def get_tree_attrs(
+        self,
+        attrs: Iterable[str] | None = None,
+        out: Mapping[str, np.ndarray] | None = None,
+    ) -> dict[str, np.ndarray]:
+        """Gets tree attribute vectors for the current tree list.
+
+        Args:
+            attrs (Iterable[str]): optional names of tree attributes to get,
+                defaults to all attributes in `fvs2py.constants.TREE_ATTRS`.
+            out (Mapping): optional C-contiguous float64 arrays, keyed by
+                attribute name and at least `ntrees` long, that FVS writes
+                the values into directly, e.g. shared-memory buffers.
+
+        Returns:
+            dict mapping each attribute name to an array with one value per
+            tree record; views into `out` when it is given.
+        """
+        self._fvsTreeAttr.argtypes = [
+            ct.c_char_p,  # attribute name
+            ct.POINTER(ct.c_int),  # length of attribute name
+            ct.c_char_p,  # action, "get" or "set"
+            ct.POINTER(ct.c_int),  # number of trees
+            ct.POINTER(ct.c_double),  # attribute values
+            ct.POINTER(ct.c_int),  # return code
+        ]
+        self._fvsTreeAttr.restype = None
+
+        names = TREE_ATTRS if attrs is None else tuple(attrs)
+        ntrees = self.dims[STR_NTREES]
+        rtn_code = ct.c_int(0)
+        values = {}
+        for name in names:
+            if out is None:
+                attr = np.zeros(ntrees, dtype=np.float64)
+            else:
+                attr = out[name][:ntrees]
+                if len(attr) < ntrees:
+                    msg = f"Output array for {name} is shorter than {ntrees}"
+                    raise ValueError(msg)
+            self._fvsTreeAttr(
+                name.encode(),
+                ct.c_int(len(name)),
+                b"get",
+                ct.c_int(ntrees),
+                attr.ctypes.data_as(ct.POINTER(ct.c_double)),
+                rtn_code,
+            )
+            if rtn_code.value != 0:
+                msg = f"Invalid tree attribute: {name}"
+                raise ValueError(msg)
+            values[name] = attr
+
+        return values
+
+    @synchronized
+    def set_tree_attrs(self, values: Mapping[str, ArrayLike]) -> None:
+        """Writes tree attribute vectors back to the current tree list.
+
+        Each attribute is written with a single call to `fvsTreeAttr`. Call
+        this while FVS is stopped, e.g. at stop point 5 to change growth and
+        mortality before they are applied.
+
+        Args:
+            values (Mapping): maps attribute names to arrays with one value per
+                tree record, in the order `get_tree_attrs` returns them.
+
+        Raises:
+            ValueError: if an array does not have one value per tree, or FVS
+                rejects an attribute.
+        """
+        self._fvsTreeAttr.argtypes = [
+            ct.c_char_p,  # attribute name
+            ct.POINTER(ct.c_int),  # length of attribute name
+            ct.c_char_p,  # action, "get" or "set"
+            ct.POINTER(ct.c_int),  # number of trees
+            ct.POINTER(ct.c_double),  # attribute values
+            ct.POINTER(ct.c_int),  # return code
+        ]
+        self._fvsTreeAttr.restype = None
+
+        ntrees = self.dims[STR_NTREES]
+        rtn_code = ct.c_int(0)
+        for name, value in values.items():
+            attr = np.ascontiguousarray(value, dtype=np.float64)
+            if attr.shape != (ntrees,):
+                msg = (
+                    f"Expected {ntrees} values for tree attribute {name}, "
+                    f"got {attr.size}"
+                )
+                raise ValueError(msg)
+            self._fvsTreeAttr(
+                name.encode(),
+                ct.c_int(len(name)),
+                b"set",
+                ct.c_int(ntrees),
+                attr.ctypes.data_as(ct.POINTER(ct.c_double)),
+                rtn_code,
+            )
+            if rtn_code.value != 0:
+                msg = f"Invalid tree attribute: {name}"
+                raise ValueError(msg)
+
+        return
+
+    @synchronized
+    def add_trees(self, trees: Mapping[str, ArrayLike]) -> None:
+        """Appends tree records to the current stand's tree list.
+
+        Call this while FVS is stopped, e.g. just after input is read (stop
+        point 7) to start a stand from tree records kept elsewhere.
+
+        Args:
+            trees (Mapping): equal-length arrays keyed by names from
+                `fvs2py.constants.ADD_TREES_COLUMNS`; missing columns are
+                zero.
+
+        Raises:
+            ValueError: if the arrays differ in length, or FVS rejects the
+                records (e.g. the tree list would exceed `maxtrees`).
+        """
+        self._fvsAddTrees.argtypes = [
+            ct.POINTER(ct.c_double),  # tree records, one column per attribute
+            ct.POINTER(ct.c_int),  # number of records
+            ct.POINTER(ct.c_int),  # return code
+        ]
+        self._fvsAddTrees.restype = None
+
+        lengths = {len(np.asarray(values)) for values in trees.values()}
+        if len(lengths) > 1:
+            msg = "Tree attribute arrays must all have the same length"
+            raise ValueError(msg)
+        nrows = lengths.pop() if lengths else 0
+        if nrows == 0:
+            return
+        records = np.zeros((nrows, len(ADD_TREES_COLUMNS)), order="F")
+        for i, name in enumerate(ADD_TREES_COLUMNS):
+            if name in trees:
+                records[:, i] = trees[name]
+
+        rtn_code = ct.c_int(0)
+        self._fvsAddTrees(
+            records.ctypes.data_as(ct.POINTER(ct.c_double)),
+            ct.c_int(nrows),
+            rtn_code,
+        )
+        if rtn_code.value != 0:
+            msg = (
+                f"FVS could not add {nrows} trees "
+                f"(return code {rtn_code.value})"
+            )
+            raise ValueError(msg)
+
+        return
+
+    @synchronized
+    def update_tree_attrs(
+        self,
+        attrs: Iterable[str],
+        func: Callable[[dict[str, np.ndarray]], Mapping[str, ArrayLike]],
+    ) -> dict[str, np.ndarray]:
+        """Reads tree attributes once, transforms them and writes them back.
+
+        Args:
+            attrs (Iterable[str]): attributes `func` needs.
+            func (Callable): given the attribute vectors, returns new vectors
+                for the attributes to change. Modifying the given arrays in
+                place is not enough; return them.
+
+        Returns:
+            the vectors written back.
+        """
+        changed = dict(func(self.get_tree_attrs(attrs)))
+        self.set_tree_attrs(changed)
+
+        return changed
+
+    def scale_tpa(
+        self, factor: ArrayLike, mask: ArrayLike | None = None
+    ) -> None:
+        """Multiplies trees per acre of the selected records by `factor`.
+
+        Args:
+            factor (ArrayLike): a multiplier, or one per tree record.
+            mask (ArrayLike): optional boolean index of records to scale,
+                defaults to all.
+        """
+
+        def scale(trees: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            tpa = trees["tpa"]
+            scaled = tpa * factor
+            return {
+                "tpa": scaled if mask is None else np.where(mask, scaled, tpa)
+            }
+
+        self.update_tree_attrs(["tpa"], scale)
+
+        return
+
+    def remove_trees(self, mask: ArrayLike) -> None:
+        """Removes the selected tree records by setting their tpa to zero.
+
+        Args:
+            mask (ArrayLike): boolean index of the records to remove.
+        """
+        self.scale_tpa(0.0, mask)
+
+        return
+
+    def scale_increments(
+        self,
+        dg: ArrayLike | None = None,
+        htg: ArrayLike | None = None,
+        mask: ArrayLike | None = None,
+    ) -> None:
+        """Multiplies diameter and height increments of the selected records.
+
+        Use at stop point 5, after FVS has computed growth for the cycle but
+        before applying it.
+
+        Args:
+            dg (ArrayLike): multiplier for diameter growth, or one per record.
+            htg (ArrayLike): multiplier for height growth, or one per record.
+            mask (ArrayLike): optional boolean index of records to adjust,
+                defaults to all.
+        """
+        multipliers = {
+            name: multiplier
+            for name, multiplier in (("dg", dg), ("htg", htg))
+            if multiplier is not None
+        }
+        if not multipliers:
+            return
+
+        def scale(trees: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            scaled = {}
+            for name, multiplier in multipliers.items():
+                values = trees[name] * multiplier
+                scaled[name] = (
+                    values
+                    if mask is None
+                    else np.where(mask, values, trees[name])
+                )
+            return scaled
+
+        self.update_tree_attrs(multipliers, scale)
+
+        return
+
+    @synchronized
+    def get_evmon_attrs(self, names: Iterable[str]) -> dict[str, float]:
+        """Gets current values of Event Monitor variables, e.g. `year`.
+
+        Args:
+            names (Iterable[str]): Event Monitor variable names, such as
+                `year`, `cycle`, `age`, `btpa` or `bba`.
+
+        Returns:
+            dict mapping each name to its current value.
+        """
+        self._fvsEvmonAttr.argtypes = [
+            ct.c_char_p,  # variable name
+            ct.POINTER(ct.c_int),  # length of variable name
+            ct.c_char_p,  # action, "get" or "set"
+            ct.POINTER(ct.c_double),  # variable value
+            ct.POINTER(ct.c_int),  # return code
+        ]
+        self._fvsEvmonAttr.restype = None
+
+        value = ct.c_double(0)
+        rtn_code = ct.c_int(0)
+        values = {}
+        for name in names:
+            self._fvsEvmonAttr(
+                name.encode(), ct.c_int(len(name)), b"get", value, rtn_code
+            )
+            if rtn_code.value != 0:
+                msg = f"Invalid Event Monitor variable: {name}"
+                raise ValueError(msg)
+            values[name] = value.value
+
+        return values
+
+    def collect_tree_lists(
+        self,
+        attrs: Iterable[str] | None = None,
+        stop_point_code: int = STOP_POINT_AFTER_FIRST_EVMON,
+        max_bytes: int | None = None,
+        spill_dir: str | os.PathLike | None = None,
+    ) -> TreeListCollector:
+        """Runs all remaining stands, collecting the tree list every cycle.
+
+        FVS is stopped at `stop_point_code` in every cycle of every stand and
+        the tree attribute vectors are appended to a `TreeListCollector`.
+        Call `to_frame()` on the returned collector to get the time series.
+
+        Args:
+            attrs (Iterable[str]): tree attributes to collect, defaults to all
+                of `fvs2py.constants.TREE_ATTRS`.
+            stop_point_code (int): where in each cycle to collect, defaults to
+                just after the first call to the Event Monitor.
+            max_bytes (int): optional memory ceiling before buffered columns
+                are spilled to disk.
+            spill_dir (str | os.PathLike): where to spill, defaults to a
+                temporary directory.
+        """
+        collector = TreeListCollector(
+            attrs, max_bytes=max_bytes, spill_dir=spill_dir
+        )
+        while self.itrncd == FVS_ITRNCD_GOOD_RUNNING_STATE:
+            self.run(stop_point_code, STOP_POINT_YEAR_EVERY_CYCLE)
+            if (
+                self.itrncd == FVS_ITRNCD_GOOD_RUNNING_STATE
+                and self.restart_code != FVS_RESTART_CODE_DONE_RUNNING_STAND
+            ):
+                collector.collect(self)
+
+        return collector
+
+    def run_plan(
+        self,
+        plan: StopPlan | Iterable[tuple[int, int]],
+        include_stand_end: bool = False,
+    ) -> Iterator[StopPoint]:
+        """Runs all remaining stands, stopping only at planned stop points.
+
+        After each stop the stop point codes are set to the next stop in the
+        plan, so FVS runs straight through to it. Each `StopPoint` is yielded
+        while FVS is stopped there; the caller can read or modify the stand
+        before asking for the next one. Stops the simulation never reaches,
+        such as years after the last cycle, are skipped.
+
+        When the plan visits a code in every cycle (year `-1`), FVS is
+        stopped at each planned code in every cycle instead, and the stops
+        in the plan are yielded with the year FVS is actually in.
+
+        Args:
+            plan (StopPlan | Iterable): stop points to visit in each stand.
+            include_stand_end (bool): also yield
+                `StopPoint(100, 0)` after each stand has been simulated.
+
+        Yields:
+            the `StopPoint` FVS is currently stopped at.
+        """
+        if not isinstance(plan, StopPlan):
+            plan = StopPlan(plan)
+        while self.itrncd == FVS_ITRNCD_GOOD_RUNNING_STATE:
+            if plan.every_cycle:
+                yield from self._run_cycles(plan)
+            else:
+                for stop in plan:
+                    self.run(stop.code, stop.year)
+                    if _stand_finished(self):
+                        break
+                    yield stop
+                else:
+                    self.run(0, 0)
+            if include_stand_end and (
+                self.itrncd == FVS_ITRNCD_GOOD_RUNNING_STATE
+                and self.restart_code == FVS_RESTART_CODE_DONE_RUNNING_STAND
+            ):
+                yield StopPoint(FVS_RESTART_CODE_DONE_RUNNING_STAND, 0)
+
+        return
+
+    def _run_cycles(self, plan: StopPlan) -> Iterator[StopPoint]:
+        """Runs one stand, stopping at each of the plan's codes every cycle."""
+        if StopPoint(STOP_POINT_AFTER_INPUT, 0) in plan.stops:
+            self.run(STOP_POINT_AFTER_INPUT, 0)
+            if _stand_finished(self):
+                return
+            yield StopPoint(STOP_POINT_AFTER_INPUT, 0)
+        codes = plan.cycle_codes
+        i = 0
+        while True:
+            # FVS stops at the next occurrence of the code: later in this
+            # cycle, or in the next one once the codes wrap around
+            self.run(codes[i], STOP_POINT_YEAR_EVERY_CYCLE)
+            if _stand_finished(self):
+                return
+            year = int(
+                self.get_evmon_attrs([YEAR_COLUMN_NAME])[YEAR_COLUMN_NAME]
+            )
+            stop = StopPoint(codes[i], year)
+            if stop in plan:
+                yield stop
+            i = (i + 1) % len(codes)
+
+    def run_pipelined(
+        self,
+        plan: StopPlan | Iterable[tuple[int, int]],
+        capture: Callable[[FVS, StopPoint], object] | None = None,
+        maxsize: int = 4,
+        include_stand_end: bool = True,
+    ) -> Iterator:
+        """Runs all remaining stands in a background thread, like `run_plan`.
+
+        A driver thread runs FVS from stop to stop and calls `capture` at
+        each one to copy out the data wanted. Captured data is handed to the
+        caller through a queue holding up to `maxsize` items, so processing
+        one stop in Python overlaps with FVS simulating the next (ctypes
+        releases the GIL while FVS runs). The driver holds the library's lock
+        throughout; calling this library's `FVS` methods from other threads
+        meanwhile raises `RuntimeError`.
+
+        Stopping iteration early leaves the simulation unfinished; load a
+        keyfile to start over.
+
+        Args:
+            plan (StopPlan | Iterable): stop points to visit in each stand.
+            capture (Callable): called as `capture(fvs, stop)` in the driver
+                thread, returning data that must not refer to FVS memory.
+                Defaults to a `StopCapture` of the stand ids and tree list.
+            maxsize (int): captured stops that may wait to be consumed.
+            include_stand_end (bool): also capture at the end of each stand.
+
+        Yields:
+            what `capture` returned at each stop, in order.
+        """
+        if capture is None:
+            capture = _capture_stop
+        captured: queue.Queue = queue.Queue(maxsize)
+        cancelled = threading.Event()
+
+        def put(item) -> bool:
+            while not cancelled.is_set():
+                try:
+                    captured.put(item, timeout=0.1)
+                except queue.Full:
+                    continue
+                return True
+            return False
+
+        def drive() -> None:
+            try:
+                with self._guard.lock:
+                    for stop in self.run_plan(plan, include_stand_end):
+                        if not put(capture(self, stop)):
+                            return
+            except Exception as exc:  # noqa: BLE001 - raised when consumed
+                put(_PipelineFailure(exc))
+            finally:
+                self._guard.driver = None
+                put(_PIPELINE_DONE)
+
+        driver = threading.Thread(
+            target=drive, name=f"fvs-{self.variant}-driver", daemon=True
+        )
+        if self._guard.driver is not None:
+            msg = "A pipelined run is already driving this FVS library."
+            raise RuntimeError(msg)
+        with self._guard.lock:
+            self._guard.driver = driver
+        driver.start()
+        try:
+            while (item := captured.get()) is not _PIPELINE_DONE:
+                if isinstance(item, _PipelineFailure):
+                    raise item.exc
+                yield item
+        finally:
+            cancelled.set()
+            driver.join()
+
+        return
+
+    def tree_list(self, attrs: Iterable[str] | None = None) -> pd.DataFrame:
+        """Returns the current tree list as a DataFrame.
+
+        Args:
+            attrs (Iterable[str]): optional names of tree attributes to include,
+                defaults to all attributes in `fvs2py.constants.TREE_ATTRS`.
+        """
+        return pd.DataFrame(self.get_tree_attrs(attrs))
+
+    @synchronized
+    def load_keyfile(
+        self,
+        keywordfile: str | os.PathLike,
+        save_state: tuple[int, int, str | os.PathLike] | None = None,
+    ) -> None:
         """Sets the keywordfile as a command line argument to FVS.
 
+        When output is redirected (see `redirect_output`), the keyword file is
+        copied into `output_dir` first, so FVS writes its main output file
+        there, and `keyfile_path` points at the copy.
+
         Args:
           keywordfile (str | os.PathLike): path to the FVS keyword file
+          save_state (tuple): optional `(stop_point_code, stop_point_year,
+            path)`; when FVS reaches that stop point it writes the state of
+            the simulation to `path` and stops, so the run can later be
+            resumed from there with `load_state`.
+        """
+        self.keyfile_path = Path(os.path.abspath(keywordfile))
+        with open(self.keyfile_path) as f:
+            self.keyfile = f.read()
+        if self.output_dir is not None:
+            self.keyfile_path = self._stage_keyfile(self.keyfile_path)
+
+        cmdline = f"--keywordfile={self.keyfile_path}"
+        if save_state is not None:
+            code, year, path = save_state
+            cmdline += f" --stoppoint={code},{year},{os.path.abspath(path)}"
+        self._set_cmdline(cmdline)
+
+        return
+
+    @synchronized
+    def load_state(
+        self, state_file: str | os.PathLike, keywordfile: str | os.PathLike
+    ) -> None:
+        """Resumes a simulation from a state saved with `load_keyfile`.
+
+        The next call to `run` continues from the stop point at which the
+        state was saved, so different activities can be added to copies of
+        the same simulation without re-simulating the years before it.
+
+        Args:
+          state_file (str | os.PathLike): file written by FVS at the stop
+            point requested with `load_keyfile(..., save_state=...)`.
+          keywordfile (str | os.PathLike): the keyword file the saved
+            simulation was started with.
         """
+        self.keyfile_path = Path(os.path.abspath(keywordfile))
+        with open(self.keyfile_path) as f:
+            self.keyfile = f.read()
+
+        self._set_cmdline(f"--restart={os.path.abspath(state_file)}")
+
+        return
+
+    def _stage_keyfile(self, keyfile_path: Path) -> Path:
+        """Copies a keyword file and its inputs into `output_dir`."""
+        if self._staged_dir is not None:
+            shutil.rmtree(self._staged_dir, ignore_errors=True)
+        self._staged_dir = Path(tempfile.mkdtemp(dir=self.output_dir))
+        staged = self._staged_dir / keyfile_path.name
+        staged.write_text(self.keyfile)
+        for suffix in KEYFILE_INPUT_SUFFIXES:
+            source = keyfile_path.with_suffix(suffix)
+            if source.exists():
+                staged.with_suffix(suffix).symlink_to(source)
+        return staged
+
+    @property
+    def main_output_path(self) -> Path:
+        """Path of the main output file FVS writes for the loaded keyfile."""
+        if self.keyfile_path is None:
+            msg = "Keyfile not loaded yet."
+            raise AttributeError(msg)
+        return self.keyfile_path.with_suffix(MAIN_OUTPUT_SUFFIX)
+
+    @property
+    def report(self) -> str:
+        """Text of the main output file for the loaded keyfile.
+
+        FVS finishes writing the file when `run` is called after the last
+        stand, i.e. once `itrncd` is 2.
+        """
+        return self.main_output_path.read_text(errors="replace")
+
+    def redirect_output(
+        self, output_dir: str | os.PathLike | None = None
+    ) -> Path:
+        """Sends the main output and scratch files of later runs elsewhere.
+
+        Keyword files loaded afterwards are copied into `output_dir` together
+        with tree data files next to them (`.tre`), so FVS writes its main
+        output file there instead of next to the original keyword file.
+        Fortran scratch files go to a directory in `scratch_root()`, by
+        setting `GFORTRAN_TMPDIR`; as that is process-wide, every redirected
+        instance shares the directory, and the variable is restored once the
+        last of them calls `restore_output`. Each keyword file gets its own
+        subdirectory, removed when the next one is loaded.
+
+        Args:
+            output_dir (str | os.PathLike): directory to write to. Defaults
+                to a new directory in `scratch_root()`, normally on tmpfs,
+                which is removed by `restore_output`.
+
+        Returns:
+            the directory output is redirected to.
+        """
+        self.restore_output()
+        if output_dir is None:
+            root = scratch_root()
+            output_dir = tempfile.mkdtemp(
+                prefix="fvs2py_", dir=None if root is None else root
+            )
+            self._owns_output_dir = True
+        else:
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+            self._owns_output_dir = False
+        self.output_dir = Path(os.path.abspath(output_dir))
+        self._fortran_tmpdir = _fortran_scratch.acquire()
+        logging.debug(f"Redirected FVS output to {self.output_dir}")
+
+        return self.output_dir
+
+    def restore_output(self) -> None:
+        """Stops redirecting output, removing a directory made for it."""
+        if self.output_dir is None:
+            return
+        if self._fortran_tmpdir is not None:
+            _fortran_scratch.release()
+        if self._owns_output_dir:
+            shutil.rmtree(self.output_dir, ignore_errors=True)
+        elif self._staged_dir is not None:
+            shutil.rmtree(self._staged_dir, ignore_errors=True)
+        self.output_dir = None
+        self._staged_dir = None
+        self._fortran_tmpdir = None
+
+        return
+
+    @contextlib.contextmanager
+    def suppressed_output(
+        self, output_dir: str | os.PathLike | None = None
+    ) -> Iterator[FVS]:
+        """Redirects output while in the block, see `redirect_output`.
+
+        Read `report` inside the block to keep the main output; everything
+        FVS wrote for the keyword files is removed on exit.
+
+            with fvs.suppressed_output():
+                fvs.load_keyfile("stand.key")
+                fvs.run()
+                fvs.run()
+                text = fvs.report
+        """
+        self.redirect_output(output_dir)
+        try:
+            yield self
+        finally:
+            self.restore_output()
+
+    def _set_cmdline(self, cmdline: str) -> None:
+        """Passes command line arguments to FVS, resetting the return code."""
         self._fvsSetCmdLine.argtypes = [
             ct.c_char_p,
             ct.POINTER(ct.c_int),
@@ -214,18 +1140,61 @@ class FVS(FvsCore):
         ]
         self._fvsSetCmdLine.restype = None
 
-        self.keyfile_path = Path(os.path.abspath(keywordfile))
-        with open(self.keyfile_path) as f:
-            self.keyfile = f.read()
+        self._fvsSetCmdLine(
+            cmdline.encode(), ct.c_int(len(cmdline)), self._itrncd
+        )
+        logging.debug(f"Return code updated to {self.itrncd}")
 
-        cmdline = f"--keywordfile={self.keyfile_path}"
-        nch = len(cmdline)
+        return
 
-        self._fvsSetCmdLine(cmdline.encode(), ct.c_int(nch), self._itrncd)
-        logging.debug(f"Return code updated to {self.itrncd}")
+    @synchronized
+    def add_activity(
+        self, year: int, activity_code: int, parms: Iterable[float] = ()
+    ) -> None:
+        """Schedules an activity in the current stand.
+
+        Call this while FVS is stopped in a cycle at or before `year`, such
+        as just after the first call to the Event Monitor (stop point 2).
+
+        Args:
+            year (int): year the activity is scheduled for.
+            activity_code (int): FVS activity code of the keyword, e.g. the
+                code of a thinning.
+            parms (Iterable[float]): the activity's parameters, in the order
+                of the keyword's fields.
+
+        Raises:
+            ValueError: if FVS does not accept the activity.
+        """
+        self._fvsAddActivity.argtypes = [
+            ct.POINTER(ct.c_int),  # year
+            ct.POINTER(ct.c_int),  # activity code
+            ct.POINTER(ct.c_double),  # parameters
+            ct.POINTER(ct.c_int),  # number of parameters
+            ct.POINTER(ct.c_int),  # return code
+        ]
+        self._fvsAddActivity.restype = None
+
+        parms = list(parms)
+        values = (ct.c_double * max(len(parms), 1))(*parms)
+        rtn_code = ct.c_int(0)
+        self._fvsAddActivity(
+            ct.c_int(year),
+            ct.c_int(activity_code),
+            values,
+            ct.c_int(len(parms)),
+            rtn_code,
+        )
+        if rtn_code.value != 0:
+            msg = (
+                f"FVS did not accept activity {activity_code} in {year} "
+                f"(return code {rtn_code.value})."
+            )
+            raise ValueError(msg)
 
         return
 
+    @synchronized
     def set_stop_point_codes(
         self,
         stop_point_code: int | None = None,
@@ -283,6 +1252,7 @@ class FVS(FvsCore):
 
         return
 
+    @synchronized
     def run(
         self,
         stop_point_code: int | None = None,
@@ -304,6 +1274,9 @@ class FVS(FvsCore):
         run() one last time. The `itrncd` attribute should then change to a
         value of 2, indicating all stands have been processed.
 
+        When `metrics` is set to a `fvs2py.metrics.FvsMetrics`, each stand
+        that finishes or fails is recorded there.
+
         Args:
             stop_point_code (optional, int): when FVS should stop during a cycle:
                -1 : Stop at every stop location
@@ -333,6 +1306,8 @@ class FVS(FvsCore):
         logging.debug(
             f"Set stop point codes, {stop_point_code}:{self.stop_point_code}, {stop_point_year}:{self.stop_point_year}"
         )
+        started = time.monotonic()
+        itrncd_before = self.itrncd
         while self.itrncd == 0:
             logging.debug("itrncd still zero.")
             self._fvs(self._itrncd)
@@ -340,5 +1315,7 @@ class FVS(FvsCore):
             if self.restart_code != 0:
                 logging.debug("restart code not zero... halting run.")
                 break
+        if self.metrics is not None:
+            self.metrics.observe_run(self, started, itrncd_before)
 
         return
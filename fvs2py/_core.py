@@ -1,24 +1,102 @@
 from __future__ import annotations
 
 import ctypes as ct
+import functools
 import logging
 import os
+import threading
+from collections.abc import Callable
 from pathlib import Path
 
-from fvs2py.constants import NEEDED_ROUTINES
+from fvs2py.constants import (
+    BACKEND_CTYPES,
+    BACKEND_ENV_VAR,
+    BACKEND_SIMULATED,
+    NEEDED_ROUTINES,
+)
+from fvs2py.simulated import SimulatedFvsLibrary
+
+
+class LibraryGuard:
+    """Serializes access to one loaded FVS library within a process.
+
+    Every `FvsCore` loading the same library file shares its Fortran state,
+    so they share one guard. `lock` is held for each call into the library;
+    `driver` is the thread running a pipelined simulation that holds the lock
+    throughout, if any.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.driver: threading.Thread | None = None
+
+
+_LIBRARY_GUARDS: dict[Path, LibraryGuard] = {}
+_LIBRARY_GUARDS_LOCK = threading.Lock()
+
+
+def library_guard(lib_path: str | os.PathLike) -> LibraryGuard:
+    """Returns the process-wide guard of an FVS library."""
+    path = Path(os.path.realpath(lib_path))
+    with _LIBRARY_GUARDS_LOCK:
+        return _LIBRARY_GUARDS.setdefault(path, LibraryGuard())
+
+
+def synchronized(method: Callable) -> Callable:
+    """Holds the library's lock while the method calls into FVS.
+
+    Calls from other threads wait their turn, except while a pipelined run
+    is driving the library from another thread: waiting for it could
+    deadlock the thread consuming its output, so they raise instead.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: FvsCore, *args, **kwargs):
+        guard = self._guard
+        if not guard.lock.acquire(blocking=False):
+            driver = guard.driver
+            if driver is not None and driver is not threading.current_thread():
+                msg = (
+                    "FVS library is being driven by a pipelined run in "
+                    f"thread {driver.name}; use the data it captures instead."
+                )
+                raise RuntimeError(msg)
+            guard.lock.acquire()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            guard.lock.release()
+
+    return wrapper
 
 
 class FvsCore:
     """Base class for FVS API wrapper."""
 
-    def __init__(self, lib_path: str | os.PathLike):
+    def __init__(self, lib_path: str | os.PathLike, backend: str | None = None):
         """Loads FVS shared library and checks to ensure needed routines exist.
 
         Args:
           lib_path : path to FVS library
+          backend : "ctypes" to load the compiled library, or "simulated" to
+            simulate it in Python (see `fvs2py.simulated`); defaults to the
+            FVS2PY_BACKEND environment variable, else "ctypes"
         """
         self.lib_path: Path = Path(os.path.abspath(lib_path))
-        self._lib: ct.CDLL = ct.cdll.LoadLibrary(str(self.lib_path))
+        self.backend = backend or os.environ.get(
+            BACKEND_ENV_VAR, BACKEND_CTYPES
+        )
+        if self.backend == BACKEND_CTYPES:
+            self._lib: ct.CDLL = ct.cdll.LoadLibrary(str(self.lib_path))
+        elif self.backend == BACKEND_SIMULATED:
+            self._lib = SimulatedFvsLibrary(self.lib_path)
+        else:
+            msg = (
+                f"Unknown FVS backend {self.backend!r}, expected "
+                f"{BACKEND_CTYPES!r} or {BACKEND_SIMULATED!r}"
+            )
+            raise ValueError(msg)
+        self._guard = library_guard(self.lib_path)
         self.variant: str = (
             os.path.basename(self.lib_path)
             .split(".")[0]
@@ -95,6 +173,18 @@ class FvsCore:
 
         return
 
+    @property
+    def lock(self) -> threading.RLock:
+        """Process-wide lock of the loaded library.
+
+        Each call into FVS holds it. Hold it yourself to keep other threads
+        from interleaving their calls with a sequence of yours, e.g.
+        between loading a keyfile and finishing its run. ctypes releases the
+        GIL while FVS runs, so other threads can keep doing Python work.
+        """
+        return self._guard.lock
+
+    @synchronized
     def _close(self):
         """Unloads the FVS DLL."""
         close_func = self._lib.dlclose
@@ -0,0 +1,205 @@
+"""Content-addressed on-disk cache of FVS run outputs."""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections.abc import Iterable, Mapping, Sequence
+from pathlib import Path
+
+import numpy as np
+
+from fvs2py.stops import StopPlan
+
+_TABLE_SEP = "/"
+_ENTRY_SUFFIX = ".npz"
+
+
+@functools.lru_cache(maxsize=64)
+def _file_digest(path: str, size: int, mtime_ns: int) -> str:  # noqa: ARG001
+    """Hashes a file; size and mtime are only part of the memoization key."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def library_digest(lib_path: str | os.PathLike) -> str:
+    """Returns the SHA-256 digest of a compiled FVS library.
+
+    The digest is memoized for as long as the file's size and modification
+    time are unchanged, so repeated calls do not re-read the library.
+
+    Args:
+        lib_path (str | os.PathLike): path to the FVS library.
+    """
+    path = os.path.abspath(lib_path)
+    stat = os.stat(path)
+    return _file_digest(path, stat.st_size, stat.st_mtime_ns)
+
+
+def cache_key(
+    keyfile: str,
+    lib_path: str | os.PathLike,
+    inputs: Mapping[str, str] | None = None,
+    stops: Iterable[Sequence[int]] = (),
+    outputs: Iterable[str] = (),
+) -> str:
+    """Builds the cache key of an FVS run.
+
+    Args:
+        keyfile (str): content of the keyword file, as in `FVS.keyfile`.
+        lib_path (str | os.PathLike): FVS library the run uses; its content,
+            not its path, is part of the key.
+        inputs (Mapping): other input files, mapping names to content.
+        stops (Iterable): `(stop_point_code, stop_point_year)` pairs at which
+            outputs are captured. They are keyed in `StopPlan` order, so the
+            same stops listed differently share a key.
+        outputs (Iterable): names of the outputs captured.
+
+    Returns:
+        a hex digest identifying the run.
+    """
+    payload = json.dumps(
+        {
+            "keyfile": keyfile,
+            "library": library_digest(lib_path),
+            "inputs": dict(sorted((inputs or {}).items())),
+            "stops": [list(stop) for stop in StopPlan(stops)],
+            "outputs": list(outputs),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """Stores output tables of FVS runs on local disk, keyed by `cache_key`.
+
+    Each entry is one compressed `.npz` file holding every column of every
+    table as a separate array. Reading an entry marks it as recently used, and
+    the least recently used entries are removed once the cache grows past
+    `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: str | os.PathLike, max_bytes: int = 2**30):
+        """Opens (and creates if needed) a cache directory.
+
+        Args:
+            cache_dir (str | os.PathLike): directory holding cache entries.
+            max_bytes (int): size the cache is kept under, 1 GiB by default.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = sum(path.stat().st_size for path in self._entries())
+
+    def _entries(self) -> Iterable[Path]:
+        return self.cache_dir.glob(f"*/*{_ENTRY_SUFFIX}")
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{_ENTRY_SUFFIX}"
+
+    @property
+    def size(self) -> int:
+        """Approximate number of bytes used by cache entries."""
+        return self._size
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def get(self, key: str) -> dict[str, dict[str, np.ndarray]] | None:
+        """Returns the tables stored under `key`, or None on a miss.
+
+        Args:
+            key (str): a key built with `cache_key`.
+
+        Returns:
+            dict mapping each table name to a dict of column arrays.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                tables: dict[str, dict[str, np.ndarray]] = {}
+                for name in data.files:
+                    table, _, column = name.partition(_TABLE_SEP)
+                    tables.setdefault(table, {})[column] = data[name]
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logging.debug(f"Cache hit for {key}.")
+        return tables
+
+    def put(
+        self,
+        key: str,
+        tables: Mapping[str, Mapping[str, Sequence | np.ndarray]],
+    ) -> None:
+        """Stores tables under `key`, evicting old entries if needed.
+
+        Args:
+            key (str): a key built with `cache_key`.
+            tables (Mapping): maps each table name to a mapping of equal-length
+                columns.
+        """
+        arrays = {}
+        for table, columns in tables.items():
+            for column, values in columns.items():
+                array = np.asarray(values)
+                if array.dtype == object:
+                    array = array.astype(str)
+                arrays[f"{table}{_TABLE_SEP}{column}"] = array
+
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        old_size = path.stat().st_size if path.exists() else 0
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, path)
+        self._size += path.stat().st_size - old_size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_bytes: int | None = None) -> int:
+        """Removes least recently used entries until under `target_bytes`.
+
+        Args:
+            target_bytes (int): size to shrink to, defaults to `max_bytes`.
+
+        Returns:
+            the number of entries removed.
+        """
+        target = self.max_bytes if target_bytes is None else target_bytes
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # removed by another process
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        size = sum(entry_size for _, entry_size, _ in entries)
+
+        removed = 0
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
+            removed += 1
+        self._size = size
+        logging.debug(f"Evicted {removed} cache entries.")
+        return removed
+
+    def clear(self) -> None:
+        """Removes every entry from the cache."""
+        self.evict(target_bytes=0)
+
+        return
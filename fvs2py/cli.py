@@ -0,0 +1,391 @@
+"""Command-line interface for fvs2py."""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import functools
+import logging
+import sys
+import tempfile
+import time
+from collections.abc import Sequence
+from pathlib import Path
+
+import pandas as pd
+
+from fvs2py._base import scratch_root
+from fvs2py.cache import ResultCache
+from fvs2py.constants import STOP_POINT_YEAR_EVERY_CYCLE
+from fvs2py.distributed import Coordinator, Worker
+from fvs2py.enums import FvsVariant
+from fvs2py.jobs import (
+    JOB_OUTPUTS,
+    OUTPUT_SUMMARY,
+    TABLE_FORMATS,
+    JobSpec,
+    run_job_task,
+)
+from fvs2py.metrics import FvsMetrics, MetricsServer
+from fvs2py.pool import FvsWorkerPool
+from fvs2py.queues import open_queue
+from fvs2py.scheduler import CostModel, imap_longest_first
+from fvs2py.stops import StopPlan
+
+
+def _stop(value: str) -> tuple[int, int]:
+    """Parses a `CODE[:YEAR]` stop point argument.
+
+    Without a year, codes 1 to 6 stop in every cycle.
+    """
+    code, _, year = value.partition(":")
+    try:
+        code = int(code)
+        year = int(year) if year else STOP_POINT_YEAR_EVERY_CYCLE
+    except ValueError:
+        msg = f"expected CODE:YEAR, got {value!r}"
+        raise argparse.ArgumentTypeError(msg) from None
+    try:
+        StopPlan([(code, year)])
+    except ValueError as exc:
+        msg = f"{value!r}: {exc}"
+        raise argparse.ArgumentTypeError(msg) from None
+    return code, year
+
+
+def _add_job_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the arguments that describe jobs to a parser."""
+    parser.add_argument("keyfiles", nargs="+", help="FVS keyword files")
+    parser.add_argument(
+        "--variant", required=True, type=FvsVariant, help="FVS variant code"
+    )
+    parser.add_argument(
+        "--stop",
+        dest="stops",
+        action="append",
+        default=[],
+        type=_stop,
+        metavar="CODE[:YEAR]",
+        help=(
+            "capture outputs at this stop point, in every cycle when YEAR "
+            "is -1 or left out; may be repeated"
+        ),
+    )
+    parser.add_argument(
+        "--output",
+        dest="outputs",
+        action="append",
+        choices=JOB_OUTPUTS,
+        help=f"output to capture, may be repeated (default: {OUTPUT_SUMMARY})",
+    )
+
+
+def _add_metrics_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the arguments that serve Prometheus metrics to a parser."""
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="serve Prometheus metrics on this local port",
+    )
+    parser.add_argument(
+        "--metrics-socket", help="serve Prometheus metrics on this Unix socket"
+    )
+
+
+def _metrics_from_args(
+    args,
+) -> tuple[FvsMetrics | None, contextlib.AbstractContextManager]:
+    """Returns the metrics to record and the server exposing them, if any."""
+    if args.metrics_port is None and args.metrics_socket is None:
+        return None, contextlib.nullcontext()
+    metrics = FvsMetrics()
+    return metrics, MetricsServer(
+        metrics,
+        port=args.metrics_port or 0,
+        unix_socket=args.metrics_socket,
+    )
+
+
+def _jobs_from_args(args, use_stem: bool = False) -> list[JobSpec]:
+    """Builds one job per keyfile given on the command line."""
+    return [
+        JobSpec.from_keyfile(
+            args.variant,
+            keyfile,
+            stops=tuple(args.stops),
+            outputs=tuple(args.outputs or (OUTPUT_SUMMARY,)),
+            **({"job_id": Path(keyfile).stem} if use_stem else {}),
+        )
+        for keyfile in args.keyfiles
+    ]
+
+
+def _add_run_parser(subparsers) -> None:
+    run = subparsers.add_parser(
+        "run", help="run keyfiles in parallel on this machine"
+    )
+    _add_job_arguments(run)
+    run.add_argument("--out", required=True, help="output directory")
+    run.add_argument("--format", choices=TABLE_FORMATS, default="csv")
+    run.add_argument(
+        "-j", "--jobs", type=int, help="worker processes (default: CPU count)"
+    )
+    run.add_argument("--lib-dir", help="directory holding FVS libraries")
+    run.add_argument(
+        "--timeout",
+        type=float,
+        help="seconds a stand may run before it is killed",
+    )
+    run.add_argument(
+        "--retries",
+        type=int,
+        default=1,
+        help="times to retry a keyfile whose worker crashed or hung",
+    )
+    run.add_argument("--quarantine", help="copy failing keyfiles here")
+    run.add_argument(
+        "--cache-dir", help="reuse results cached in this directory"
+    )
+    run.add_argument(
+        "--cache-size",
+        type=int,
+        default=2**30,
+        help="bytes the result cache is kept under",
+    )
+    run.add_argument(
+        "--timings",
+        help="learn stand run times in this file to start the longest first",
+    )
+    _add_metrics_arguments(run)
+
+
+def _run(args) -> int:
+    jobs = _jobs_from_args(args, use_stem=True)
+    keyfiles = {
+        job.job_id: keyfile for job, keyfile in zip(jobs, args.keyfiles)
+    }
+    if len(keyfiles) < len(jobs):
+        logging.error(
+            "Keyfile names must be unique, outputs are named by them."
+        )
+        return 2
+    lib_path = args.variant.library_path(args.lib_dir)
+    out_dir = Path(args.out)
+    cache = (
+        ResultCache(args.cache_dir, max_bytes=args.cache_size)
+        if args.cache_dir
+        else None
+    )
+
+    start = time.monotonic()
+    timings = []
+    failed = 0
+    metrics, metrics_server = _metrics_from_args(args)
+    with (
+        metrics_server,
+        tempfile.TemporaryDirectory(
+            prefix="fvs2py", dir=scratch_root()
+        ) as workdir,
+        FvsWorkerPool(
+            lib_path,
+            processes=args.jobs,
+            task=functools.partial(run_job_task, workdir=workdir, cache=cache),
+            timeout=args.timeout,
+            max_retries=args.retries,
+            metrics=metrics,
+        ) as pool,
+    ):
+        results = imap_longest_first(
+            pool,
+            jobs,
+            CostModel(args.timings),
+            learn=lambda result: result.ok and not result.value.cached,
+        )
+        for n, result in enumerate(results, start=1):
+            job = result.item
+            if result.ok:
+                job_result = result.value
+                job_result.write(out_dir, fmt=args.format)
+                for timing in job_result.timings:
+                    timings.append({"job_id": job.job_id, **timing})
+                status = "cached" if job_result.cached else "done"
+            else:
+                failed += 1
+                status = f"FAILED ({result.error})"
+                if args.quarantine:  # items are jobs, not keyfile paths
+                    Path(args.quarantine).mkdir(parents=True, exist_ok=True)
+                    (Path(args.quarantine) / f"{job.job_id}.key").write_text(
+                        job.keyfile
+                    )
+            print(  # noqa: T201
+                f"[{n}/{len(jobs)}] {keyfiles[job.job_id]} {status} "
+                f"in {result.elapsed:.2f}s",
+                file=sys.stderr,
+            )
+
+    if timings:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame(timings).to_csv(out_dir / "timings.csv", index=False)
+    print(  # noqa: T201
+        f"{len(jobs) - failed} of {len(jobs)} keyfiles succeeded "
+        f"in {time.monotonic() - start:.1f}s",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+def _add_queue_parsers(subparsers) -> None:
+    queue = subparsers.add_parser(
+        "queue", help="run FVS jobs through a shared job queue"
+    )
+    queue_sub = queue.add_subparsers(dest="queue_command", required=True)
+
+    submit = queue_sub.add_parser("submit", help="add keyfiles as jobs")
+    submit.add_argument("queue", help="queue URL or SQLite file path")
+    _add_job_arguments(submit)
+
+    work = queue_sub.add_parser("work", help="run jobs from a queue")
+    work.add_argument("queue", help="queue URL or SQLite file path")
+    work.add_argument("--lib-dir", help="directory holding FVS libraries")
+    work.add_argument(
+        "--variant",
+        dest="variants",
+        action="append",
+        type=FvsVariant,
+        help="only run jobs for this variant, may be repeated",
+    )
+    work.add_argument("--workdir", help="scratch directory for job files")
+    work.add_argument("--max-jobs", type=int, help="stop after this many jobs")
+    work.add_argument(
+        "--cache-dir", help="reuse results cached in this directory"
+    )
+    work.add_argument(
+        "--cache-size",
+        type=int,
+        default=2**30,
+        help="bytes the result cache is kept under",
+    )
+    work.add_argument(
+        "--exit-when-empty",
+        action="store_true",
+        help="stop once the queue has no pending jobs",
+    )
+    work.add_argument(
+        "--poll", type=float, default=1.0, help="seconds between queue checks"
+    )
+    _add_metrics_arguments(work)
+
+    collect = queue_sub.add_parser(
+        "collect", help="write job results as they arrive"
+    )
+    collect.add_argument("queue", help="queue URL or SQLite file path")
+    collect.add_argument("--out", required=True, help="output directory")
+    collect.add_argument("--format", choices=TABLE_FORMATS, default="csv")
+    collect.add_argument(
+        "--lease",
+        type=float,
+        default=3600.0,
+        help="seconds before a claimed job is handed to another worker",
+    )
+    collect.add_argument(
+        "--max-attempts",
+        type=int,
+        default=2,
+        help="times a job may be claimed before it is failed",
+    )
+    collect.add_argument(
+        "--poll", type=float, default=1.0, help="seconds between queue checks"
+    )
+
+
+def _queue_submit(args) -> int:
+    jobs = _jobs_from_args(args)
+    queue = open_queue(args.queue)
+    try:
+        n = Coordinator(queue).submit(jobs)
+    finally:
+        queue.close()
+    print(f"submitted {n} jobs")  # noqa: T201
+    return 0
+
+
+def _queue_work(args) -> int:
+    queue = open_queue(args.queue)
+    metrics, metrics_server = _metrics_from_args(args)
+    worker = Worker(
+        queue,
+        lib_dir=args.lib_dir,
+        variants=args.variants,
+        workdir=args.workdir,
+        cache=(
+            ResultCache(args.cache_dir, max_bytes=args.cache_size)
+            if args.cache_dir
+            else None
+        ),
+        metrics=metrics,
+    )
+    try:
+        with metrics_server:
+            n = worker.run(
+                max_jobs=args.max_jobs,
+                exit_when_empty=args.exit_when_empty,
+                poll_interval=args.poll,
+            )
+    finally:
+        worker.close()
+        queue.close()
+    logging.info(f"Worker {worker.worker_id} ran {n} jobs.")
+    return 0
+
+
+def _queue_collect(args) -> int:
+    queue = open_queue(args.queue)
+    coordinator = Coordinator(
+        queue, lease=args.lease, max_attempts=args.max_attempts
+    )
+    failed = 0
+    try:
+        for result in coordinator.stream(poll_interval=args.poll):
+            if result.ok:
+                result.write(args.out, fmt=args.format)
+            else:
+                failed += 1
+                logging.error(f"Job {result.job_id} failed: {result.error}")
+    finally:
+        queue.close()
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the argument parser for the `fvs2py` command."""
+    parser = argparse.ArgumentParser(prog="fvs2py", description=__doc__)
+    parser.add_argument(
+        "-v", "--verbose", action="count", default=0, help="more logging"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    _add_run_parser(subparsers)
+    _add_queue_parsers(subparsers)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Runs the `fvs2py` command, returning the process exit code."""
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.WARNING - 10 * min(args.verbose, 2),
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    if args.command == "run":
+        return _run(args)
+    if args.command == "queue":
+        handlers = {
+            "submit": _queue_submit,
+            "work": _queue_work,
+            "collect": _queue_collect,
+        }
+        return handlers[args.queue_command](args)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
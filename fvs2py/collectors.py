@@ -0,0 +1,259 @@
+"""Collectors that accumulate FVS outputs across stops of a run."""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import tempfile
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from fvs2py.constants import (
+    CYCLE_COLUMN_NAME,
+    STAND_ID_COLUMN_NAME,
+    STAND_INDEX_COLUMN_NAME,
+    TREE_ATTRS,
+    YEAR_COLUMN_NAME,
+)
+
+if TYPE_CHECKING:
+    from fvs2py._base import FVS
+
+_INITIAL_CAPACITY = 4096
+
+
+class _GrowableColumn:
+    """A contiguous array that doubles its capacity as values are appended."""
+
+    __slots__ = ("_capacity", "_data", "size")
+
+    def __init__(self, dtype: type, capacity: int = _INITIAL_CAPACITY):
+        self._capacity = capacity
+        self._data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated, whether or not they hold values yet."""
+        return self._data.nbytes
+
+    def append(self, values: np.ndarray | float) -> None:
+        values = np.atleast_1d(values)
+        end = self.size + values.size
+        if end > self._data.size:
+            grown = np.empty(max(end, 2 * self._data.size), self._data.dtype)
+            grown[: self.size] = self._data[: self.size]
+            self._data = grown
+        self._data[self.size : end] = values
+        self.size = end
+
+    def fill(self, value: float, n: int) -> None:
+        self.append(np.full(n, value, dtype=self._data.dtype))
+
+    def values(self) -> np.ndarray:
+        return self._data[: self.size]
+
+    def clear(self) -> None:
+        """Drops the values, giving back memory grown past the capacity."""
+        if self._data.size > self._capacity:
+            self._data = np.empty(self._capacity, dtype=self._data.dtype)
+        self.size = 0
+
+
+class TreeListCollector:
+    """Accumulates tree lists from many stops into one columnar table.
+
+    Each call to `collect` appends the current tree attribute vectors to
+    growable contiguous arrays, together with stand index, cycle and year
+    columns, so no DataFrame is built until `to_frame` (or `to_arrow`) is
+    called at the end. When `max_bytes` is set, the buffered columns are
+    written to `spill_dir` as `.npz` chunks whenever the memory allocated for
+    them grows past it, and shrunk back to their initial size.
+    """
+
+    def __init__(
+        self,
+        attrs: Iterable[str] | None = None,
+        max_bytes: int | None = None,
+        spill_dir: str | os.PathLike | None = None,
+    ):
+        """Creates an empty collector.
+
+        Args:
+            attrs (Iterable[str]): names of tree attributes to collect,
+                defaults to all of `fvs2py.constants.TREE_ATTRS`.
+            max_bytes (int): optional memory ceiling for buffered columns.
+            spill_dir (str | os.PathLike): where to spill chunks once
+                `max_bytes` is reached, defaults to a temporary directory.
+        """
+        self.attrs = TREE_ATTRS if attrs is None else tuple(attrs)
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self._owns_spill_dir = False
+        self.stands: list[dict] = []
+        self.spilled: list[Path] = []
+        dtypes = {
+            STAND_INDEX_COLUMN_NAME: np.int32,
+            CYCLE_COLUMN_NAME: np.int32,
+            YEAR_COLUMN_NAME: np.int32,
+            **dict.fromkeys(self.attrs, np.float64),
+        }
+        capacity = _INITIAL_CAPACITY
+        if max_bytes is not None:
+            # leave room to grow before the first spill
+            row_bytes = sum(
+                np.dtype(dtype).itemsize for dtype in dtypes.values()
+            )
+            capacity = max(1, min(capacity, max_bytes // (4 * row_bytes)))
+        self._columns = {
+            name: _GrowableColumn(dtype, capacity)
+            for name, dtype in dtypes.items()
+        }
+        self._last_cycle: int | None = None
+        self._spilled_rows = 0
+
+    def __len__(self) -> int:
+        return self._columns[CYCLE_COLUMN_NAME].size + self._spilled_rows
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated for the columns buffered in memory."""
+        return sum(column.nbytes for column in self._columns.values())
+
+    def collect(self, fvs: FVS) -> None:
+        """Appends the current tree list of `fvs` to the collector.
+
+        A new stand index is assigned whenever the stand identifiers change or
+        the cycle number does not advance.
+
+        Args:
+            fvs (FVS): an FVS instance stopped within a cycle.
+        """
+        evmon = fvs.get_evmon_attrs([CYCLE_COLUMN_NAME, YEAR_COLUMN_NAME])
+        cycle = int(evmon[CYCLE_COLUMN_NAME])
+        stand_ids = fvs.stand_ids
+        if (
+            not self.stands
+            or stand_ids != self.stands[-1]
+            or (self._last_cycle is not None and cycle <= self._last_cycle)
+        ):
+            self.stands.append(stand_ids)
+        self._last_cycle = cycle
+
+        values = fvs.get_tree_attrs(self.attrs)
+        ntrees = len(next(iter(values.values()), ()))
+        self._columns[STAND_INDEX_COLUMN_NAME].fill(
+            len(self.stands) - 1, ntrees
+        )
+        self._columns[CYCLE_COLUMN_NAME].fill(cycle, ntrees)
+        self._columns[YEAR_COLUMN_NAME].fill(
+            int(evmon[YEAR_COLUMN_NAME]), ntrees
+        )
+        for attr, column in values.items():
+            self._columns[attr].append(column)
+
+        if self.max_bytes is not None and self.nbytes > self.max_bytes:
+            self.spill()
+
+        return
+
+    def spill(self) -> Path | None:
+        """Writes buffered rows to a chunk file in `spill_dir`.
+
+        Returns:
+            the path of the chunk written, or None if nothing was buffered.
+        """
+        if self._columns[CYCLE_COLUMN_NAME].size == 0:
+            return None
+        if self.spill_dir is None:
+            self.spill_dir = Path(tempfile.mkdtemp(prefix="fvs2py_trees"))
+            self._owns_spill_dir = True
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spill_dir / f"chunk_{len(self.spilled):06d}.npz"
+        np.savez(path, **{k: c.values() for k, c in self._columns.items()})
+        self.spilled.append(path)
+        self._spilled_rows += self._columns[CYCLE_COLUMN_NAME].size
+        for column in self._columns.values():
+            column.clear()
+        logging.debug(f"Spilled tree list chunk to {path}.")
+        return path
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """Returns every collected column as a single contiguous array."""
+        chunks = []
+        for path in self.spilled:
+            with np.load(path) as data:
+                chunks.append({name: data[name] for name in self._columns})
+        chunks.append({k: c.values() for k, c in self._columns.items()})
+        if len(chunks) == 1:
+            return {name: values.copy() for name, values in chunks[0].items()}
+        return {
+            name: np.concatenate([chunk[name] for chunk in chunks])
+            for name in self._columns
+        }
+
+    def _stand_id_column(self, stand_index: np.ndarray) -> np.ndarray:
+        """Looks up the `stand_id` of each row from its stand index."""
+        ids = np.array([s[STAND_ID_COLUMN_NAME] for s in self.stands])
+        return ids[stand_index] if len(ids) else np.array([], dtype=str)
+
+    def to_frame(self, stand_ids: bool = True) -> pd.DataFrame:
+        """Materializes the collected tree lists as one DataFrame.
+
+        Args:
+            stand_ids (bool): add a `stand_id` column looked up from the
+                stand index.
+        """
+        trees = pd.DataFrame(self.to_arrays())
+        if stand_ids:
+            trees.insert(
+                0,
+                STAND_ID_COLUMN_NAME,
+                self._stand_id_column(trees[STAND_INDEX_COLUMN_NAME].values),
+            )
+        return trees
+
+    def to_arrow(self, stand_ids: bool = True):
+        """Materializes the collected tree lists as a `pyarrow.Table`.
+
+        Requires the optional `pyarrow` package.
+
+        Args:
+            stand_ids (bool): add a `stand_id` column looked up from the
+                stand index, as `to_frame` does.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as exc:
+            msg = (
+                "to_arrow requires pyarrow, install it with "
+                "`pip install pyarrow`"
+            )
+            raise ImportError(msg) from exc
+        arrays = self.to_arrays()
+        if stand_ids:
+            arrays = {
+                STAND_ID_COLUMN_NAME: self._stand_id_column(
+                    arrays[STAND_INDEX_COLUMN_NAME]
+                ),
+                **arrays,
+            }
+        return pa.table(arrays)
+
+    def cleanup(self) -> None:
+        """Removes spilled chunk files, and `spill_dir` if it created it."""
+        for path in self.spilled:
+            path.unlink(missing_ok=True)
+        self.spilled = []
+        self._spilled_rows = 0
+        if self._owns_spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+            self._owns_spill_dir = False
+
+        return
@@ -9,6 +9,73 @@ STR_NTREES = "ntrees"
 STAND_CN_COLUMN_NAME = "stand_cn"
 STAND_ID_COLUMN_NAME = "stand_id"
 MGMT_ID_COLUMN_NAME = "mgmt_id"
+STOP_POINT_CODE_COLUMN_NAME = "stop_point_code"
+STOP_POINT_YEAR_COLUMN_NAME = "stop_point_year"
+STAND_INDEX_COLUMN_NAME = "stand_index"
+CYCLE_COLUMN_NAME = "cycle"
+YEAR_COLUMN_NAME = "year"
+
+# names of tree attributes that can be read or written with fvsTreeAttr
+TREE_ATTRS = (
+    "id",
+    "species",
+    "tpa",
+    "mortpa",
+    "dbh",
+    "dg",
+    "ht",
+    "htg",
+    "crwdth",
+    "cratio",
+    "age",
+    "plot",
+    "tcuft",
+    "mcuft",
+    "bdft",
+    "plotsize",
+    "mgmtcd",
+)
+
+# columns of the tree records passed to fvsAddTrees, in order; the last four
+# are plot-level variables
+ADD_TREES_COLUMNS = (
+    "plot",
+    "species",
+    "tpa",
+    "dbh",
+    "dg",
+    "ht",
+    "htg",
+    "cratio",
+    "ipvars1",
+    "ipvars2",
+    "ipvars3",
+    "ipvars4",
+)
+
+# columns of each row returned by fvsSummary, in order
+SUMMARY_COLUMNS = (
+    "year",
+    "age",
+    "tpa",
+    "tcuft",
+    "mcuft",
+    "bdft",
+    "rtpa",
+    "rtcuft",
+    "rmcuft",
+    "rbdft",
+    "atba",
+    "atccf",
+    "attopht",
+    "prdlen",
+    "acc",
+    "mort",
+    "sampwt",
+    "fortyp",
+    "sizecls",
+    "stkcls",
+)
 
 NEEDED_ROUTINES = (
     "fvs",
@@ -31,3 +98,31 @@ NEEDED_ROUTINES = (
     "fvsTreeAttr",
     "fvsUnitConversion",
 )
+
+FVS_ITRNCD_NOT_STARTED = -1
+FVS_ITRNCD_GOOD_RUNNING_STATE = 0
+FVS_ITRNCD_ERROR = 1
+FVS_ITRNCD_FINISHED_ALL_STANDS = 2
+
+FVS_RESTART_CODE_DONE_RUNNING_STAND = 100
+STOP_POINT_AFTER_FIRST_EVMON = 2
+STOP_POINT_AFTER_INPUT = 7
+STOP_POINT_YEAR_EVERY_CYCLE = -1
+
+# where compiled FVS variant libraries are looked up, e.g. FVSpn.so
+DEFAULT_LIB_DIR = "/usr/local/lib"
+LIB_DIR_ENV_VAR = "FVS2PY_LIB_DIR"
+
+# memory-backed directory FVS output is redirected to, when it exists
+DEFAULT_SCRATCH_DIR = "/dev/shm"
+SCRATCH_DIR_ENV_VAR = "FVS2PY_SCRATCH_DIR"
+# gfortran creates scratch files (STATUS='SCRATCH') in this directory
+FORTRAN_TMPDIR_ENV_VAR = "GFORTRAN_TMPDIR"
+# inputs FVS looks for next to the keyword file, by its stem
+KEYFILE_INPUT_SUFFIXES = (".tre",)
+MAIN_OUTPUT_SUFFIX = ".out"
+
+# how FvsCore loads a variant: the compiled library, or a simulation of it
+BACKEND_CTYPES = "ctypes"
+BACKEND_SIMULATED = "simulated"
+BACKEND_ENV_VAR = "FVS2PY_BACKEND"
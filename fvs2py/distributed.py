@@ -0,0 +1,217 @@
+"""Coordinator and worker for running FVS jobs through a shared queue."""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import tempfile
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from fvs2py._base import FVS, scratch_root
+from fvs2py.cache import ResultCache
+from fvs2py.enums import FvsVariant
+from fvs2py.jobs import JOB_STATUS_FAILED, JobResult, JobSpec, run_job
+from fvs2py.metrics import variant_label
+from fvs2py.queues import JOB_STATUS_PENDING, JOB_STATUS_RUNNING, QueueBackend
+
+if TYPE_CHECKING:
+    from fvs2py.metrics import FvsMetrics
+
+
+class Coordinator:
+    """Submits jobs to a queue and streams their results back."""
+
+    def __init__(
+        self,
+        queue: QueueBackend,
+        lease: float = 3600.0,
+        max_attempts: int = 2,
+    ):
+        """Creates a coordinator for a queue.
+
+        Args:
+            queue (QueueBackend): the queue shared with workers.
+            lease (float): seconds a worker may hold a job before it is
+                assumed lost and the job is handed to another worker.
+            max_attempts (int): number of times a job may be claimed before it
+                is reported as failed.
+        """
+        self.queue = queue
+        self.lease = lease
+        self.max_attempts = max_attempts
+
+    def submit(self, jobs: Iterable[JobSpec]) -> int:
+        """Adds jobs to the queue, returning how many were added."""
+        return self.queue.submit(jobs)
+
+    def stream(
+        self,
+        poll_interval: float = 1.0,
+        cursor: int = 0,
+    ) -> Iterator[JobResult]:
+        """Yields results as workers post them until no jobs are outstanding.
+
+        Jobs whose lease expires are returned to the queue (or failed once
+        they reach `max_attempts`) while waiting.
+
+        Args:
+            poll_interval (float): seconds between checks of the queue.
+            cursor (int): position in the result stream to start from, 0 for
+                all results posted so far.
+        """
+        while True:
+            self.queue.requeue_stale(self.lease, self.max_attempts)
+            results, cursor = self.queue.results(cursor)
+            yield from results
+            counts = self.queue.counts()
+            if counts[JOB_STATUS_PENDING] + counts[JOB_STATUS_RUNNING] == 0:
+                results, cursor = self.queue.results(cursor)
+                yield from results
+                break
+            if not results:
+                time.sleep(poll_interval)
+
+        return
+
+
+class Worker:
+    """Claims jobs from a queue and runs them on warm FVS instances.
+
+    One `FVS` instance is kept per variant for the life of the worker, so the
+    variant library is only loaded once. An instance that fails a job is
+    closed and reloaded before its next job.
+    """
+
+    def __init__(
+        self,
+        queue: QueueBackend,
+        lib_dir: str | os.PathLike | None = None,
+        variants: Iterable[FvsVariant | str] | None = None,
+        workdir: str | os.PathLike | None = None,
+        worker_id: str | None = None,
+        cache: ResultCache | None = None,
+        metrics: FvsMetrics | None = None,
+    ):
+        """Creates a worker for a queue.
+
+        Args:
+            queue (QueueBackend): the queue shared with the coordinator.
+            lib_dir (str | os.PathLike): directory holding the FVS variant
+                libraries, see `FvsVariant.library_path`.
+            variants (Iterable): only claim jobs for these variants.
+            workdir (str | os.PathLike): scratch directory for job files,
+                defaults to a new temporary directory in `scratch_root()`
+                (tmpfs) when available, so FVS output never touches disk.
+            worker_id (str): name reported with results, defaults to
+                `<hostname>-<pid>`.
+            cache (ResultCache): optional cache consulted before running a
+                job, and filled with the outputs of jobs that run.
+            metrics (FvsMetrics): optional metrics to record stands and
+                failures (set as `FVS.metrics` on each instance), FVS reloads
+                and the queue's pending jobs in.
+        """
+        self.queue = queue
+        self.lib_dir = lib_dir
+        self.variants = (
+            None if variants is None else tuple(FvsVariant(v) for v in variants)
+        )
+        self.workdir = Path(
+            workdir
+            if workdir is not None
+            else tempfile.mkdtemp(prefix="fvs2py", dir=scratch_root())
+        )
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.cache = cache
+        self.jobs_done = 0
+        self.metrics = metrics
+        self._fvs: dict[FvsVariant, FVS] = {}
+
+    def get_fvs(self, variant: FvsVariant) -> FVS:
+        """Returns the warm FVS instance for a variant, loading it if needed."""
+        if variant not in self._fvs:
+            fvs = FVS(variant.library_path(self.lib_dir))
+            fvs.metrics = self.metrics
+            self._fvs[variant] = fvs
+        return self._fvs[variant]
+
+    def discard_fvs(self, variant: FvsVariant, recycled: bool = False) -> None:
+        """Closes the FVS instance for a variant so it is reloaded next time.
+
+        Args:
+            variant (FvsVariant): variant whose instance to close.
+            recycled (bool): whether the instance is discarded because a job
+                failed on it, which is counted in `worker_recycles`.
+        """
+        fvs = self._fvs.pop(variant, None)
+        if fvs is not None:
+            fvs._close()
+            if recycled and self.metrics is not None:
+                self.metrics.worker_recycles.inc(
+                    variant=variant_label(fvs.lib_path)
+                )
+
+    def run_once(self) -> bool:
+        """Claims and runs one job, returning False if none was available."""
+        job = self.queue.claim(self.worker_id, self.variants)
+        if self.metrics is not None:
+            self.metrics.queue_depth.set(
+                self.queue.counts()[JOB_STATUS_PENDING], queue="jobs"
+            )
+        if job is None:
+            return False
+
+        start = time.monotonic()
+        try:
+            result = run_job(
+                self.get_fvs(job.variant), job, self.workdir, cache=self.cache
+            )
+        except Exception as exc:  # noqa: BLE001
+            logging.warning(f"FVS job {job.job_id} failed: {exc}")
+            self.discard_fvs(job.variant, recycled=True)
+            result = JobResult(
+                job_id=job.job_id,
+                status=JOB_STATUS_FAILED,
+                error=f"{type(exc).__name__}: {exc}",
+                elapsed=time.monotonic() - start,
+            )
+        result.worker_id = self.worker_id
+        self.queue.complete(result)
+        self.jobs_done += 1
+
+        return True
+
+    def run(
+        self,
+        max_jobs: int | None = None,
+        exit_when_empty: bool = False,
+        poll_interval: float = 1.0,
+    ) -> int:
+        """Runs jobs until stopped, returning the number of jobs run.
+
+        Args:
+            max_jobs (int): stop after running this many jobs.
+            exit_when_empty (bool): stop as soon as no job can be claimed
+                instead of waiting for more.
+            poll_interval (float): seconds to wait before checking an empty
+                queue again.
+        """
+        start_count = self.jobs_done
+        while max_jobs is None or self.jobs_done - start_count < max_jobs:
+            if self.run_once():
+                continue
+            if exit_when_empty:
+                break
+            time.sleep(poll_interval)
+
+        return self.jobs_done - start_count
+
+    def close(self) -> None:
+        """Closes all FVS instances held by the worker."""
+        for variant in list(self._fvs):
+            self.discard_fvs(variant)
+
+        return
@@ -1,4 +1,10 @@
+from __future__ import annotations
+
+import os
 from enum import StrEnum
+from pathlib import Path
+
+from fvs2py.constants import DEFAULT_LIB_DIR, LIB_DIR_ENV_VAR
 
 
 class FvsVariant(StrEnum):
@@ -28,3 +34,15 @@ class FvsVariant(StrEnum):
     UTAH = "UT"  # Utah
     WESTERN_CASCADES = "WC"  # Westside Cascades
     WESTERN_SIERRAS = "WS"  # Western Sierra Nevada
+
+    def library_path(self, lib_dir: str | os.PathLike | None = None) -> Path:
+        """Returns the path to the compiled FVS library for this variant.
+
+        Args:
+            lib_dir (str | os.PathLike): optional directory holding the FVS
+                libraries. Defaults to the `FVS2PY_LIB_DIR` environment
+                variable, or `/usr/local/lib` when that is not set.
+        """
+        if lib_dir is None:
+            lib_dir = os.environ.get(LIB_DIR_ENV_VAR, DEFAULT_LIB_DIR)
+        return Path(lib_dir) / f"FVS{self.value.lower()}.so"
@@ -0,0 +1,353 @@
+"""Serializable FVS job specifications and results for batch execution."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+
+from fvs2py._base import FVS
+from fvs2py.cache import ResultCache, cache_key
+from fvs2py.constants import (
+    FVS_RESTART_CODE_DONE_RUNNING_STAND,
+    STAND_ID_COLUMN_NAME,
+    STOP_POINT_AFTER_INPUT,
+    STOP_POINT_CODE_COLUMN_NAME,
+    STOP_POINT_YEAR_COLUMN_NAME,
+)
+from fvs2py.enums import FvsVariant
+from fvs2py.pool import check_fvs_status
+from fvs2py.stops import StopPlan
+
+OUTPUT_SUMMARY = "summary"
+OUTPUT_TREE_LIST = "tree_list"
+JOB_OUTPUTS = (OUTPUT_SUMMARY, OUTPUT_TREE_LIST)
+
+JOB_STATUS_DONE = "done"
+JOB_STATUS_FAILED = "failed"
+
+TABLE_FORMATS = ("csv", "parquet")
+
+
+@dataclass
+class JobSpec:
+    """Everything a worker needs to run one FVS keyfile.
+
+    Attributes:
+        variant (FvsVariant): FVS variant whose library runs the job.
+        keyfile (str): content of the FVS keyword file.
+        inputs (dict): extra files referenced by the keyfile, such as tree
+            data, mapping file names to their text content. They are written
+            next to the keyfile before running.
+        stops (tuple): `(stop_point_code, stop_point_year)` pairs at which
+            outputs are captured within each stand, see `StopPlan`. Outputs
+            are always captured when each stand finishes.
+        outputs (tuple): names of the outputs to capture, from `JOB_OUTPUTS`.
+        job_id (str): unique identifier, generated when not given.
+    """
+
+    variant: FvsVariant
+    keyfile: str
+    inputs: dict[str, str] = field(default_factory=dict)
+    stops: tuple[tuple[int, int], ...] = ()
+    outputs: tuple[str, ...] = (OUTPUT_SUMMARY,)
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    def __post_init__(self):
+        self.variant = FvsVariant(self.variant)
+        self.stops = tuple((int(code), int(year)) for code, year in self.stops)
+        self.outputs = tuple(self.outputs)
+        StopPlan(self.stops)  # validates the stops
+        for output in self.outputs:
+            if output not in JOB_OUTPUTS:
+                msg = f"Unknown output requested: {output}"
+                raise ValueError(msg)
+        for name in self.inputs:
+            if Path(name).name != name:
+                msg = f"Input file names must not contain directories: {name}"
+                raise ValueError(msg)
+
+    @property
+    def stop_plan(self) -> StopPlan:
+        """The stops of the job as a `StopPlan`."""
+        return StopPlan(self.stops)
+
+    @classmethod
+    def from_keyfile(
+        cls,
+        variant: FvsVariant | str,
+        keyfile: str | os.PathLike,
+        **kwargs,
+    ) -> JobSpec:
+        """Creates a job from a keyfile on disk.
+
+        Args:
+            variant (FvsVariant | str): FVS variant to run the keyfile with.
+            keyfile (str | os.PathLike): path to the FVS keyword file.
+            **kwargs: other `JobSpec` fields.
+        """
+        return cls(
+            variant=FvsVariant(variant),
+            keyfile=Path(keyfile).read_text(),
+            **kwargs,
+        )
+
+    def to_json(self) -> str:
+        """Serializes the job to a JSON string."""
+        return json.dumps(
+            {
+                "job_id": self.job_id,
+                "variant": str(self.variant),
+                "keyfile": self.keyfile,
+                "inputs": self.inputs,
+                "stops": [list(stop) for stop in self.stops],
+                "outputs": list(self.outputs),
+            }
+        )
+
+    @classmethod
+    def from_json(cls, payload: str) -> JobSpec:
+        """Deserializes a job created by `to_json`."""
+        return cls(**json.loads(payload))
+
+
+@dataclass
+class JobResult:
+    """Outputs of a job, stored column-wise.
+
+    Attributes:
+        job_id (str): identifier of the job that produced the result.
+        status (str): `"done"` or `"failed"`.
+        tables (dict): maps each output name to a dict of equal-length
+            columns.
+        error (str): description of the failure, if any.
+        elapsed (float): seconds spent running the job.
+        worker_id (str): identifier of the worker that ran the job.
+        cached (bool): whether the tables came from a `ResultCache` instead of
+            running FVS.
+        timings (list): `{"stand_id": ..., "seconds": ...}` for each stand
+            simulated.
+        dims (dict): `FVS.dims` of the library that ran the job.
+    """
+
+    job_id: str
+    status: str
+    tables: dict[str, dict[str, list]] = field(default_factory=dict)
+    error: str | None = None
+    elapsed: float = 0.0
+    worker_id: str | None = None
+    cached: bool = False
+    timings: list[dict] = field(default_factory=list)
+    dims: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        """Whether the job completed without error."""
+        return self.status == JOB_STATUS_DONE
+
+    def to_json(self) -> str:
+        """Serializes the result to a JSON string."""
+        return json.dumps(
+            {
+                "job_id": self.job_id,
+                "status": self.status,
+                "tables": self.tables,
+                "error": self.error,
+                "elapsed": self.elapsed,
+                "worker_id": self.worker_id,
+                "cached": self.cached,
+                "timings": self.timings,
+                "dims": self.dims,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, payload: str) -> JobResult:
+        """Deserializes a result created by `to_json`."""
+        return cls(**json.loads(payload))
+
+    def to_frames(self) -> dict[str, pd.DataFrame]:
+        """Returns each output table as a DataFrame."""
+        return {name: pd.DataFrame(cols) for name, cols in self.tables.items()}
+
+    def write(self, out_dir: str | os.PathLike, fmt: str = "csv") -> list[Path]:
+        """Writes each output table to `out_dir` as `<job_id>.<table>.<fmt>`.
+
+        Args:
+            out_dir (str | os.PathLike): directory to write into.
+            fmt (str): `"csv"` or `"parquet"` (parquet requires pyarrow).
+
+        Returns:
+            list of the paths written.
+        """
+        if fmt not in TABLE_FORMATS:
+            msg = f"Unknown table format: {fmt}"
+            raise ValueError(msg)
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for name, df in self.to_frames().items():
+            path = out_dir / f"{self.job_id}.{name}.{fmt}"
+            if fmt == "parquet":
+                df.to_parquet(path, index=False)
+            else:
+                df.to_csv(path, index=False)
+            paths.append(path)
+        return paths
+
+
+def _capture(
+    fvs: FVS,
+    outputs: tuple[str, ...],
+    tables: dict[str, dict[str, list]],
+    stand_ids: dict,
+    stop_point_code: int,
+    stop_point_year: int,
+) -> None:
+    """Appends the requested outputs at the current stop to `tables`."""
+    for output in outputs:
+        if output == OUTPUT_TREE_LIST:
+            columns = {
+                name: values.tolist()
+                for name, values in fvs.get_tree_attrs().items()
+            }
+        else:
+            columns = fvs.summary.to_dict(orient="list")
+        nrows = len(next(iter(columns.values()), []))
+        columns = {
+            **{key: [val] * nrows for key, val in stand_ids.items()},
+            STOP_POINT_CODE_COLUMN_NAME: [stop_point_code] * nrows,
+            STOP_POINT_YEAR_COLUMN_NAME: [stop_point_year] * nrows,
+            **columns,
+        }
+        table = tables.setdefault(output, {})
+        for key, values in columns.items():
+            table.setdefault(key, []).extend(values)
+
+    return
+
+
+def run_job(
+    fvs: FVS,
+    job: JobSpec,
+    workdir: str | os.PathLike,
+    keep_files: bool = False,
+    cache: ResultCache | None = None,
+    on_stand: Callable[[dict], None] | None = None,
+) -> JobResult:
+    """Runs a job on an FVS instance and collects its outputs.
+
+    The keyfile and its inputs are written to `<workdir>/<job_id>/`, so any
+    files FVS writes land there as well. The directory is removed afterwards
+    unless `keep_files` is set.
+
+    When a `cache` is given and it holds the outputs of an identical run (same
+    keyfile, inputs, library, stops and outputs), those are returned without
+    running FVS. Outputs of successful runs are added to the cache.
+
+    Args:
+        fvs (FVS): FVS instance for the job's variant.
+        job (JobSpec): the job to run.
+        workdir (str | os.PathLike): scratch directory for job files.
+        keep_files (bool): keep the job directory after running.
+        cache (ResultCache): optional cache of previous results.
+        on_stand (Callable): optional callback given the stand identifiers of
+            each stand as it starts. FVS makes one extra stop per stand, just
+            after input is read, to provide them.
+
+    Returns:
+        a `JobResult` with status `"done"`.
+
+    Raises:
+        RuntimeError: if FVS reports an error while running the job.
+    """
+    start = time.monotonic()
+    key = None
+    if cache is not None:
+        key = cache_key(
+            job.keyfile, fvs.lib_path, job.inputs, job.stops, job.outputs
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            return JobResult(
+                job_id=job.job_id,
+                status=JOB_STATUS_DONE,
+                tables={
+                    name: {col: values.tolist() for col, values in cols.items()}
+                    for name, cols in cached.items()
+                },
+                elapsed=time.monotonic() - start,
+                cached=True,
+                dims=fvs.dims,
+            )
+
+    job_dir = Path(workdir) / job.job_id
+    job_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        keyfile_path = job_dir / f"{job.job_id}.key"
+        keyfile_path.write_text(job.keyfile)
+        for name, content in job.inputs.items():
+            (job_dir / name).write_text(content)
+
+        fvs.load_keyfile(keyfile_path)
+        tables: dict[str, dict[str, list]] = {}
+        timings = []
+        captured = plan = job.stop_plan
+        if on_stand is not None:
+            plan = plan.with_stop(STOP_POINT_AFTER_INPUT)
+        stand_start = time.monotonic()
+        for stop in fvs.run_plan(plan, include_stand_end=True):
+            state = fvs.refresh_state()
+            if stop.code == FVS_RESTART_CODE_DONE_RUNNING_STAND:
+                check_fvs_status(fvs)
+                _capture(fvs, job.outputs, tables, state.stand_ids, *stop)
+                timings.append(
+                    {
+                        STAND_ID_COLUMN_NAME: state.stand_id,
+                        "seconds": time.monotonic() - stand_start,
+                    }
+                )
+                stand_start = time.monotonic()
+                continue
+            if stop.code == STOP_POINT_AFTER_INPUT and on_stand is not None:
+                on_stand(state.stand_ids)
+            if stop in captured:
+                _capture(fvs, job.outputs, tables, state.stand_ids, *stop)
+        check_fvs_status(fvs)
+    finally:
+        if not keep_files:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    if cache is not None and key is not None:
+        cache.put(key, tables)
+
+    return JobResult(
+        job_id=job.job_id,
+        status=JOB_STATUS_DONE,
+        tables=tables,
+        elapsed=time.monotonic() - start,
+        timings=timings,
+        dims=fvs.dims,
+    )
+
+
+def run_job_task(
+    fvs: FVS,
+    job: JobSpec,
+    heartbeat: Callable[[dict], None],
+    workdir: str | os.PathLike,
+    cache: ResultCache | None = None,
+) -> JobResult:
+    """Runs a job as a `FvsWorkerPool` task.
+
+    Bind `workdir` and `cache` with `functools.partial` before handing this to
+    the pool; the pool's heartbeat is called as each stand starts.
+    """
+    return run_job(fvs, job, workdir, cache=cache, on_stand=heartbeat)
@@ -0,0 +1,513 @@
+"""Prometheus metrics for long-running FVS batch runs and worker services."""
+
+from __future__ import annotations
+
+import bisect
+import http.server
+import logging
+import math
+import os
+import socketserver
+import threading
+import time
+import weakref
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Self
+
+from fvs2py.constants import (
+    FVS_ITRNCD_ERROR,
+    FVS_ITRNCD_GOOD_RUNNING_STATE,
+    FVS_RESTART_CODE_DONE_RUNNING_STAND,
+)
+
+if TYPE_CHECKING:
+    from fvs2py._base import FVS
+
+# seconds; FVS stands take from milliseconds to minutes
+DEFAULT_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_PATH = "/metrics"
+HEALTH_PATH = "/healthz"
+
+ProcessSource = Callable[[], Mapping[str, int]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)
+    )
+    return f"{{{pairs}}}"
+
+
+def variant_label(lib_path: str | os.PathLike) -> str:
+    """Returns the variant code of an FVS library path, e.g. `SO`."""
+    stem = Path(lib_path).stem
+    return stem[3:].upper() if stem.upper().startswith("FVS") else stem
+
+
+def resident_memory_bytes(pid: int | None = None) -> int | None:
+    """Returns the resident set size of a process, or None if unknown.
+
+    Reads `/proc/<pid>/statm`, so only works on Linux.
+    """
+    path = f"/proc/{'self' if pid is None else pid}/statm"
+    try:
+        with open(path) as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+class _Metric:
+    """A metric family whose samples are keyed by their label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def _key(self, labels: Mapping[str, object]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            msg = f"{self.name} takes labels {self.labelnames}, got {labels}"
+            raise ValueError(msg)
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def get(self, **labels) -> float:
+        """Returns the current value of a sample, 0 if never set."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[tuple[str, tuple[str, ...], float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", key, value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for suffix, key, value in self.samples():
+            labelnames = self.labelnames + (("le",) if suffix == "_le" else ())
+            yield (
+                f"{self.name}{'_bucket' if suffix == '_le' else suffix}"
+                f"{_format_labels(labelnames, key)} {_format_value(value)}"
+            )
+
+
+class Counter(_Metric):
+    """A value that only goes up, such as the number of stands completed."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Adds `amount` to the sample with the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+        return
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, such as the depth of a queue.
+
+    A gauge given a `func` is computed when metrics are collected instead;
+    `func` returns a mapping of label value tuples to values.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        doc: str,
+        labelnames: Sequence[str] = (),
+        func: Callable[[], Mapping[tuple[str, ...], float]] | None = None,
+    ):
+        super().__init__(name, doc, labelnames)
+        self.func = func
+
+    def set(self, value: float, **labels) -> None:
+        """Sets the sample with the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+        return
+
+    def samples(self) -> Iterator[tuple[str, tuple[str, ...], float]]:
+        """Yields `(suffix, label values, value)` for each sample."""
+        if self.func is None:
+            yield from super().samples()
+            return
+        for key, value in self.func().items():
+            yield "", tuple(key), value
+
+
+class Histogram(_Metric):
+    """Counts observations, such as stand run times, into buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        doc: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        """Records one observation in the sample with the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            # per-bucket counts, then the +Inf bucket, sum and count
+            counts = self._histograms.setdefault(
+                key, [0.0] * (len(self.buckets) + 3)
+            )
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+        return
+
+    def get(self, **labels) -> float:
+        """Returns the number of observations of a sample."""
+        counts = self._histograms.get(self._key(labels))
+        return counts[-1] if counts else 0.0
+
+    def samples(self) -> Iterator[tuple[str, tuple[str, ...], float]]:
+        """Yields the cumulative buckets, sum and count of each sample."""
+        with self._lock:
+            items = [
+                (key, list(counts)) for key, counts in self._histograms.items()
+            ]
+        for key, counts in items:
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield "_le", (*key, _format_value(bound)), cumulative
+            yield "_sum", key, counts[-2]
+            yield "_count", key, counts[-1]
+
+
+class MetricsRegistry:
+    """A set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Adds a metric, returning the one already registered by its name."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, doc: str, labelnames=()) -> Counter:
+        """Registers a `Counter`."""
+        return self.register(Counter(name, doc, labelnames))
+
+    def gauge(self, name: str, doc: str, labelnames=(), func=None) -> Gauge:
+        """Registers a `Gauge`."""
+        return self.register(Gauge(name, doc, labelnames, func))
+
+    def histogram(
+        self,
+        name: str,
+        doc: str,
+        labelnames=(),
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Registers a `Histogram`."""
+        return self.register(Histogram(name, doc, labelnames, buckets))
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as exc:  # noqa: BLE001
+                # one bad gauge is not fatal
+                logging.warning(f"Could not collect {metric.name}: {exc}")
+        return "\n".join(lines) + "\n"
+
+
+class FvsMetrics:
+    """The metrics reported by fvs2py runs.
+
+    Pass an instance to `FvsWorkerPool`, `distributed.Worker` or set it as
+    `FVS.metrics`, and serve it with `MetricsServer`. Metrics are counted in
+    the process that owns the instance: a pool counts stands from the worker
+    heartbeats it receives, rather than from inside its workers.
+    """
+
+    def __init__(self, registry: MetricsRegistry | None = None):
+        """Registers the fvs2py metrics.
+
+        Args:
+            registry (MetricsRegistry): registry to add the metrics to, a new
+                one by default.
+        """
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self.stands_completed = self.registry.counter(
+            "fvs2py_stands_completed_total",
+            "Stands simulated to the end.",
+            ("variant",),
+        )
+        self.stand_failures = self.registry.counter(
+            "fvs2py_stand_failures_total",
+            "Stands FVS failed, by FVS exit_code and itrncd.",
+            ("variant", "exit_code", "itrncd"),
+        )
+        self.worker_failures = self.registry.counter(
+            "fvs2py_worker_failures_total",
+            "Workers that crashed or hung running a stand, by reason.",
+            ("variant", "reason"),
+        )
+        self.stand_seconds = self.registry.histogram(
+            "fvs2py_stand_seconds",
+            "Wall-clock seconds taken to simulate a stand.",
+            ("variant",),
+        )
+        self.worker_recycles = self.registry.counter(
+            "fvs2py_worker_recycles_total",
+            "Worker processes replaced with fresh ones.",
+            ("variant",),
+        )
+        self.queue_depth = self.registry.gauge(
+            "fvs2py_queue_depth",
+            "Items waiting to be run.",
+            ("queue",),
+        )
+        self.busy_workers = self.registry.gauge(
+            "fvs2py_busy_workers",
+            "Workers currently running an item.",
+            ("variant",),
+        )
+        self._process_sources: list[ProcessSource] = []
+        self._process_lock = threading.Lock()
+        self.resident_memory = self.registry.gauge(
+            "fvs2py_resident_memory_bytes",
+            "Resident set size of this process and of its worker processes.",
+            ("process",),
+            func=self._resident_memory,
+        )
+        self._stand_started: weakref.WeakKeyDictionary[FVS, float] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def add_process_source(self, source: ProcessSource) -> None:
+        """Reports the RSS of the processes `source` returns, by name."""
+        with self._process_lock:
+            self._process_sources.append(source)
+
+        return
+
+    def _resident_memory(self) -> dict[tuple[str, ...], float]:
+        pids = {"main": os.getpid()}
+        with self._process_lock:
+            sources = list(self._process_sources)
+        for source in sources:
+            pids.update(source())
+        values = {}
+        for name, pid in pids.items():
+            rss = resident_memory_bytes(pid)
+            if rss is not None:
+                values[(name,)] = rss
+        return values
+
+    def render(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        return self.registry.render()
+
+    def stand_finished(self, variant: str, seconds: float) -> None:
+        """Records a stand simulated to the end."""
+        self.stands_completed.inc(variant=variant)
+        self.stand_seconds.observe(seconds, variant=variant)
+
+        return
+
+    def stand_failed(
+        self, variant: str, exit_code: int | None, itrncd: int | None
+    ) -> None:
+        """Records a stand FVS failed."""
+        self.stand_failures.inc(
+            variant=variant,
+            exit_code="" if exit_code is None else exit_code,
+            itrncd="" if itrncd is None else itrncd,
+        )
+
+        return
+
+    def observe_run(self, fvs: FVS, started: float, itrncd_before: int) -> None:
+        """Records the outcome of a call to `FVS.run`.
+
+        Called by `FVS.run` when `FVS.metrics` is set. A stand is timed from
+        the first call to `run` within it until it finishes or fails.
+
+        Args:
+            fvs (FVS): the instance that ran.
+            started (float): `time.monotonic()` when the call started.
+            itrncd_before (int): `itrncd` when the call started; nothing is
+                recorded for calls that could not run FVS.
+        """
+        if itrncd_before != FVS_ITRNCD_GOOD_RUNNING_STATE:
+            return
+        stand_started = self._stand_started.setdefault(fvs, started)
+        variant = variant_label(fvs.lib_path)
+        itrncd = fvs.itrncd
+        exit_code = fvs.exit_code
+        if itrncd == FVS_ITRNCD_ERROR or exit_code != 0:
+            self.stand_failed(variant, exit_code, itrncd)
+            del self._stand_started[fvs]
+        elif (
+            itrncd == FVS_ITRNCD_GOOD_RUNNING_STATE
+            and fvs.restart_code == FVS_RESTART_CODE_DONE_RUNNING_STAND
+        ):
+            self.stand_finished(variant, time.monotonic() - stand_started)
+            del self._stand_started[fvs]
+        elif itrncd != FVS_ITRNCD_GOOD_RUNNING_STATE:
+            del self._stand_started[fvs]
+
+        return
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    metrics: FvsMetrics | MetricsRegistry
+
+    def do_GET(self) -> None:  # noqa: N802
+        path = self.path.split("?", 1)[0]
+        if path == METRICS_PATH:
+            body = self.metrics.render().encode()
+        elif path == HEALTH_PATH:
+            body = b"ok\n"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        return str(self.client_address[0] if self.client_address else "unix")
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002
+        logging.debug(f"metrics: {format % args}")
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+class MetricsServer:
+    """Serves metrics over HTTP from a background thread.
+
+    `GET /metrics` returns the metrics and `GET /healthz` returns `ok` while
+    the serving process is alive. Listens on a local TCP port, or on a Unix
+    socket when `unix_socket` is given.
+    """
+
+    def __init__(
+        self,
+        metrics: FvsMetrics | MetricsRegistry,
+        port: int = 0,
+        host: str = "127.0.0.1",
+        unix_socket: str | os.PathLike | None = None,
+    ):
+        """Starts serving.
+
+        Args:
+            metrics (FvsMetrics | MetricsRegistry): what to serve.
+            port (int): TCP port to listen on; 0 picks a free one, see
+                `address`.
+            host (str): interface to listen on, local only by default.
+            unix_socket (str | os.PathLike): path of a Unix socket to listen
+                on instead of a TCP port; replaced if it exists.
+        """
+        handler = type(
+            "MetricsHandler", (_MetricsHandler,), {"metrics": metrics}
+        )
+        if unix_socket is not None:
+            self.unix_socket = Path(unix_socket)
+            self.unix_socket.unlink(missing_ok=True)
+            self._server = _UnixHTTPServer(str(self.unix_socket), handler)
+        else:
+            self.unix_socket = None
+            self._server = http.server.ThreadingHTTPServer(
+                (host, port), handler
+            )
+            self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="fvs2py-metrics",
+            daemon=True,
+        )
+        self._thread.start()
+        logging.info(f"Serving metrics on {self.address}")
+
+    @property
+    def address(self) -> str | tuple[str, int]:
+        """The Unix socket path, or the `(host, port)` listened on."""
+        if self.unix_socket is not None:
+            return str(self.unix_socket)
+        return self._server.server_address[:2]
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stops serving."""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        if self.unix_socket is not None:
+            self.unix_socket.unlink(missing_ok=True)
+
+        return
@@ -0,0 +1,303 @@
+"""Parallel evaluation of candidate management schedules for optimizers."""
+
+from __future__ import annotations
+
+import collections
+import logging
+import os
+import shutil
+import tempfile
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import NamedTuple, Self
+
+from fvs2py._base import FVS, scratch_root
+from fvs2py.constants import (
+    FVS_ITRNCD_GOOD_RUNNING_STATE,
+    STOP_POINT_AFTER_FIRST_EVMON,
+)
+from fvs2py.enums import FvsVariant
+from fvs2py.jobs import JobSpec
+from fvs2py.pool import FvsWorkerPool, Heartbeat, TaskResult, check_fvs_status
+
+Objective = Callable[[FVS], float]
+
+
+class Activity(NamedTuple):
+    """An FVS activity to schedule, as passed to `FVS.add_activity`."""
+
+    year: int
+    activity_code: int
+    parms: tuple[float, ...] = ()
+
+
+Schedule = Sequence[Activity]
+
+
+@dataclass
+class _Run:
+    """One simulation of the base stand handed to a pool worker."""
+
+    keyfile: Path
+    schedule: tuple[Activity, ...] = ()
+    objective: Objective | None = None
+    state_file: Path | None = None
+    save_year: int | None = None
+
+
+def divergence_year(schedule: Schedule) -> int | None:
+    """Returns the first year a schedule departs from the untreated stand."""
+    return min((activity.year for activity in schedule), default=None)
+
+
+def group_by_divergence(
+    schedules: Iterable[Schedule],
+) -> dict[int | None, list[int]]:
+    """Groups schedule indices by the year they diverge from no treatment.
+
+    Every schedule in a group shares the simulation up to that year, which
+    only has to be run once. Schedules without activities are grouped under
+    `None`.
+    """
+    groups: dict[int | None, list[int]] = collections.defaultdict(list)
+    for i, schedule in enumerate(schedules):
+        groups[divergence_year(schedule)].append(i)
+    return dict(groups)
+
+
+def _finish(fvs: FVS) -> None:
+    """Runs FVS until it has processed every stand."""
+    while fvs.itrncd == FVS_ITRNCD_GOOD_RUNNING_STATE:
+        fvs.run(stop_point_code=0, stop_point_year=0)
+    check_fvs_status(fvs)
+
+    return
+
+
+def evaluate_schedule(fvs: FVS, run: _Run, heartbeat: Heartbeat) -> float:
+    """Simulates the base stand under one schedule and scores it.
+
+    This is the `FvsWorkerPool` task used by `ScheduleEvaluator`. The stand is
+    run (or resumed from a shared saved state) to just after the first call
+    to the Event Monitor in the year the schedule diverges, the schedule's
+    activities are added there, and the objective is computed once the stand
+    has been simulated.
+
+    When `run.save_year` is set, the untreated stand is instead simulated up
+    to that point of that year only, its state is written to
+    `run.state_file`, and `0.0` is returned.
+    """
+    if run.save_year is not None:
+        fvs.load_keyfile(
+            run.keyfile,
+            save_state=(
+                STOP_POINT_AFTER_FIRST_EVMON,
+                run.save_year,
+                run.state_file,
+            ),
+        )
+        _finish(fvs)
+        if not run.state_file.exists():
+            msg = f"FVS did not save its state to {run.state_file}"
+            raise RuntimeError(msg)
+        return 0.0
+
+    year = divergence_year(run.schedule)
+    if run.state_file is not None:
+        fvs.load_state(run.state_file, run.keyfile)
+    else:
+        fvs.load_keyfile(run.keyfile)
+
+    if year is not None:
+        fvs.run(
+            stop_point_code=STOP_POINT_AFTER_FIRST_EVMON, stop_point_year=year
+        )
+        check_fvs_status(fvs)
+        if fvs.restart_code != STOP_POINT_AFTER_FIRST_EVMON:
+            msg = f"FVS did not stop in {year} to add the schedule"
+            raise RuntimeError(msg)
+        heartbeat(fvs.stand_ids)
+        for activity in run.schedule:
+            fvs.add_activity(*activity)
+
+    fvs.run(stop_point_code=0, stop_point_year=0)
+    check_fvs_status(fvs)
+    value = float(run.objective(fvs))
+    _finish(fvs)
+
+    return value
+
+
+class ScheduleEvaluator:
+    """Scores batches of candidate schedules for a stand in parallel.
+
+    Candidates are run across a `FvsWorkerPool` per variant, kept warm between
+    calls to `evaluate`. Candidates whose first activity falls in the same
+    year share the untreated simulation up to that year: it is run once, its
+    state saved, and each candidate resumes from the saved state. Schedules
+    that diverge late therefore only pay for the years after they diverge.
+
+    Objectives are called with the `FVS` instance once the stand has been
+    simulated, so they can read `FVS.summary`, `FVS.get_tree_attrs` and
+    Event Monitor variables. Objectives must be picklable when the pool uses
+    the `"spawn"` start method.
+    """
+
+    def __init__(
+        self,
+        lib_dir: str | os.PathLike | None = None,
+        processes: int | None = None,
+        timeout: float | None = None,
+        workdir: str | os.PathLike | None = None,
+        share_prefix: bool = True,
+        mp_context: str | None = "spawn",
+    ):
+        """Creates an evaluator; worker pools are started on first use.
+
+        Args:
+            lib_dir (str | os.PathLike): directory holding FVS libraries, see
+                `FvsVariant.library_path`.
+            processes (int): worker processes per variant, defaults to the
+                number of CPUs.
+            timeout (float): seconds a candidate may run before its worker is
+                considered hung.
+            workdir (str | os.PathLike): scratch directory for keyfiles and
+                saved states, defaults to a temporary directory in
+                `scratch_root()`.
+            share_prefix (bool): simulate shared years once per group of
+                candidates diverging in the same year.
+            mp_context (str): multiprocessing start method.
+        """
+        self.lib_dir = lib_dir
+        self.processes = processes
+        self.timeout = timeout
+        self.share_prefix = share_prefix
+        self.mp_context = mp_context
+        self._own_workdir = workdir is None
+        self.workdir = Path(
+            tempfile.mkdtemp(prefix="fvs2py_opt", dir=scratch_root())
+            if workdir is None
+            else workdir
+        )
+        self._pools: dict[FvsVariant, FvsWorkerPool] = {}
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def pool(self, variant: FvsVariant | str) -> FvsWorkerPool:
+        """Returns the warm worker pool of a variant, creating it if needed."""
+        variant = FvsVariant(variant)
+        if variant not in self._pools:
+            self._pools[variant] = FvsWorkerPool(
+                variant.library_path(self.lib_dir),
+                processes=self.processes,
+                task=evaluate_schedule,
+                timeout=self.timeout,
+                max_retries=0,
+                mp_context=self.mp_context,
+            )
+        return self._pools[variant]
+
+    def _write_base(self, base: JobSpec) -> Path:
+        base_dir = self.workdir / base.job_id
+        base_dir.mkdir(parents=True, exist_ok=True)
+        for name, content in base.inputs.items():
+            (base_dir / name).write_text(content)
+        keyfile = base_dir / f"{base.job_id}.key"
+        keyfile.write_text(base.keyfile)
+        return keyfile
+
+    def _save_prefixes(
+        self, pool: FvsWorkerPool, keyfile: Path, years: Iterable[int]
+    ) -> dict[int, Path]:
+        """Saves the untreated stand's state at each year, in parallel."""
+        runs = [
+            _Run(
+                keyfile=keyfile,
+                state_file=keyfile.with_name(f"prefix_{year}.stop"),
+                save_year=year,
+            )
+            for year in years
+        ]
+        states = {}
+        for result in pool.imap_unordered(runs):
+            year = result.item.save_year
+            if result.ok:
+                states[year] = result.item.state_file
+            else:
+                logging.warning(
+                    f"Could not save state in {year}, candidates diverging "
+                    f"then are simulated from the start: {result.error}"
+                )
+        return states
+
+    def imap_unordered(
+        self,
+        base: JobSpec,
+        schedules: Sequence[Schedule],
+        objective: Objective,
+    ) -> Iterator[TaskResult]:
+        """Evaluates schedules, yielding results as they finish.
+
+        Args:
+            base (JobSpec): the base stand, as a keyfile with its inventory
+                given in `inputs`. Only its variant, keyfile and inputs are
+                used, and the keyfile should hold a single stand.
+            schedules (Sequence): candidate schedules, each a sequence of
+                `Activity`.
+            objective (Callable): scores the simulated stand, called as
+                `objective(fvs)`.
+
+        Yields:
+            a `TaskResult` per schedule, whose `index` is the schedule's
+            position and whose `value` is its objective value.
+        """
+        pool = self.pool(base.variant)
+        keyfile = self._write_base(base)
+        groups = group_by_divergence(schedules)
+        shared = [
+            year
+            for year, indices in groups.items()
+            if year is not None and self.share_prefix and len(indices) > 1
+        ]
+        states = self._save_prefixes(pool, keyfile, shared) if shared else {}
+
+        runs = [
+            _Run(
+                keyfile=keyfile,
+                schedule=tuple(Activity(*activity) for activity in schedule),
+                objective=objective,
+                state_file=states.get(divergence_year(schedule)),
+            )
+            for schedule in schedules
+        ]
+        yield from pool.imap_unordered(runs)
+
+    def evaluate(
+        self,
+        base: JobSpec,
+        schedules: Sequence[Schedule],
+        objective: Objective,
+    ) -> list[TaskResult]:
+        """Evaluates schedules, returning results in the order given.
+
+        See `imap_unordered` for the arguments.
+        """
+        return sorted(
+            self.imap_unordered(base, schedules, objective),
+            key=lambda result: result.index,
+        )
+
+    def close(self) -> None:
+        """Stops the worker pools and removes the scratch directory."""
+        for pool in self._pools.values():
+            pool.close()
+        self._pools = {}
+        if self._own_workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+        return
@@ -0,0 +1,561 @@
+"""Supervised pool of FVS worker processes for long batch runs."""
+
+from __future__ import annotations
+
+import collections
+import contextlib
+import logging
+import multiprocessing as mp
+import os
+import shutil
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Self
+
+from fvs2py._base import FVS
+from fvs2py.constants import (
+    FVS_ITRNCD_ERROR,
+    FVS_ITRNCD_GOOD_RUNNING_STATE,
+    STOP_POINT_AFTER_INPUT,
+)
+from fvs2py.metrics import variant_label
+
+if TYPE_CHECKING:
+    from fvs2py.metrics import FvsMetrics
+    from fvs2py.transport import SlabRing
+
+_MSG_STAND = "stand"
+_MSG_OUTPUT = "output"
+_MSG_DONE = "done"
+_MSG_FAILED = "failed"
+
+Heartbeat = Callable[[dict], None]
+Task = Callable[[FVS, Any, Heartbeat], Any]
+
+
+def run_keyfile(fvs: FVS, keyfile: str | os.PathLike, heartbeat: Heartbeat):
+    """Runs every stand in a keyfile to completion.
+
+    FVS is stopped once per stand just after input has been read so the stand
+    identifiers can be reported to the supervising pool before the stand is
+    simulated.
+
+    Args:
+        fvs (FVS): a warm FVS instance owned by the worker process.
+        keyfile (str | os.PathLike): path to the FVS keyword file.
+        heartbeat (Callable): called with the stand identifiers of each stand
+            as it starts.
+
+    Returns:
+        list of stand identification dicts, one per stand simulated.
+
+    Raises:
+        RuntimeError: if FVS signals an error via `itrncd` or `exit_code`.
+    """
+    fvs.load_keyfile(keyfile)
+    stands = []
+    while fvs.itrncd == FVS_ITRNCD_GOOD_RUNNING_STATE:
+        fvs.run(stop_point_code=STOP_POINT_AFTER_INPUT, stop_point_year=0)
+        if fvs.itrncd != FVS_ITRNCD_GOOD_RUNNING_STATE:
+            break
+        stand_ids = fvs.stand_ids
+        heartbeat(stand_ids)
+        fvs.run(stop_point_code=0, stop_point_year=0)
+        check_fvs_status(fvs)
+        stands.append(stand_ids)
+    check_fvs_status(fvs)
+
+    return stands
+
+
+class _WorkerHeartbeat:
+    """The heartbeat handed to tasks in a worker process.
+
+    Calling it reports the stand that has just started; `output` sends a
+    partial result to the supervisor right away.
+    """
+
+    def __init__(self, conn: Any, worker_id: int, job_id: int):
+        self.conn = conn
+        self.worker_id = worker_id
+        self.job_id = job_id
+
+    def __call__(self, stand_ids: dict) -> None:
+        self.conn.send((_MSG_STAND, self.worker_id, self.job_id, stand_ids))
+
+    def output(self, value: Any) -> None:
+        self.conn.send((_MSG_OUTPUT, self.worker_id, self.job_id, value))
+
+
+def send_output(heartbeat: Heartbeat, value: Any) -> bool:
+    """Sends part of a task's result to the pool before the task finishes.
+
+    The supervising `FvsWorkerPool` passes it to its `on_output` callback as
+    soon as it arrives, e.g. so the parent can consume each stand's outputs
+    while the rest of a keyfile runs.
+
+    Args:
+        heartbeat (Callable): the heartbeat the task was called with.
+        value: picklable partial result.
+
+    Returns:
+        whether the value was sent; False when the task is not running in a
+        `FvsWorkerPool` worker, in which case the task should return it.
+    """
+    output = getattr(heartbeat, "output", None)
+    if output is None:
+        return False
+    output(value)
+    return True
+
+
+def check_fvs_status(fvs: FVS) -> None:
+    """Raises if FVS has flagged the current run as failed.
+
+    Args:
+        fvs (FVS): the FVS instance to check.
+
+    Raises:
+        RuntimeError: if `itrncd` is 1 or `exit_code` is non-zero.
+    """
+    if fvs.itrncd == FVS_ITRNCD_ERROR:
+        msg = "FVS detected an error and must be reset (itrncd=1)."
+        raise RuntimeError(msg)
+    if fvs.exit_code != 0:
+        msg = f"FVS exited with code {fvs.exit_code}."
+        raise RuntimeError(msg)
+
+
+def _status(fvs: FVS) -> tuple[int | None, int | None]:
+    """Returns FVS's `exit_code` and `itrncd`, or None where unreadable."""
+    try:
+        return fvs.exit_code, fvs.itrncd
+    except Exception:  # noqa: BLE001 - only used to label a failure
+        return None, None
+
+
+def _worker_main(
+    worker_id: int,
+    lib_path: Path,
+    task: Task,
+    conn: Any,
+) -> None:
+    """Entry point of a worker process.
+
+    The worker exits after the first failed task so the supervisor can replace
+    it with a fresh process (and a fresh load of the FVS library). Messages
+    are written synchronously to `conn` so that the supervisor still receives
+    the stand identifiers if FVS later kills the process.
+    """
+    fvs = FVS(lib_path)
+    while True:
+        try:
+            item = conn.recv()
+        except EOFError:
+            break
+        if item is None:
+            break
+        job_id, payload = item
+        heartbeat = _WorkerHeartbeat(conn, worker_id, job_id)
+        try:
+            value = task(fvs, payload, heartbeat)
+        except Exception as exc:  # noqa: BLE001
+            error = f"{type(exc).__name__}: {exc}"
+            conn.send((_MSG_FAILED, worker_id, job_id, (error, *_status(fvs))))
+            break
+        conn.send((_MSG_DONE, worker_id, job_id, value))
+
+    return
+
+
+@dataclass
+class TaskResult:
+    """Outcome of a single item processed by a `FvsWorkerPool`."""
+
+    index: int
+    item: Any
+    value: Any = None
+    error: str | None = None
+    stand_ids: dict | None = None
+    attempts: int = 0
+    elapsed: float = 0.0
+    quarantined: bool = False
+    outputs: list = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """Whether the item was processed without error."""
+        return self.error is None
+
+
+@dataclass
+class _Job:
+    index: int
+    item: Any
+    attempts: int = 0
+    started: float = 0.0
+    stand_ids: dict | None = None
+    stand_started: float | None = None
+    outputs: list = field(default_factory=list)
+
+
+@dataclass
+class _Worker:
+    worker_id: int
+    process: Any
+    conn: Any
+    job: _Job | None = None
+    deadline: float | None = None
+    tasks_done: int = 0
+
+
+class FvsWorkerPool:
+    """A supervised pool of worker processes each running a warm FVS instance.
+
+    Every worker loads the FVS library once and reuses it for each item it is
+    handed. The supervisor watches for FVS errors (`itrncd == 1`, non-zero
+    `exit_code`), Python exceptions, crashed workers (e.g., a Fortran `STOP` or
+    segfault) and hung workers (no progress within `timeout` seconds of a
+    stand starting). A failing worker is replaced with a fresh process, so one
+    bad stand never takes down the batch.
+
+    Items that crashed or hung their worker are retried up to `max_retries`
+    times; items that FVS or the task itself rejected are not retried, since
+    they will fail the same way again. Items that exhaust their attempts are
+    quarantined, and copied to `quarantine_dir` when one is given.
+    """
+
+    def __init__(
+        self,
+        lib_path: str | os.PathLike,
+        processes: int | None = None,
+        task: Task = run_keyfile,
+        timeout: float | None = None,
+        max_retries: int = 1,
+        max_tasks_per_worker: int | None = None,
+        quarantine_dir: str | os.PathLike | None = None,
+        mp_context: str | None = "spawn",
+        metrics: FvsMetrics | None = None,
+        on_output: Callable[[Any, Any], None] | None = None,
+        ring: SlabRing | None = None,
+    ):
+        """Creates the pool; workers are started on first use.
+
+        Args:
+            lib_path (str | os.PathLike): path to the FVS variant library.
+            processes (int): number of worker processes, defaults to the
+                number of CPUs.
+            task (Callable): picklable callable run in the worker as
+                `task(fvs, item, heartbeat)`. Defaults to `run_keyfile`.
+            timeout (float): seconds a stand may run before its worker is
+                considered hung. `None` disables the check.
+            max_retries (int): how many times to retry an item whose worker
+                crashed or hung.
+            max_tasks_per_worker (int): recycle workers after this many items.
+            quarantine_dir (str | os.PathLike): optional directory where
+                quarantined items that are paths get copied.
+            mp_context (str): multiprocessing start method.
+            metrics (FvsMetrics): optional metrics to record stands, failures,
+                recycles, pending items and worker memory in. Stands are
+                timed from the heartbeats workers send as each one starts.
+            on_output (Callable): called in this process as
+                `on_output(item, value)` with each partial result a task sends
+                with `send_output`, as it arrives. Without it, partial results
+                are collected in `TaskResult.outputs`.
+            ring (SlabRing): shared-memory ring the task writes to, if any;
+                slabs held by workers that fail, crash or are killed are
+                reclaimed when they are replaced.
+        """
+        if processes is not None and processes < 1:
+            msg = "processes must be at least 1"
+            raise ValueError(msg)
+        self.lib_path = Path(os.path.abspath(lib_path))
+        self.processes = processes or os.cpu_count() or 1
+        self.task = task
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.quarantine_dir = (
+            Path(quarantine_dir) if quarantine_dir is not None else None
+        )
+        self.quarantined: list[TaskResult] = []
+        self.recycles = 0
+        self._ctx = mp.get_context(mp_context)
+        self._workers: dict[int, _Worker] = {}
+        self._next_worker_id = 0
+        self.metrics = metrics
+        self.on_output = on_output
+        self.ring = ring
+        self._variant = variant_label(self.lib_path)
+        if metrics is not None:
+            metrics.add_process_source(self._worker_pids)
+
+    def _worker_pids(self) -> dict[str, int]:
+        """Names and pids of the live workers, for memory metrics."""
+        try:
+            workers = list(self._workers.values())
+        except RuntimeError:  # changed while collecting; skip this scrape
+            return {}
+        return {
+            f"{self._variant}-worker-{w.worker_id}": w.process.pid
+            for w in workers
+            if w.process.pid is not None
+        }
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _start_worker(self) -> _Worker:
+        worker_id = self._next_worker_id
+        self._next_worker_id += 1
+        conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.lib_path, self.task, child_conn),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(worker_id=worker_id, process=process, conn=conn)
+        self._workers[worker_id] = worker
+        logging.debug(f"Started FVS worker {worker_id} (pid {process.pid}).")
+        return worker
+
+    def _stop_worker(self, worker: _Worker, kill: bool = False) -> None:
+        if kill and worker.process.is_alive():
+            worker.process.kill()
+        elif worker.process.is_alive():
+            with contextlib.suppress(OSError):
+                worker.conn.send(None)
+        worker.process.join(timeout=None if kill else 5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+        worker.conn.close()
+        self._workers.pop(worker.worker_id, None)
+
+    def _recycle(self, worker: _Worker, kill: bool = False) -> None:
+        self._stop_worker(worker, kill=kill)
+        if self.ring is not None:
+            # slabs the worker was writing when it failed, crashed or was killed
+            reclaimed = self.ring.reclaim()
+            if reclaimed:
+                logging.debug(
+                    f"Reclaimed {reclaimed} slabs held by worker "
+                    f"{worker.worker_id}."
+                )
+        self.recycles += 1
+        if self.metrics is not None:
+            self.metrics.worker_recycles.inc(variant=self._variant)
+        logging.debug(f"Recycled FVS worker {worker.worker_id}.")
+
+    def _dispatch(self, worker: _Worker, job: _Job) -> None:
+        job.attempts += 1
+        job.started = time.monotonic()
+        job.stand_ids = None
+        job.stand_started = None
+        job.outputs = []
+        worker.job = job
+        worker.deadline = (
+            job.started + self.timeout if self.timeout is not None else None
+        )
+        worker.conn.send((job.index, job.item))
+
+    def _failure(
+        self,
+        job: _Job,
+        error: str,
+        pending: collections.deque,
+        retry: bool,
+    ) -> TaskResult | None:
+        logging.warning(
+            f"FVS task {job.index} failed on attempt {job.attempts} "
+            f"(stand_ids={job.stand_ids}): {error}"
+        )
+        if retry and job.attempts <= self.max_retries:
+            pending.appendleft(job)
+            return None
+        result = TaskResult(
+            index=job.index,
+            item=job.item,
+            error=error,
+            stand_ids=job.stand_ids,
+            attempts=job.attempts,
+            elapsed=time.monotonic() - job.started,
+            quarantined=True,
+        )
+        self._quarantine(result)
+        return result
+
+    def _quarantine(self, result: TaskResult) -> None:
+        self.quarantined.append(result)
+        logging.error(
+            f"Quarantined FVS task {result.index} "
+            f"(stand_ids={result.stand_ids}): {result.error}"
+        )
+        if self.quarantine_dir is not None and isinstance(
+            result.item, str | os.PathLike
+        ):
+            src = Path(result.item)
+            if src.is_file():
+                self.quarantine_dir.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(src, self.quarantine_dir / src.name)
+
+    def _handle_message(
+        self, message: tuple, pending: collections.deque
+    ) -> TaskResult | None:
+        kind, worker_id, job_id, payload = message
+        worker = self._workers.get(worker_id)
+        if worker is None or worker.job is None or worker.job.index != job_id:
+            return None  # stale message from a worker already replaced
+        job = worker.job
+
+        if kind == _MSG_STAND:
+            now = time.monotonic()
+            self._stand_finished(job, now)
+            job.stand_ids = payload
+            job.stand_started = now
+            if self.timeout is not None:
+                worker.deadline = now + self.timeout
+            return None
+        if kind == _MSG_OUTPUT:
+            if self.on_output is not None:
+                self.on_output(job.item, payload)
+            else:
+                job.outputs.append(payload)
+            return None
+
+        worker.job = None
+        worker.deadline = None
+        if kind == _MSG_FAILED:
+            error, exit_code, itrncd = payload
+            if self.metrics is not None:
+                self.metrics.stand_failed(self._variant, exit_code, itrncd)
+            self._recycle(worker)
+            return self._failure(job, error, pending, retry=False)
+
+        self._stand_finished(job, time.monotonic())
+
+        worker.tasks_done += 1
+        if (
+            self.max_tasks_per_worker is not None
+            and worker.tasks_done >= self.max_tasks_per_worker
+        ):
+            self._recycle(worker)
+        return TaskResult(
+            index=job.index,
+            item=job.item,
+            value=payload,
+            stand_ids=job.stand_ids,
+            attempts=job.attempts,
+            elapsed=time.monotonic() - job.started,
+            outputs=job.outputs,
+        )
+
+    def _stand_finished(self, job: _Job, now: float) -> None:
+        """Records the stand a job was running as finished, if it had one."""
+        if self.metrics is not None and job.stand_started is not None:
+            self.metrics.stand_finished(self._variant, now - job.stand_started)
+        job.stand_started = None
+
+    def _check_workers(self, pending: collections.deque) -> list[TaskResult]:
+        results = []
+        now = time.monotonic()
+        for worker in list(self._workers.values()):
+            job = worker.job
+            if job is None:
+                continue
+            if not worker.process.is_alive():
+                error = f"worker exited with code {worker.process.exitcode}"
+                reason = "crashed"
+                self._recycle(worker)
+            elif worker.deadline is not None and now > worker.deadline:
+                error = f"timed out after {self.timeout} seconds"
+                reason = "timeout"
+                self._recycle(worker, kill=True)
+            else:
+                continue
+            if self.metrics is not None:
+                self.metrics.worker_failures.inc(
+                    variant=self._variant, reason=reason
+                )
+            result = self._failure(job, error, pending, retry=True)
+            if result is not None:
+                results.append(result)
+        return results
+
+    def imap_unordered(self, items: Iterable) -> Iterator[TaskResult]:
+        """Processes items across the pool, yielding results as they finish.
+
+        Args:
+            items (Iterable): items passed to `task`, keyfile paths for the
+                default task.
+
+        Yields:
+            a `TaskResult` for each item, successful or quarantined.
+        """
+        pending = collections.deque(
+            _Job(index=i, item=item) for i, item in enumerate(items)
+        )
+        outstanding = len(pending)
+
+        while outstanding > 0:
+            idle = [w for w in self._workers.values() if w.job is None]
+            while len(self._workers) < self.processes:
+                idle.append(self._start_worker())
+            for worker in idle:
+                if not pending:
+                    break
+                self._dispatch(worker, pending.popleft())
+            if self.metrics is not None:
+                self.metrics.queue_depth.set(len(pending), queue="pool")
+                self.metrics.busy_workers.set(
+                    sum(w.job is not None for w in self._workers.values()),
+                    variant=self._variant,
+                )
+
+            finished = []
+            conns = {w.conn: w for w in self._workers.values()}
+            for conn in wait(list(conns), timeout=0.1):
+                worker = conns[conn]
+                while worker.worker_id in self._workers and conn.poll():
+                    try:
+                        message = conn.recv()
+                    except EOFError:
+                        break  # worker died, picked up by _check_workers
+                    result = self._handle_message(message, pending)
+                    if result is not None:
+                        finished.append(result)
+            finished.extend(self._check_workers(pending))
+
+            for result in finished:
+                outstanding -= 1
+                yield result
+        if self.metrics is not None:
+            self.metrics.busy_workers.set(0, variant=self._variant)
+
+        return
+
+    def map(self, items: Iterable) -> list[TaskResult]:
+        """Processes items across the pool, returning results in input order.
+
+        Args:
+            items (Iterable): items passed to `task`.
+
+        Returns:
+            list of `TaskResult`, one per item.
+        """
+        return sorted(self.imap_unordered(items), key=lambda r: r.index)
+
+    def close(self) -> None:
+        """Stops all worker processes."""
+        for worker in list(self._workers.values()):
+            self._stop_worker(worker, kill=worker.job is not None)
+
+        return
@@ -0,0 +1,254 @@
+"""Pluggable job queues shared by batch coordinators and workers."""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from pathlib import Path
+
+from fvs2py.enums import FvsVariant
+from fvs2py.jobs import JOB_STATUS_FAILED, JobResult, JobSpec
+
+JOB_STATUS_PENDING = "pending"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_FINISHED = "finished"
+
+
+class QueueBackend(ABC):
+    """Interface a job queue must provide to coordinators and workers.
+
+    Jobs move from pending, to running once claimed by a worker, to finished
+    once a result has been posted. Results are kept in arrival order and read
+    back with a cursor so a coordinator can stream them as they come in.
+    """
+
+    @abstractmethod
+    def submit(self, jobs: Iterable[JobSpec]) -> int:
+        """Adds jobs to the queue, returning how many were added."""
+
+    @abstractmethod
+    def claim(
+        self,
+        worker_id: str,
+        variants: Iterable[FvsVariant] | None = None,
+    ) -> JobSpec | None:
+        """Claims the oldest pending job, optionally limited to variants."""
+
+    @abstractmethod
+    def complete(self, result: JobResult) -> None:
+        """Posts the result of a claimed job and marks it finished."""
+
+    @abstractmethod
+    def results(self, cursor: int = 0) -> tuple[list[JobResult], int]:
+        """Returns results posted after `cursor`, and the new cursor."""
+
+    @abstractmethod
+    def requeue_stale(self, lease: float, max_attempts: int) -> list[str]:
+        """Returns jobs running for longer than `lease` seconds to pending.
+
+        Jobs that have already been attempted `max_attempts` times are
+        finished with a failed result instead. Returns the affected job IDs.
+        """
+
+    @abstractmethod
+    def counts(self) -> dict[str, int]:
+        """Returns the number of jobs in each status."""
+
+    def close(self) -> None:
+        """Releases any resources held by the queue."""
+        return
+
+
+class SQLiteQueue(QueueBackend):
+    """A job queue stored in a local SQLite database file.
+
+    Any number of coordinator and worker processes on machines that share the
+    file can use the queue concurrently, which makes it suitable for a single
+    node or a small cluster on a shared filesystem that supports locking.
+    """
+
+    def __init__(self, path: str | os.PathLike, timeout: float = 60.0):
+        """Opens (and creates if needed) the queue database.
+
+        Args:
+            path (str | os.PathLike): path to the SQLite database file.
+            timeout (float): seconds to wait for a lock held by another
+                process.
+        """
+        self.path = Path(os.path.abspath(path))
+        self._conn = sqlite3.connect(
+            self.path, timeout=timeout, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                variant TEXT NOT NULL,
+                spec TEXT NOT NULL,
+                status TEXT NOT NULL,
+                worker_id TEXT,
+                claimed_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                seq INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, seq);
+            CREATE TABLE IF NOT EXISTS results (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                payload TEXT NOT NULL
+            );
+            """
+        )
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        self._conn.close()
+
+    def submit(self, jobs: Iterable[JobSpec]) -> int:
+        """Adds jobs to the queue, returning how many were added."""
+        rows = [
+            (job.job_id, str(job.variant), job.to_json(), JOB_STATUS_PENDING)
+            for job in jobs
+        ]
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            (seq,) = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM jobs"
+            ).fetchone()
+            self._conn.executemany(
+                "INSERT INTO jobs (job_id, variant, spec, status, seq) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(*row, seq + i + 1) for i, row in enumerate(rows)],
+            )
+        return len(rows)
+
+    def claim(
+        self,
+        worker_id: str,
+        variants: Iterable[FvsVariant] | None = None,
+    ) -> JobSpec | None:
+        """Claims the oldest pending job, optionally limited to variants."""
+        query = "SELECT job_id, spec FROM jobs WHERE status = ?"
+        params: list = [JOB_STATUS_PENDING]
+        if variants is not None:
+            names = [str(FvsVariant(v)) for v in variants]
+            query += f" AND variant IN ({', '.join('?' * len(names))})"
+            params.extend(names)
+        query += " ORDER BY seq LIMIT 1"
+
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(query, params).fetchone()
+            if row is None:
+                return None
+            job_id, spec = row
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = ?, claimed_at = ?, "
+                "attempts = attempts + 1 WHERE job_id = ?",
+                (JOB_STATUS_RUNNING, worker_id, time.time(), job_id),
+            )
+        return JobSpec.from_json(spec)
+
+    def complete(self, result: JobResult) -> None:
+        """Posts the result of a claimed job and marks it finished."""
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT status FROM jobs WHERE job_id = ?", (result.job_id,)
+            ).fetchone()
+            # a job may be finished already if its lease expired and another
+            # worker picked it up, keep only the first result posted
+            if row is not None and row[0] != JOB_STATUS_FINISHED:
+                self._finish(result)
+
+    def _finish(self, result: JobResult) -> None:
+        self._conn.execute(
+            "UPDATE jobs SET status = ? WHERE job_id = ?",
+            (JOB_STATUS_FINISHED, result.job_id),
+        )
+        self._conn.execute(
+            "INSERT INTO results (job_id, payload) VALUES (?, ?)",
+            (result.job_id, result.to_json()),
+        )
+
+    def results(self, cursor: int = 0) -> tuple[list[JobResult], int]:
+        """Returns results posted after `cursor`, and the new cursor."""
+        rows = self._conn.execute(
+            "SELECT seq, payload FROM results WHERE seq > ? ORDER BY seq",
+            (cursor,),
+        ).fetchall()
+        if rows:
+            cursor = rows[-1][0]
+        return [JobResult.from_json(payload) for _, payload in rows], cursor
+
+    def requeue_stale(self, lease: float, max_attempts: int) -> list[str]:
+        """Returns jobs whose lease expired to pending, or fails them."""
+        cutoff = time.time() - lease
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            rows = self._conn.execute(
+                "SELECT job_id, worker_id, attempts FROM jobs "
+                "WHERE status = ? AND claimed_at < ?",
+                (JOB_STATUS_RUNNING, cutoff),
+            ).fetchall()
+            for job_id, worker_id, attempts in rows:
+                if attempts >= max_attempts:
+                    self._finish(
+                        JobResult(
+                            job_id=job_id,
+                            status=JOB_STATUS_FAILED,
+                            error=(
+                                f"worker {worker_id} did not finish the job "
+                                f"within {lease} seconds"
+                            ),
+                            worker_id=worker_id,
+                        )
+                    )
+                else:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, worker_id = NULL, "
+                        "claimed_at = NULL WHERE job_id = ?",
+                        (JOB_STATUS_PENDING, job_id),
+                    )
+        return [job_id for job_id, _, _ in rows]
+
+    def counts(self) -> dict[str, int]:
+        """Returns the number of jobs in each status."""
+        counts = dict.fromkeys(
+            (JOB_STATUS_PENDING, JOB_STATUS_RUNNING, JOB_STATUS_FINISHED), 0
+        )
+        for status, n in self._conn.execute(
+            "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+        ):
+            counts[status] = n
+        return counts
+
+
+QUEUE_BACKENDS: dict[str, type[QueueBackend]] = {"sqlite": SQLiteQueue}
+
+
+def open_queue(url: str) -> QueueBackend:
+    """Opens a queue from a URL like `sqlite:///jobs.db`.
+
+    As with SQLAlchemy URLs, `sqlite:///` is followed by a relative path and
+    `sqlite:////` by an absolute one. A bare path is treated as a SQLite
+    database. Other backends can be made available by adding their class to
+    `QUEUE_BACKENDS`; the class is called with the remainder of the URL after
+    `<scheme>://`.
+
+    Args:
+        url (str): location of the queue.
+    """
+    scheme, sep, location = url.partition("://")
+    if not sep:
+        return SQLiteQueue(url)
+    if scheme not in QUEUE_BACKENDS:
+        msg = f"Unknown queue backend: {scheme}"
+        raise ValueError(msg)
+    if scheme == "sqlite":
+        location = location.removeprefix("/")
+    return QUEUE_BACKENDS[scheme](location)
@@ -0,0 +1,313 @@
+"""Incremental parsing of the FVS main output report (`.out` file)."""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from fvs2py.constants import (
+    FVS_ITRNCD_GOOD_RUNNING_STATE,
+    STOP_POINT_AFTER_FIRST_EVMON,
+    STOP_POINT_YEAR_EVERY_CYCLE,
+)
+
+if TYPE_CHECKING:
+    from fvs2py._base import FVS
+
+# columns of a row of the report's summary statistics table, in order
+REPORT_SUMMARY_COLUMNS = (
+    "year",
+    "age",
+    "tpa",
+    "ba",
+    "sdi",
+    "ccf",
+    "topht",
+    "qmd",
+    "tcuft",
+    "mcuft",
+    "bdft",
+    "rtpa",
+    "rtcuft",
+    "rmcuft",
+    "rbdft",
+    "atba",
+    "atsdi",
+    "atccf",
+    "attopht",
+    "atqmd",
+    "prdlen",
+    "acc",
+    "mort",
+    "mai",
+    "fortyp",
+    "sizecls",
+    "stkcls",
+)
+# the leading columns every summary row has
+_SUMMARY_MIN_COLUMNS = 11
+
+MESSAGE_ERROR = "ERROR"
+MESSAGE_WARNING = "WARNING"
+
+_SECTION_SUMMARY = "summary"
+_SECTION_ACTIVITY = "activity"
+_SECTION_HEADINGS = {
+    "SUMMARY STATISTICS": _SECTION_SUMMARY,
+    "ACTIVITY SUMMARY": _SECTION_ACTIVITY,
+    "OPTIONS SELECTED": None,
+    "STAND COMPOSITION": None,
+    "CALIBRATION STATISTICS": None,
+    "TREE AND STAND ATTRIBUTES": None,
+}
+
+_STAND_ID = re.compile(r"STAND ID[:=]\s*(\S+)")
+_MESSAGE = re.compile(
+    r"^\s*\*+\s*(?:(?P<code>[A-Z]+\d+)\s+)?(?P<level>ERROR|WARNING):?\s*"
+    r"(?P<text>.*?)\s*$"
+)
+_SUMMARY_ROW = re.compile(r"^\s*\d{4}\s+\d+\s+\d+\s")
+_ACTIVITY_CYCLE = re.compile(r"^\s*(?P<cycle>\d+)\s+(?P<year>\d{4})\s*$")
+_ACTIVITY = re.compile(
+    r"^\s*(?P<extension>[A-Z]{2,})\s+(?P<keyword>[A-Z][A-Z0-9]+)\s+"
+    r"(?P<date>\d{4}|NOT DONE|DELETED OR CANCELED)(?P<parms>(?:\s+\S+)*)\s*$"
+)
+
+
+class SummaryRecord(NamedTuple):
+    """A row of a stand's summary statistics table.
+
+    `values` maps names from `REPORT_SUMMARY_COLUMNS` to numbers; columns
+    missing from the row (e.g. on the last year of a run) are left out.
+    """
+
+    stand_id: str | None
+    year: int
+    values: dict[str, float]
+
+
+class ActivityRecord(NamedTuple):
+    """An activity listed in a stand's activity summary.
+
+    `date` is the year the activity was done, or None if it was not done
+    (listed as `NOT DONE` or `DELETED OR CANCELED`).
+    """
+
+    stand_id: str | None
+    cycle: int | None
+    year: int | None
+    extension: str
+    keyword: str
+    date: int | None
+    parms: tuple[float, ...]
+
+
+class MessageRecord(NamedTuple):
+    """An error or warning written to the report."""
+
+    stand_id: str | None
+    level: str
+    code: str | None
+    text: str
+
+
+Record = SummaryRecord | ActivityRecord | MessageRecord
+
+
+class FvsReportError(RuntimeError):
+    """Raised when the report shows FVS hit an error."""
+
+    def __init__(self, record: MessageRecord):
+        self.record = record
+        super().__init__(
+            f"FVS reported {record.code or 'an'} error for stand "
+            f"{record.stand_id}: {record.text}"
+        )
+
+
+def _number(token: str) -> float:
+    try:
+        return float(token)
+    except ValueError:
+        return float("nan")
+
+
+class ReportParser:
+    """Turns chunks of report text into records as they are written.
+
+    Only the current section, stand and any incomplete last line are kept
+    between calls to `feed`, so memory use does not grow with the report.
+    """
+
+    def __init__(self):
+        self.stand_id: str | None = None
+        self._partial = ""
+        self._section: str | None = None
+        self._cycle: int | None = None
+        self._year: int | None = None
+
+    def feed(self, text: str) -> Iterator[Record]:
+        """Parses the complete lines in `text`, keeping any remainder.
+
+        Args:
+            text (str): the next chunk of the report.
+
+        Yields:
+            records found in the complete lines.
+        """
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            yield from self.parse_line(line.rstrip("\r"))
+
+    def close(self) -> Iterator[Record]:
+        """Parses the last line of the report if it had no line break."""
+        line, self._partial = self._partial, ""
+        if line:
+            yield from self.parse_line(line)
+
+    def parse_line(self, line: str) -> Iterator[Record]:
+        """Parses a single line of the report."""
+        match = _MESSAGE.match(line)
+        if match:
+            yield MessageRecord(
+                self.stand_id,
+                match["level"],
+                match["code"],
+                match["text"],
+            )
+            return
+
+        match = _STAND_ID.search(line)
+        if match:
+            self.stand_id = match[1]
+        for heading, section in _SECTION_HEADINGS.items():
+            if heading in line:
+                self._section = section
+                self._cycle = self._year = None
+                return
+
+        if self._section == _SECTION_SUMMARY and _SUMMARY_ROW.match(line):
+            tokens = line.split()
+            if len(tokens) < _SUMMARY_MIN_COLUMNS:
+                return
+            if len(tokens) == len(REPORT_SUMMARY_COLUMNS) - 1:
+                # size and stocking classes are printed as one number
+                size_stock = tokens.pop()
+                tokens += [size_stock[:-1] or "0", size_stock[-1]]
+            values = {
+                name: _number(token)
+                for name, token in zip(REPORT_SUMMARY_COLUMNS, tokens)
+            }
+            yield SummaryRecord(self.stand_id, int(tokens[0]), values)
+        elif self._section == _SECTION_ACTIVITY:
+            match = _ACTIVITY_CYCLE.match(line)
+            if match:
+                self._cycle = int(match["cycle"])
+                self._year = int(match["year"])
+                return
+            match = _ACTIVITY.match(line)
+            if match:
+                date = match["date"]
+                yield ActivityRecord(
+                    self.stand_id,
+                    self._cycle,
+                    self._year,
+                    match["extension"],
+                    match["keyword"],
+                    int(date) if date.isdigit() else None,
+                    tuple(_number(parm) for parm in match["parms"].split()),
+                )
+
+        return
+
+
+class ReportTail:
+    """Follows a report file as FVS writes it, parsing what is new."""
+
+    def __init__(
+        self, path: str | os.PathLike, chunk_size: int = 1 << 16
+    ) -> None:
+        """Starts following a report.
+
+        Args:
+            path (str | os.PathLike): report to follow; it need not exist yet.
+            chunk_size (int): bytes read at a time.
+        """
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.parser = ReportParser()
+        self._offset = 0
+
+    def poll(self, final: bool = False) -> Iterator[Record]:
+        """Parses whatever was appended to the report since the last poll.
+
+        Args:
+            final (bool): FVS has finished writing, so also parse a last line
+                without a line break.
+        """
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(self._offset)
+            while chunk := f.read(self.chunk_size):
+                self._offset += len(chunk)
+                # reports are ASCII; latin-1 decodes any byte on its own
+                yield from self.parser.feed(chunk.decode("latin-1"))
+        if final:
+            yield from self.parser.close()
+
+
+def run_with_report(
+    fvs: FVS,
+    abort_on_error: bool = True,
+    every_cycle: bool = False,
+) -> Iterator[Record]:
+    """Runs the loaded keyfile, parsing the main report as it is written.
+
+    The report is polled each time FVS returns: after every stand, or also
+    after every cycle with `every_cycle`. Fortran buffers its output, so
+    records can lag behind the simulation by a little; everything is parsed
+    once FVS has finished.
+
+    Args:
+        fvs (FVS): an FVS instance with a keyfile loaded, see
+            `FVS.load_keyfile`.
+        abort_on_error (bool): raise as soon as the report shows an error
+            instead of running the remaining stands.
+        every_cycle (bool): also poll the report after each cycle.
+
+    Yields:
+        `SummaryRecord`, `ActivityRecord` and `MessageRecord` records.
+
+    Raises:
+        FvsReportError: on the first error when `abort_on_error` is set. The
+            simulation is left unfinished; load a keyfile to start over.
+    """
+    tail = ReportTail(fvs.main_output_path)
+    code, year = (
+        (STOP_POINT_AFTER_FIRST_EVMON, STOP_POINT_YEAR_EVERY_CYCLE)
+        if every_cycle
+        else (0, 0)
+    )
+    finished = False
+    while not finished:
+        fvs.run(stop_point_code=code, stop_point_year=year)
+        finished = fvs.itrncd != FVS_ITRNCD_GOOD_RUNNING_STATE
+        for record in tail.poll(final=finished):
+            yield record
+            if (
+                abort_on_error
+                and isinstance(record, MessageRecord)
+                and record.level == MESSAGE_ERROR
+            ):
+                logging.debug(f"Aborting run on report error: {record}")
+                raise FvsReportError(record)
+
+    return
@@ -0,0 +1,300 @@
+"""Longest-first scheduling of FVS jobs by predicted run time."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from fvs2py.constants import KEYFILE_INPUT_SUFFIXES, STR_MAXTREES
+from fvs2py.jobs import JobResult
+
+if TYPE_CHECKING:
+    from fvs2py.jobs import JobSpec
+    from fvs2py.pool import FvsWorkerPool, TaskResult
+
+# FVS simulates 10 cycles unless the keyfile has a NUMCYCLE keyword
+DEFAULT_NCYCLES = 10
+# jobs whose keyfile and inputs hash the same are assumed to run as long
+DEFAULT_MAX_HISTORY = 100_000
+# weight of the newest timing in a job's moving average
+_HISTORY_WEIGHT = 0.5
+_TREE_DATA_END = "-999"
+_KEYWORD_FIELD = 10
+# TREEDATA reads records that follow it in the keyfile from this unit
+_KEYFILE_UNIT = 15
+
+
+class JobFeatures(NamedTuple):
+    """What the run time of a job is predicted from."""
+
+    variant: str
+    nstands: int
+    ntrees: int
+    ncycles: int
+
+    def work(self, maxtrees: int | None = None) -> float:
+        """Tree-cycles simulated, with tree counts capped at `maxtrees`.
+
+        FVS stops reading tree records once a stand holds `maxtrees`, so
+        larger inventories cost no more per cycle.
+        """
+        ntrees = self.ntrees
+        if maxtrees is not None:
+            ntrees = min(ntrees, maxtrees * self.nstands)
+        return float(max(ntrees, self.nstands) * self.ncycles)
+
+
+def _keyword(line: str) -> str:
+    return line[:_KEYWORD_FIELD].strip().upper()
+
+
+def job_features(job: JobSpec) -> JobFeatures:
+    """Reads the size of a job from its keyfile and tree data inputs.
+
+    Tree records are counted in inline `TREEDATA` blocks and in the job's
+    `.tre` inputs, and stands by their `PROCESS` keywords.
+    """
+    nstands = 0
+    ntrees = 0
+    ncycles = DEFAULT_NCYCLES
+    in_tree_data = False
+    for line in job.keyfile.splitlines():
+        if in_tree_data:
+            if line.strip() == _TREE_DATA_END:
+                in_tree_data = False
+            elif line.strip():
+                ntrees += 1
+            continue
+        keyword = _keyword(line)
+        if keyword == "PROCESS":
+            nstands += 1
+        elif keyword == "NUMCYCLE":
+            try:
+                ncycles = int(float(line[_KEYWORD_FIELD:].split()[0]))
+            except (IndexError, ValueError):
+                logging.debug(f"Could not read cycles from {line!r}")
+        elif keyword == "TREEDATA":
+            fields = line[_KEYWORD_FIELD:].split()
+            try:
+                in_tree_data = int(float(fields[0])) == _KEYFILE_UNIT
+            except (IndexError, ValueError):
+                in_tree_data = False
+    for name, content in job.inputs.items():
+        if Path(name).suffix in KEYFILE_INPUT_SUFFIXES:
+            ntrees += sum(
+                1
+                for line in content.splitlines()
+                if line.strip() and line.strip() != _TREE_DATA_END
+            )
+    return JobFeatures(str(job.variant), max(nstands, 1), ntrees, ncycles)
+
+
+def job_digest(job: JobSpec) -> str:
+    """Identifies a job by its variant, keyfile and inputs."""
+    payload = json.dumps(
+        {
+            "variant": str(job.variant),
+            "keyfile": job.keyfile,
+            "inputs": dict(sorted(job.inputs.items())),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class _Fit:
+    """Running least-squares fit of seconds against work."""
+
+    def __init__(self, n=0.0, sx=0.0, sy=0.0, sxx=0.0, sxy=0.0):
+        self.n, self.sx, self.sy, self.sxx, self.sxy = n, sx, sy, sxx, sxy
+
+    def add(self, x: float, y: float) -> None:
+        self.n += 1
+        self.sx += x
+        self.sy += y
+        self.sxx += x * x
+        self.sxy += x * y
+
+    def predict(self, x: float) -> float | None:
+        if self.n == 0:
+            return None
+        denom = self.n * self.sxx - self.sx * self.sx
+        if self.n < 2 or denom <= 0:
+            # a single size seen so far; scale its mean seconds per work
+            return self.sy / max(self.sx, 1.0) * x
+        slope = max((self.n * self.sxy - self.sx * self.sy) / denom, 0.0)
+        intercept = max((self.sy - slope * self.sx) / self.n, 0.0)
+        return intercept + slope * x
+
+    def to_list(self) -> list[float]:
+        return [self.n, self.sx, self.sy, self.sxx, self.sxy]
+
+
+class CostModel:
+    """Predicts how long FVS jobs take, learning from observed timings.
+
+    A job seen before is predicted from a moving average of its own past run
+    times. Other jobs are predicted from their size (see `JobFeatures.work`)
+    with a linear fit of seconds against work per variant, falling back to a
+    fit over all variants, and then to the work itself, since only the order
+    of predictions matters for scheduling.
+
+    Timings are kept in a JSON file when `path` is given, so each batch
+    schedules better than the last.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike | None = None,
+        maxtrees: Mapping[str, int] | None = None,
+        max_history: int = DEFAULT_MAX_HISTORY,
+    ):
+        """Creates a model, loading timings saved at `path` if any.
+
+        Args:
+            path (str | os.PathLike): JSON file timings are loaded from and
+                saved to; `None` keeps them in memory only.
+            maxtrees (Mapping): maximum tree records per stand by variant
+                code, see `set_dims`.
+            max_history (int): number of jobs whose own timings are kept;
+                the least recently run are forgotten first.
+        """
+        self.path = Path(path) if path is not None else None
+        self.maxtrees = dict(maxtrees or {})
+        self.max_history = max_history
+        self._history: dict[str, float] = {}
+        self._fits: dict[str, _Fit] = {}
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text())
+            self.maxtrees = {**data.get("maxtrees", {}), **self.maxtrees}
+            self._history = dict(data.get("history", {}))
+            self._fits = {
+                variant: _Fit(*values)
+                for variant, values in data.get("fits", {}).items()
+            }
+        except (OSError, ValueError, TypeError) as exc:
+            logging.warning(f"Ignoring unreadable timings {self.path}: {exc}")
+
+        return
+
+    def save(self) -> None:
+        """Writes the timings to `path`, replacing the file atomically."""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps(
+            {
+                "maxtrees": self.maxtrees,
+                "history": self._history,
+                "fits": {v: fit.to_list() for v, fit in self._fits.items()},
+            }
+        )
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(payload)
+        os.replace(tmp, self.path)
+
+        return
+
+    def set_dims(self, variant: str, dims: Mapping[str, int]) -> None:
+        """Records a variant's `FVS.dims`, capping tree counts at maxtrees."""
+        self.maxtrees[str(variant)] = int(dims[STR_MAXTREES])
+
+        return
+
+    def _work(self, features: JobFeatures) -> float:
+        return features.work(self.maxtrees.get(features.variant))
+
+    def predict(self, job: JobSpec) -> float:
+        """Returns the predicted run time of a job, in seconds or work."""
+        seconds = self._history.get(job_digest(job))
+        if seconds is not None:
+            return seconds
+        features = job_features(job)
+        work = self._work(features)
+        for key in (features.variant, ""):
+            fit = self._fits.get(key)
+            if fit is not None:
+                prediction = fit.predict(work)
+                if prediction is not None:
+                    return prediction
+        return work
+
+    def observe(self, job: JobSpec, seconds: float) -> None:
+        """Learns from the run time of a job."""
+        features = job_features(job)
+        work = self._work(features)
+        for key in (features.variant, ""):
+            self._fits.setdefault(key, _Fit()).add(work, seconds)
+
+        digest = job_digest(job)
+        previous = self._history.pop(digest, None)
+        self._history[digest] = (
+            seconds
+            if previous is None
+            else _HISTORY_WEIGHT * seconds + (1 - _HISTORY_WEIGHT) * previous
+        )
+        while len(self._history) > self.max_history:
+            del self._history[next(iter(self._history))]
+
+        return
+
+    def order(self, jobs: Iterable[JobSpec]) -> list[JobSpec]:
+        """Sorts jobs longest predicted run time first."""
+        return sorted(jobs, key=self.predict, reverse=True)
+
+
+def imap_longest_first(
+    pool: FvsWorkerPool,
+    jobs: Iterable[JobSpec],
+    model: CostModel,
+    learn: Callable[[TaskResult], bool] | None = None,
+) -> Iterator[TaskResult]:
+    """Runs jobs on a pool longest-first, learning from their timings.
+
+    Starting the longest jobs first keeps workers from sitting idle at the
+    end of a batch while one of them finishes a large stand. The time each
+    `JobResult` reports running the job, which leaves out starting a worker
+    and loading its library, is fed back into the model along with the
+    `FVS.dims` of the library that ran it. The model is saved once the batch
+    is done.
+
+    Args:
+        pool (FvsWorkerPool): pool whose task runs `JobSpec` items, such as
+            `run_job_task`.
+        jobs (Iterable): jobs to run.
+        model (CostModel): predicts, and learns, run times.
+        learn (Callable): whether a result's timing should be learned from;
+            by default, those of successful results.
+
+    Yields:
+        a `TaskResult` per job, whose `index` is the job's position in the
+        longest-first order.
+    """
+    try:
+        for result in pool.imap_unordered(model.order(jobs)):
+            value = result.value
+            if isinstance(value, JobResult) and value.dims:
+                model.set_dims(result.item.variant, value.dims)
+            if learn(result) if learn is not None else result.ok:
+                seconds = (
+                    value.elapsed
+                    if isinstance(value, JobResult)
+                    else result.elapsed
+                )
+                model.observe(result.item, seconds)
+            yield result
+    finally:
+        model.save()
+
+    return
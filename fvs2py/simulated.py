@@ -0,0 +1,903 @@
+"""A pure-Python stand-in for a compiled FVS variant library.
+
+`SimulatedFvsLibrary` exposes every routine in `NEEDED_ROUTINES` with the
+same calling convention as the Fortran library, so `FVS` drives it exactly as
+it drives the real thing: stands are read from the keyword file, FVS stops at
+the requested stop points of each cycle, restart and return codes change as
+they would, and tree lists, summaries and Event Monitor variables evolve from
+cycle to cycle. Growth is a simple synthetic model, so results are only
+meant to look plausible, not to match any FVS variant.
+
+Select it with `FVS(lib_path, backend="simulated")` or by setting the
+`FVS2PY_BACKEND` environment variable to `simulated`, which also applies to
+worker processes started afterwards. The library file need not exist; its
+name only sets the variant, as for a real library.
+"""
+
+from __future__ import annotations
+
+import ctypes as ct
+import json
+import logging
+import math
+import os
+import zlib
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+
+from fvs2py.constants import (
+    ADD_TREES_COLUMNS,
+    FVS_ITRNCD_ERROR,
+    FVS_ITRNCD_FINISHED_ALL_STANDS,
+    FVS_ITRNCD_GOOD_RUNNING_STATE,
+    FVS_ITRNCD_NOT_STARTED,
+    FVS_RESTART_CODE_DONE_RUNNING_STAND,
+    KEYFILE_INPUT_SUFFIXES,
+    MAIN_OUTPUT_SUFFIX,
+    NEEDED_ROUTINES,
+    STOP_POINT_AFTER_INPUT,
+    STOP_POINT_YEAR_EVERY_CYCLE,
+    SUMMARY_COLUMNS,
+    TREE_ATTRS,
+)
+from fvs2py.report import REPORT_SUMMARY_COLUMNS
+
+DEFAULT_MAXTREES = 3000
+DEFAULT_MAXSPECIES = 33
+DEFAULT_MAXPLOTS = 500
+DEFAULT_MAXCYCLES = 40
+DEFAULT_INVENTORY_YEAR = 2000
+DEFAULT_NCYCLES = 10
+DEFAULT_CYCLE_LENGTH = 10
+
+# exit code (fvsGetICCode) of a keyword file FVS cannot read
+EXIT_CODE_KEYWORD_ERROR = 2
+# tree attributes fvsTreeAttr can set; the others are computed
+SETTABLE_TREE_ATTRS = (
+    "tpa",
+    "mortpa",
+    "dbh",
+    "dg",
+    "ht",
+    "htg",
+    "crwdth",
+    "cratio",
+    "plotsize",
+    "mgmtcd",
+)
+# conversion factors returned by fvsUnitConversion
+UNIT_CONVERSIONS = {
+    "MtoFT": 3.28084,
+    "FTtoM": 0.3048,
+    "CMtoIN": 0.393701,
+    "INtoCM": 2.54,
+    "HAtoACR": 2.471052,
+    "ACRtoHA": 0.404686,
+    "M2pHAtoFT2pACR": 4.356,
+    "FT2pACRtoM2pHA": 0.229568,
+    "M3pHAtoFT3pACR": 14.291,
+    "FT3pACRtoM3pHA": 0.069973,
+    "TMtoTI": 1.102311,
+    "TItoTM": 0.907185,
+}
+
+_KEYWORD_FIELD = 10
+_KEYFILE_UNIT = 15
+_TREE_DATA_END = "-999"
+# stop points within each cycle, in the order FVS reaches them
+_CYCLE_STOP_POINTS = (1, 2, 3, 4, 5, 6)
+_GROWTH_STOP_POINT = 5
+_CUTTING_STOP_POINT = 4
+_FIRST_STOP_POINT = 1
+_BA_FACTOR = 0.005454154
+_MAX_BA = 300.0
+_MERCH_DBH = 9.0
+# summary columns FVS reports for the last year of a stand
+_REPORT_STAND_COLUMNS = 11
+
+
+@dataclass
+class StandSpec:
+    """A stand as read from the keyword file."""
+
+    stand_id: str = ""
+    stand_cn: str = ""
+    mgmt_id: str = "NONE"
+    inv_year: int = DEFAULT_INVENTORY_YEAR
+    ncycles: int = DEFAULT_NCYCLES
+    cycle_length: int = DEFAULT_CYCLE_LENGTH
+    ntrees: int | None = None
+
+
+def _fields(line: str) -> list[str]:
+    return line[_KEYWORD_FIELD:].split()
+
+
+def _number(line: str, index: int = 0, default: float = 0.0) -> float:
+    try:
+        return float(_fields(line)[index])
+    except (IndexError, ValueError):
+        return default
+
+
+def parse_keyfile(text: str, tree_data: str | None = None) -> list[StandSpec]:
+    """Reads the stands of a keyword file.
+
+    Only the keywords that shape a simulation are read: `STDIDENT`,
+    `STANDCN`, `MGMTID`, `INVYEAR`, `NUMCYCLE`, `TIMEINT` and `TREEDATA`, the
+    latter to count tree records, either inline or in `tree_data` (the `.tre`
+    file next to the keyword file), where stands end with a `-999` line.
+    Each `PROCESS` keyword ends a stand.
+    """
+    tree_blocks = []
+    if tree_data is not None:
+        count = 0
+        for line in tree_data.splitlines():
+            if line.strip() == _TREE_DATA_END:
+                tree_blocks.append(count)
+                count = 0
+            elif line.strip():
+                count += 1
+        if count:
+            tree_blocks.append(count)
+
+    stands = []
+    stand = StandSpec()
+    lines = iter(text.splitlines())
+    for line in lines:
+        keyword = line[:_KEYWORD_FIELD].strip().upper()
+        if keyword == "STDIDENT":
+            stand.stand_id = next(lines, "").strip()[:26]
+        elif keyword == "STANDCN":
+            stand.stand_cn = next(lines, "").strip()[:40]
+        elif keyword == "MGMTID":
+            stand.mgmt_id = next(lines, "").strip()[:4]
+        elif keyword == "INVYEAR":
+            stand.inv_year = int(_number(line, default=stand.inv_year))
+        elif keyword == "NUMCYCLE":
+            stand.ncycles = int(_number(line, default=stand.ncycles))
+        elif keyword == "TIMEINT":
+            if int(_number(line)) == 0:
+                stand.cycle_length = int(
+                    _number(line, 1, default=stand.cycle_length)
+                )
+        elif keyword == "TREEDATA":
+            if int(_number(line, default=2)) == _KEYFILE_UNIT:
+                stand.ntrees = 0
+                for record in lines:
+                    if record.strip() == _TREE_DATA_END:
+                        break
+                    if record.strip():
+                        stand.ntrees += 1
+            elif tree_blocks:
+                stand.ntrees = tree_blocks.pop(0)
+        elif keyword == "PROCESS":
+            stands.append(stand)
+            stand = StandSpec(
+                inv_year=stand.inv_year,
+                ncycles=stand.ncycles,
+                cycle_length=stand.cycle_length,
+            )
+        elif keyword == "STOP":
+            break
+    return stands
+
+
+def _ref(arg):
+    """Returns the ctypes object behind an argument, unwrapping `byref`."""
+    return getattr(arg, "_obj", arg)
+
+
+def _value(arg) -> int | float | bytes:
+    arg = _ref(arg)
+    return arg.value if hasattr(arg, "value") else arg
+
+
+def _set(arg, value) -> None:
+    _ref(arg).value = value
+
+
+def _array(arg, n: int) -> np.ndarray:
+    """Views a pointer or ctypes array argument as `n` values."""
+    arg = _ref(arg)
+    if isinstance(arg, ct.Array):
+        return np.ctypeslib.as_array(arg)[:n]
+    if n == 0:
+        return np.zeros(0)
+    return np.ctypeslib.as_array(arg, shape=(n,))
+
+
+def _text(arg, nch=None) -> str:
+    value = _value(arg)
+    if isinstance(value, bytes):
+        value = value.decode(errors="replace")
+    if nch is not None and _value(nch) > 0:
+        value = value[: _value(nch)]
+    return value.strip()
+
+
+class _Routine:
+    """A simulated library routine; accepts ctypes `argtypes`/`restype`."""
+
+    def __init__(self, func: Callable):
+        self.func = func
+        self.argtypes = None
+        self.restype = None
+        self.__name__ = func.__name__
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+
+class SimulatedFvsLibrary:
+    """Simulates a loaded FVS variant library, routine for routine.
+
+    Each instance holds the state of one simulation, as one loaded library
+    does. Unlike a real library, instances loaded from the same path do not
+    share that state.
+    """
+
+    def __init__(
+        self,
+        lib_path: str | os.PathLike,
+        maxtrees: int = DEFAULT_MAXTREES,
+        maxspecies: int = DEFAULT_MAXSPECIES,
+        maxplots: int = DEFAULT_MAXPLOTS,
+        maxcycles: int = DEFAULT_MAXCYCLES,
+    ):
+        """Creates the library in the state FVS is in once loaded.
+
+        Args:
+            lib_path (str | os.PathLike): path the library would be loaded
+                from; it does not need to exist.
+            maxtrees (int): tree records a stand may hold.
+            maxspecies (int): species the variant knows.
+            maxplots (int): plots a stand may hold.
+            maxcycles (int): cycles a stand may be simulated for.
+        """
+        self.lib_path = Path(lib_path)
+        self._handle = 0
+        self.maxtrees = maxtrees
+        self.maxspecies = maxspecies
+        self.maxplots = maxplots
+        self.maxcycles = maxcycles
+        self._species_attrs: dict[str, np.ndarray] = {}
+        self._reset()
+        for name in (*NEEDED_ROUTINES, "dlclose"):
+            setattr(self, name, _Routine(getattr(self, f"_{name}")))
+
+    def _reset(self) -> None:
+        """Forgets the current simulation, as before any keyword file."""
+        self.itrncd = FVS_ITRNCD_NOT_STARTED
+        self.restart_code = 0
+        self.exit_code = 0
+        self.stop_point_code = 0
+        self.stop_point_year = 0
+        self.keyfile_path: Path | None = None
+        self.stands: list[StandSpec] = []
+        self.stand_index = -1
+        self.position = -1
+        self.trees: dict[str, np.ndarray] = {}
+        self.summary: list[dict[str, float]] = []
+        self.activities: list[list] = []
+        self.evmon: dict[str, float] = {}
+        self._cycle_start: dict[str, float] = {}
+        self._pending_row: dict[str, float] = {}
+        self._save_point: tuple[int, int, str] | None = None
+        self._resume = False
+
+        return
+
+    # -- simulation ---------------------------------------------------------
+
+    @property
+    def stand(self) -> StandSpec | None:
+        """The stand being simulated, if any."""
+        if 0 <= self.stand_index < len(self.stands):
+            return self.stands[self.stand_index]
+        return None
+
+    @property
+    def ntrees(self) -> int:
+        """Number of tree records in the current stand."""
+        return len(self.trees.get("id", ()))
+
+    def _ncycles(self, stand: StandSpec) -> int:
+        return max(1, min(stand.ncycles, self.maxcycles))
+
+    def _stops(self, stand: StandSpec) -> list[tuple[int, int]]:
+        """Stop points of a stand in the order they are reached."""
+        stops = [(STOP_POINT_AFTER_INPUT, stand.inv_year)]
+        for cycle in range(self._ncycles(stand)):
+            year = stand.inv_year + cycle * stand.cycle_length
+            stops += [(code, year) for code in _CYCLE_STOP_POINTS]
+        stops.append((FVS_RESTART_CODE_DONE_RUNNING_STAND, 0))
+        return stops
+
+    def _wants_stop(self, code: int, year: int) -> bool:
+        if code == FVS_RESTART_CODE_DONE_RUNNING_STAND:
+            return True
+        wanted_code, wanted_year = self.stop_point_code, self.stop_point_year
+        if wanted_code == 0:
+            return False
+        if code == STOP_POINT_AFTER_INPUT:
+            # read once per stand, whatever the year
+            return wanted_code == STOP_POINT_AFTER_INPUT or (
+                wanted_code == -1 and wanted_year != 0
+            )
+        if wanted_code not in (-1, code) or wanted_year == 0:
+            return False
+        return wanted_year in (STOP_POINT_YEAR_EVERY_CYCLE, year)
+
+    def _fvs(self, itrncd) -> None:
+        """Runs until the next requested stop point or the end of a stand."""
+        if self.itrncd != FVS_ITRNCD_GOOD_RUNNING_STATE:
+            _set(itrncd, self.itrncd)
+            return
+        if self._resume:
+            # a restarted run returns where its state was saved
+            self._resume = False
+            self.restart_code = self._stops(self.stand)[self.position][0]
+            _set(itrncd, self.itrncd)
+            return
+
+        self.restart_code = 0
+        while True:
+            if self.stand is None or self._stand_done():
+                if not self._next_stand():
+                    self.itrncd = FVS_ITRNCD_FINISHED_ALL_STANDS
+                    self.restart_code = 0
+                    self._write_report(final=True)
+                    break
+            else:
+                self.position += 1
+            code, year = self._stops(self.stand)[self.position]
+            self._enter(code, year)
+            if self._save_point is not None and self._save_point[:2] == (
+                code,
+                year,
+            ):
+                self._save(self._save_point[2])
+                self.itrncd = FVS_ITRNCD_FINISHED_ALL_STANDS
+                break
+            if self._wants_stop(code, year):
+                self.restart_code = code
+                break
+        _set(itrncd, self.itrncd)
+
+        return
+
+    def _stand_done(self) -> bool:
+        """Whether the last stop reached was the end of the stand."""
+        return (
+            self.stand is not None
+            and self._stops(self.stand)[self.position][0]
+            == FVS_RESTART_CODE_DONE_RUNNING_STAND
+        )
+
+    def _next_stand(self) -> bool:
+        if self.stand_index + 1 >= len(self.stands):
+            # the last stand stays loaded, as it does in FVS
+            return False
+        self.stand_index += 1
+        stand = self.stand
+        self.position = 0
+        self.summary = []
+        self.activities = []
+        self.evmon = {}
+        self.trees = self._initial_trees(stand)
+        logging.debug(f"Simulating stand {stand.stand_id} of {self.lib_path}")
+        return True
+
+    def _cycle(self, year: int) -> int:
+        stand = self.stand
+        return (year - stand.inv_year) // stand.cycle_length + 1
+
+    def _enter(self, code: int, year: int) -> None:
+        """Does the work FVS does on its way to a stop point."""
+        stand = self.stand
+        if code == STOP_POINT_AFTER_INPUT:
+            self._update_evmon(stand.inv_year, 1)
+        elif code == _FIRST_STOP_POINT:
+            self._update_evmon(year, self._cycle(year))
+            self._cycle_start = self._stats()
+        elif code == _CUTTING_STOP_POINT + 1:
+            # cutting is over; start the summary row of the cycle
+            after = self._stats()
+            before = self._cycle_start
+            self._pending_row = {
+                **before,
+                "year": year,
+                "rtpa": max(before["tpa"] - after["tpa"], 0.0),
+                "rtcuft": max(before["tcuft"] - after["tcuft"], 0.0),
+                "rmcuft": max(before["mcuft"] - after["mcuft"], 0.0),
+                "rbdft": max(before["bdft"] - after["bdft"], 0.0),
+                "atba": after["ba"],
+                "atsdi": after["sdi"],
+                "atccf": after["ccf"],
+                "attopht": after["topht"],
+                "atqmd": after["qmd"],
+                "prdlen": stand.cycle_length,
+            }
+            self._compute_growth(stand.cycle_length)
+        elif code == _GROWTH_STOP_POINT + 1:
+            before = self._stats()
+            mort = float(np.sum(self.trees["mortpa"] * self.trees["tcuft"]))
+            self._apply_growth(stand.cycle_length)
+            after = self._stats()
+            length = stand.cycle_length
+            self._pending_row["acc"] = (
+                after["tcuft"] - before["tcuft"] + mort
+            ) / length
+            self._pending_row["mort"] = mort / length
+            self._pending_row["mai"] = after["tcuft"] / max(after["age"], 1.0)
+            self.summary.append(self._pending_row)
+        elif code == FVS_RESTART_CODE_DONE_RUNNING_STAND:
+            end_year = (
+                stand.inv_year + self._ncycles(stand) * stand.cycle_length
+            )
+            self._update_evmon(end_year, self._ncycles(stand) + 1)
+            self.summary.append({**self._stats(), "year": end_year})
+            self._write_report()
+
+        return
+
+    def _initial_trees(self, stand: StandSpec) -> dict[str, np.ndarray]:
+        """Synthesizes the stand's tree list, the same on every run."""
+        rng = np.random.default_rng(zlib.crc32(stand.stand_id.encode()))
+        n = stand.ntrees if stand.ntrees else int(rng.integers(20, 200))
+        n = min(n, self.maxtrees)
+        nplots = max(1, min(self.maxplots, n // 10))
+        dbh = np.clip(rng.lognormal(math.log(8.0), 0.5, n), 1.0, 60.0)
+        stand_age = float(rng.integers(20, 120))
+        trees = {
+            "id": np.arange(1, n + 1, dtype=np.float64),
+            "species": rng.integers(1, min(self.maxspecies, 6) + 1, n).astype(
+                np.float64
+            ),
+            "tpa": rng.uniform(5.0, 40.0, n),
+            "mortpa": np.zeros(n),
+            "dbh": dbh,
+            "dg": np.zeros(n),
+            "ht": 4.5 + 120.0 * (1.0 - np.exp(-0.035 * dbh)),
+            "htg": np.zeros(n),
+            "cratio": rng.uniform(25.0, 75.0, n).round(),
+            "age": np.full(n, stand_age),
+            "plot": rng.integers(1, nplots + 1, n).astype(np.float64),
+            "plotsize": np.ones(n),
+            "mgmtcd": np.zeros(n),
+        }
+        self._update_derived(trees)
+        return trees
+
+    @staticmethod
+    def _update_derived(trees: dict[str, np.ndarray]) -> None:
+        """Recomputes crown width and volumes from diameter and height."""
+        dbh, ht = trees["dbh"], trees["ht"]
+        trees["crwdth"] = 3.0 + 1.1 * dbh
+        tcuft = 0.42 * _BA_FACTOR * dbh**2 * ht
+        trees["tcuft"] = tcuft
+        merch = dbh >= _MERCH_DBH
+        trees["mcuft"] = np.where(merch, 0.85 * tcuft, 0.0)
+        trees["bdft"] = np.where(merch, 5.0 * trees["mcuft"], 0.0)
+
+        return
+
+    def _stats(self) -> dict[str, float]:
+        """Per-acre stand statistics of the current tree list."""
+        trees = self.trees
+        tpa = trees["tpa"]
+        total = float(np.sum(tpa))
+        ba = float(np.sum(tpa * _BA_FACTOR * trees["dbh"] ** 2))
+        qmd = math.sqrt(ba / total / _BA_FACTOR) if total > 0 else 0.0
+        order = np.argsort(-trees["dbh"])
+        cumulative = np.cumsum(tpa[order])
+        largest = order[: int(np.searchsorted(cumulative, 40.0)) + 1]
+        topht = (
+            float(np.average(trees["ht"][largest], weights=tpa[largest]))
+            if total > 0
+            else 0.0
+        )
+        crown_area = np.pi * (trees["crwdth"] / 2) ** 2
+        return {
+            "age": float(trees["age"].max()) if self.ntrees else 0.0,
+            "tpa": total,
+            "ba": ba,
+            "sdi": total * (qmd / 10.0) ** 1.605,
+            "ccf": float(np.sum(tpa * crown_area)) / 435.6,
+            "topht": topht,
+            "qmd": qmd,
+            "tcuft": float(np.sum(tpa * trees["tcuft"])),
+            "mcuft": float(np.sum(tpa * trees["mcuft"])),
+            "bdft": float(np.sum(tpa * trees["bdft"])),
+        }
+
+    @staticmethod
+    def _row(values: dict[str, float]) -> list[int]:
+        """Formats a summary row as fvsSummary returns it."""
+        qmd = values.get("qmd", 0.0)
+        values = {
+            "sampwt": 1.0,
+            "fortyp": 201.0,
+            "sizecls": 1.0 if qmd >= _MERCH_DBH else 2.0 if qmd >= 5 else 3.0,
+            "stkcls": 1.0 if values.get("ba", 0.0) >= 120 else 2.0,
+            **values,
+        }
+        return [int(round(values.get(name, 0.0))) for name in SUMMARY_COLUMNS]
+
+    def _compute_growth(self, length: int) -> None:
+        """Sets this cycle's diameter and height growth and mortality."""
+        trees = self.trees
+        competition = max(0.1, 1.0 - self._stats()["ba"] / _MAX_BA)
+        scale = length / DEFAULT_CYCLE_LENGTH
+        vigor = trees["cratio"] / 50.0
+        trees["dg"] = scale * competition * vigor * (0.3 + 0.04 * trees["dbh"])
+        trees["htg"] = (
+            scale * competition * vigor * 14.0 * np.exp(-0.03 * trees["dbh"])
+        )
+        annual = 0.003 + 0.02 * max(0.0, 1.0 - competition - 0.6)
+        trees["mortpa"] = trees["tpa"] * (1.0 - (1.0 - annual) ** length)
+
+        return
+
+    def _apply_growth(self, length: int) -> None:
+        """Applies the growth and mortality set at stop point 5."""
+        trees = self.trees
+        trees["dbh"] = trees["dbh"] + np.maximum(trees["dg"], 0.0)
+        trees["ht"] = trees["ht"] + np.maximum(trees["htg"], 0.0)
+        trees["tpa"] = np.maximum(trees["tpa"] - trees["mortpa"], 0.0)
+        trees["age"] = trees["age"] + length
+        self._update_derived(trees)
+
+        return
+
+    def _update_evmon(self, year: int, cycle: int) -> None:
+        stats = self._stats()
+        self.evmon.update(
+            {
+                "year": float(year),
+                "cycle": float(cycle),
+                "age": stats["age"],
+                "btpa": stats["tpa"],
+                "bba": stats["ba"],
+                "bccf": stats["ccf"],
+                "btopht": stats["topht"],
+                "bqmd": stats["qmd"],
+                "btcuft": stats["tcuft"],
+                "bmcuft": stats["mcuft"],
+                "bbdft": stats["bdft"],
+            }
+        )
+
+        return
+
+    def _write_report(self, final: bool = False) -> None:
+        """Appends the stand's summary table to the main output file."""
+        if self.keyfile_path is None:
+            return
+        path = self.keyfile_path.with_suffix(MAIN_OUTPUT_SUFFIX)
+        with open(path, "a") as f:
+            if final:
+                f.write("\nSIMULATED FVS RUN FINISHED\n")
+                return
+            stand = self.stand
+            f.write(f"\nSTAND ID: {stand.stand_id}\n\nSUMMARY STATISTICS\n")
+            for row in self.summary:
+                # the last year has no removals, growth or classes
+                names = (
+                    REPORT_SUMMARY_COLUMNS
+                    if "prdlen" in row
+                    else REPORT_SUMMARY_COLUMNS[:_REPORT_STAND_COLUMNS]
+                )
+                values = {
+                    **dict(zip(SUMMARY_COLUMNS, self._row(row))),
+                    **row,
+                }
+                f.write(
+                    " ".join(
+                        f"{values.get(name, 0):.1f}"
+                        if name == "qmd" or name == "atqmd"
+                        else str(round(values.get(name, 0)))
+                        for name in names
+                    )
+                    + "\n"
+                )
+
+        return
+
+    # -- saved states -------------------------------------------------------
+
+    def _save(self, path: str) -> None:
+        state = {
+            "keyfile_path": (
+                None if self.keyfile_path is None else str(self.keyfile_path)
+            ),
+            "stands": [asdict(stand) for stand in self.stands],
+            "stand_index": self.stand_index,
+            "position": self.position,
+            "trees": {k: v.tolist() for k, v in self.trees.items()},
+            "summary": self.summary,
+            "activities": self.activities,
+            "evmon": self.evmon,
+            "cycle_start": self._cycle_start,
+            "pending_row": self._pending_row,
+        }
+        Path(path).write_text(json.dumps(state))
+
+        return
+
+    def _load(self, path: str) -> None:
+        state = json.loads(Path(path).read_text())
+        if state["keyfile_path"] is not None:
+            self.keyfile_path = Path(state["keyfile_path"])
+        self.stands = [StandSpec(**stand) for stand in state["stands"]]
+        self.stand_index = state["stand_index"]
+        self.position = state["position"]
+        self.trees = {k: np.array(v) for k, v in state["trees"].items()}
+        self.summary = state["summary"]
+        self.activities = state["activities"]
+        self.evmon = state["evmon"]
+        self._cycle_start = state["cycle_start"]
+        self._pending_row = state["pending_row"]
+        self._resume = True
+
+        return
+
+    # -- routines -----------------------------------------------------------
+
+    def _fvsSetCmdLine(self, cmdline, _nch, itrncd) -> None:  # noqa: N802
+        self._reset()
+        args = dict(
+            arg.partition("=")[::2] for arg in _text(cmdline).split() if arg
+        )
+        try:
+            if "--restart" in args:
+                self._load(args["--restart"])
+            else:
+                path = Path(args["--keywordfile"])
+                tree_file = path.with_suffix(KEYFILE_INPUT_SUFFIXES[0])
+                self.stands = parse_keyfile(
+                    path.read_text(),
+                    tree_file.read_text() if tree_file.exists() else None,
+                )
+                self.keyfile_path = path
+                path.with_suffix(MAIN_OUTPUT_SUFFIX).write_text(
+                    f"SIMULATED FVS {self.lib_path.stem}\n"
+                )
+            if "--stoppoint" in args:
+                code, year, save_path = args["--stoppoint"].split(",", 2)
+                self._save_point = (int(code), int(year), save_path)
+        except (KeyError, OSError, ValueError) as exc:
+            logging.debug(f"Simulated FVS could not start: {exc}")
+            self.itrncd = FVS_ITRNCD_ERROR
+            self.exit_code = EXIT_CODE_KEYWORD_ERROR
+        else:
+            self.itrncd = FVS_ITRNCD_GOOD_RUNNING_STATE
+        _set(itrncd, self.itrncd)
+
+        return
+
+    def _fvsSetStoppointCodes(self, code, year) -> None:  # noqa: N802
+        self.stop_point_code = int(_value(code))
+        self.stop_point_year = int(_value(year))
+
+        return
+
+    def _fvsGetRtnCode(self, itrncd) -> None:  # noqa: N802
+        _set(itrncd, self.itrncd)
+
+        return
+
+    def _fvsGetRestartCode(self, restart_code) -> None:  # noqa: N802
+        _set(restart_code, self.restart_code)
+
+        return
+
+    def _fvsGetICCode(self, exit_code) -> None:  # noqa: N802
+        _set(exit_code, self.exit_code)
+
+        return
+
+    def _fvsDimSizes(  # noqa: N802
+        self, ntrees, ncycles, nplots, maxtrees, maxspecies, maxplots, maxcycles
+    ) -> None:
+        stand = self.stand
+        _set(ntrees, self.ntrees)
+        _set(ncycles, self._ncycles(stand) if stand is not None else 0)
+        _set(
+            nplots,
+            len(np.unique(self.trees["plot"])) if self.ntrees else 0,
+        )
+        _set(maxtrees, self.maxtrees)
+        _set(maxspecies, self.maxspecies)
+        _set(maxplots, self.maxplots)
+        _set(maxcycles, self.maxcycles)
+
+        return
+
+    def _fvsStandID(self, sid, cn, mgmt, *_lengths) -> None:  # noqa: N802
+        stand = self.stand or StandSpec(mgmt_id="")
+        for buffer, value in (
+            (sid, stand.stand_id),
+            (cn, stand.stand_cn),
+            (mgmt, stand.mgmt_id),
+        ):
+            buffer = _ref(buffer)
+            _set(buffer, value.encode()[: ct.sizeof(buffer)])
+
+        return
+
+    def _fvsTreeAttr(  # noqa: N802
+        self, name, nch, action, ntrees, values, rtn_code
+    ) -> None:
+        attr = _text(name, nch).lower()
+        setting = _text(action).lower() == "set"
+        if attr not in TREE_ATTRS or (
+            setting and attr not in SETTABLE_TREE_ATTRS
+        ):
+            _set(rtn_code, 1)
+            return
+        n = min(int(_value(ntrees)), self.ntrees)
+        buffer = _array(values, n)
+        if setting:
+            self.trees[attr][:n] = buffer
+            if attr in ("dbh", "ht"):
+                self._update_derived(self.trees)
+        else:
+            buffer[:] = self.trees[attr][:n]
+        _set(rtn_code, 0)
+
+        return
+
+    def _fvsAddTrees(self, records, nrows, rtn_code) -> None:  # noqa: N802
+        n = int(_value(nrows))
+        if self.stand is None or self.ntrees + n > self.maxtrees:
+            _set(rtn_code, 1)
+            return
+        columns = _array(records, n * len(ADD_TREES_COLUMNS)).reshape(
+            (n, len(ADD_TREES_COLUMNS)), order="F"
+        )
+        added = dict(zip(ADD_TREES_COLUMNS, columns.T))
+        first_id = self.trees["id"].max() + 1 if self.ntrees else 1
+        new = {
+            "id": np.arange(first_id, first_id + n, dtype=np.float64),
+            "mortpa": np.zeros(n),
+            "age": np.full(n, self._stats()["age"]),
+            "plotsize": np.ones(n),
+            "mgmtcd": np.zeros(n),
+            **{k: v.copy() for k, v in added.items() if k in TREE_ATTRS},
+        }
+        self._update_derived(new)
+        for attr in self.trees:
+            self.trees[attr] = np.concatenate([self.trees[attr], new[attr]])
+        _set(rtn_code, 0)
+
+        return
+
+    def _fvsEvmonAttr(  # noqa: N802
+        self, name, nch, action, value, rtn_code
+    ) -> None:
+        var = _text(name, nch).lower()
+        if _text(action).lower() == "set":
+            self.evmon[var] = float(_value(value))
+        elif var in self.evmon:
+            _set(value, self.evmon[var])
+        else:
+            _set(rtn_code, 1)
+            return
+        _set(rtn_code, 0)
+
+        return
+
+    def _fvsSummary(  # noqa: N802
+        self, row, icycle, ncycle, maxrow, maxcol, rtn_code
+    ) -> None:
+        stand = self.stand
+        _set(ncycle, self._ncycles(stand) if stand is not None else 0)
+        _set(maxrow, self.maxcycles + 1)
+        _set(maxcol, len(SUMMARY_COLUMNS))
+        cycle = int(_value(icycle))
+        if cycle == 0:
+            _set(rtn_code, 0)
+        elif 1 <= cycle <= len(self.summary):
+            _array(row, len(SUMMARY_COLUMNS))[:] = self._row(
+                self.summary[cycle - 1]
+            )
+            _set(rtn_code, 0)
+        else:
+            _set(rtn_code, 1)
+
+        return
+
+    def _fvsAddActivity(  # noqa: N802
+        self, year, activity_code, parms, nparms, rtn_code
+    ) -> None:
+        year = int(_value(year))
+        if self.stand is None or year < self.evmon.get("year", 0):
+            _set(rtn_code, 1)
+            return
+        n = int(_value(nparms))
+        self.activities.append(
+            [year, int(_value(activity_code)), _array(parms, n).tolist()]
+        )
+        _set(rtn_code, 0)
+
+        return
+
+    def _fvsSpeciesCode(  # noqa: N802
+        self, fvs_code, fia_code, plant_code, index, *lengths_and_rtn
+    ) -> None:
+        *lengths, rtn_code = lengths_and_rtn
+        i = int(_value(index))
+        if not 1 <= i <= self.maxspecies:
+            _set(rtn_code, 1)
+            return
+        for buffer, code, length in zip(
+            (fvs_code, fia_code, plant_code),
+            (f"{i:02d}", f"{i:03d}", f"SP{i:02d}"),
+            lengths,
+        ):
+            _set(buffer, code.encode()[: ct.sizeof(_ref(buffer))])
+            _set(length, len(code))
+        _set(rtn_code, 0)
+
+        return
+
+    def _fvsSpeciesAttr(  # noqa: N802
+        self, name, nch, action, values, rtn_code
+    ) -> None:
+        attr = _text(name, nch).lower()
+        stored = self._species_attrs.setdefault(attr, np.ones(self.maxspecies))
+        buffer = _array(values, self.maxspecies)
+        if _text(action).lower() == "set":
+            stored[:] = buffer
+        else:
+            buffer[:] = stored
+        _set(rtn_code, 0)
+
+        return
+
+    def _fvsUnitConversion(  # noqa: N802
+        self, name, nch, value, rtn_code
+    ) -> None:
+        factor = UNIT_CONVERSIONS.get(_text(name, nch))
+        if factor is None:
+            _set(rtn_code, 1)
+            return
+        _set(value, factor)
+        _set(rtn_code, 0)
+
+        return
+
+    def _fvsFFEAttrs(  # noqa: N802
+        self, _name, _nch, _action, _n, _values, rtn_code
+    ) -> None:
+        # the Fire and Fuels Extension is not simulated
+        _set(rtn_code, 1)
+
+        return
+
+    def _fvsSVSDimSizes(  # noqa: N802
+        self, nsvsobjs, ndeadobjs, ncwdobjs, mxsvsobjs, mxdeadobjs, mxcwdobjs
+    ) -> None:
+        # no Stand Visualization System objects are simulated
+        for arg in (nsvsobjs, ndeadobjs, ncwdobjs):
+            _set(arg, 0)
+        for arg in (mxsvsobjs, mxdeadobjs, mxcwdobjs):
+            _set(arg, 0)
+
+        return
+
+    def _fvsSVSObjData(  # noqa: N802
+        self, _name, _nch, _action, nobjs, _values, rtn_code
+    ) -> None:
+        _set(rtn_code, 0 if int(_value(nobjs)) == 0 else 1)
+
+        return
+
+    def _dlclose(self, _handle) -> int:
+        self._reset()
+        return 0
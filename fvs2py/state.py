@@ -0,0 +1,150 @@
+"""A compact snapshot of FVS run state refreshed at each stop."""
+
+from __future__ import annotations
+
+from fvs2py.constants import (
+    FVS_ITRNCD_NOT_STARTED,
+    MGMT_ID_COLUMN_NAME,
+    STAND_CN_COLUMN_NAME,
+    STAND_ID_COLUMN_NAME,
+    STR_MAXCYCLES,
+    STR_MAXPLOTS,
+    STR_MAXSPECIES,
+    STR_MAXTREES,
+    STR_NCYCLES,
+    STR_NPLOTS,
+    STR_NTREES,
+)
+
+
+class RunState:
+    """Dimensions, return codes and stand identifiers of an FVS instance.
+
+    Filled in place by `FVS.refresh_state`, which reads every value in one
+    call. `stand_changed` and `cycle_changed` tell whether the last refresh
+    moved to a different stand or cycle, and `generation` increases whenever
+    either did, so callers can cache anything derived from the tree list and
+    only recompute it when the generation moves on.
+    """
+
+    __slots__ = (
+        "cycle",
+        "cycle_changed",
+        "exit_code",
+        "generation",
+        "itrncd",
+        "maxcycles",
+        "maxplots",
+        "maxspecies",
+        "maxtrees",
+        "mgmt_id",
+        "ncycles",
+        "nplots",
+        "ntrees",
+        "restart_code",
+        "stand_changed",
+        "stand_cn",
+        "stand_id",
+    )
+
+    def __init__(self):
+        self.ntrees = 0
+        self.ncycles = 0
+        self.nplots = 0
+        self.maxtrees = 0
+        self.maxspecies = 0
+        self.maxplots = 0
+        self.maxcycles = 0
+        self.itrncd = FVS_ITRNCD_NOT_STARTED
+        self.restart_code = 0
+        self.exit_code = 0
+        self.stand_id = ""
+        self.stand_cn = ""
+        self.mgmt_id = ""
+        self.cycle: int | None = None
+        self.stand_changed = False
+        self.cycle_changed = False
+        self.generation = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"RunState(stand_id={self.stand_id!r}, cycle={self.cycle}, "
+            f"itrncd={self.itrncd}, restart_code={self.restart_code}, "
+            f"ntrees={self.ntrees}, generation={self.generation})"
+        )
+
+    @property
+    def dims(self) -> dict:
+        """The dimensions in the same form as `FVS.dims`."""
+        return {
+            STR_NTREES: self.ntrees,
+            STR_NCYCLES: self.ncycles,
+            STR_NPLOTS: self.nplots,
+            STR_MAXTREES: self.maxtrees,
+            STR_MAXSPECIES: self.maxspecies,
+            STR_MAXPLOTS: self.maxplots,
+            STR_MAXCYCLES: self.maxcycles,
+        }
+
+    @property
+    def stand_ids(self) -> dict:
+        """The stand identifiers in the same form as `FVS.stand_ids`."""
+        return {
+            STAND_ID_COLUMN_NAME: self.stand_id,
+            STAND_CN_COLUMN_NAME: self.stand_cn,
+            MGMT_ID_COLUMN_NAME: self.mgmt_id,
+        }
+
+    def update(
+        self,
+        dims: tuple[int, int, int, int, int, int, int],
+        itrncd: int,
+        restart_code: int,
+        exit_code: int,
+        stand: tuple[str, str, str],
+        cycle: int | None,
+    ) -> bool:
+        """Stores freshly read values and works out what changed.
+
+        A new stand is recognized by its identifiers or by the cycle number
+        going backwards, since consecutive stands may share identifiers.
+
+        Args:
+            dims (tuple): ntrees, ncycles, nplots, maxtrees, maxspecies,
+                maxplots and maxcycles, in that order.
+            itrncd (int): FVS return code.
+            restart_code (int): FVS restart code.
+            exit_code (int): FVS exit code.
+            stand (tuple): stand id, stand control number and management id.
+            cycle (int): current cycle number, if known.
+
+        Returns:
+            whether the stand or cycle changed.
+        """
+        (
+            self.ntrees,
+            self.ncycles,
+            self.nplots,
+            self.maxtrees,
+            self.maxspecies,
+            self.maxplots,
+            self.maxcycles,
+        ) = dims
+        self.itrncd = itrncd
+        self.restart_code = restart_code
+        self.exit_code = exit_code
+
+        self.stand_changed = stand != (
+            self.stand_id,
+            self.stand_cn,
+            self.mgmt_id,
+        ) or (
+            cycle is not None and self.cycle is not None and cycle < self.cycle
+        )
+        self.cycle_changed = self.stand_changed or cycle != self.cycle
+        self.stand_id, self.stand_cn, self.mgmt_id = stand
+        self.cycle = cycle
+        if self.cycle_changed:
+            self.generation += 1
+
+        return self.cycle_changed
@@ -0,0 +1,134 @@
+"""Plans of FVS stop points to visit within each stand."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from typing import NamedTuple
+
+import numpy as np
+
+from fvs2py.constants import (
+    STOP_POINT_AFTER_INPUT,
+    STOP_POINT_YEAR_EVERY_CYCLE,
+)
+
+
+class StopPoint(NamedTuple):
+    """A single place to stop FVS: a stop point code within a given year."""
+
+    code: int
+    year: int
+
+    def sort_key(self) -> tuple[bool, int, int]:
+        """Orders stops as FVS reaches them; stop point 7 comes first.
+
+        Stops made in every cycle come before those in specific years.
+        """
+        return (self.code != STOP_POINT_AFTER_INPUT, self.year, self.code)
+
+
+class StopCapture(NamedTuple):
+    """Data copied out of FVS at a stop, see `FVS.run_pipelined`."""
+
+    stop: StopPoint
+    stand_ids: dict
+    trees: dict[str, np.ndarray]
+
+
+class StopPlan:
+    """An ordered set of stop points to visit within each stand.
+
+    FVS can only be asked for one stop point code and year at a time. Rather
+    than stopping at every location (`-1`) and filtering in Python, the run
+    loop in `FVS.run_plan` sets the codes for the next planned stop after each
+    stop, so FVS only returns control where data is wanted.
+
+    Stops are visited in simulation order: stop point 7 (just after input is
+    read) first, then by year and by code within a year. A year of `-1`
+    visits the code in every cycle, like `FVS.run` does. Duplicates are
+    dropped.
+    """
+
+    def __init__(self, stops: Iterable[tuple[int, int]] = ()):
+        """Creates a plan.
+
+        Args:
+            stops (Iterable): `(stop_point_code, stop_point_year)` pairs, where
+                codes are between 1 and 7 and years are specific calendar
+                years or `-1` for every cycle (ignored for code 7).
+        """
+        points = set()
+        for code, year in stops:
+            if code not in range(1, 8):
+                msg = "Invalid value for stop_point_code"
+                raise ValueError(msg)
+            if code == STOP_POINT_AFTER_INPUT:
+                year = 0
+            elif year <= 0 and year != STOP_POINT_YEAR_EVERY_CYCLE:
+                msg = (
+                    "stop_point_year must be a specific year, or -1 for every "
+                    "cycle, in a StopPlan"
+                )
+                raise ValueError(msg)
+            points.add(StopPoint(int(code), int(year)))
+        self.stops: tuple[StopPoint, ...] = tuple(
+            sorted(points, key=StopPoint.sort_key)
+        )
+
+    def __iter__(self) -> Iterator[StopPoint]:
+        return iter(self.stops)
+
+    def __len__(self) -> int:
+        return len(self.stops)
+
+    def __contains__(self, stop: object) -> bool:
+        """Whether the plan visits a stop, given its actual year."""
+        try:
+            code, year = stop
+        except (TypeError, ValueError):
+            return False
+        if code == STOP_POINT_AFTER_INPUT:
+            year = 0
+        return (
+            StopPoint(code, year) in self.stops
+            or StopPoint(code, STOP_POINT_YEAR_EVERY_CYCLE) in self.stops
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.stops)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, StopPlan):
+            return NotImplemented
+        return self.stops == other.stops
+
+    def __hash__(self) -> int:
+        return hash(self.stops)
+
+    def __repr__(self) -> str:
+        pairs = ", ".join(f"({code}, {year})" for code, year in self.stops)
+        return f"StopPlan([{pairs}])"
+
+    @property
+    def every_cycle(self) -> bool:
+        """Whether any stop is visited in every cycle."""
+        return any(
+            stop.year == STOP_POINT_YEAR_EVERY_CYCLE for stop in self.stops
+        )
+
+    @property
+    def cycle_codes(self) -> tuple[int, ...]:
+        """Codes visited within cycles, in the order FVS reaches them."""
+        return tuple(
+            sorted(
+                {
+                    stop.code
+                    for stop in self.stops
+                    if stop.code != STOP_POINT_AFTER_INPUT
+                }
+            )
+        )
+
+    def with_stop(self, code: int, year: int = 0) -> StopPlan:
+        """Returns a new plan that also visits the given stop point."""
+        return StopPlan([*self.stops, (code, year)])
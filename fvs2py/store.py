@@ -0,0 +1,348 @@
+"""Memory-mapped store of stand tree lists for warm-starting simulations."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING, Self
+
+import numpy as np
+
+from fvs2py.constants import (
+    ADD_TREES_COLUMNS,
+    STOP_POINT_AFTER_INPUT,
+    TREE_ATTRS,
+    YEAR_COLUMN_NAME,
+)
+from fvs2py.stops import StopPlan
+
+if TYPE_CHECKING:
+    from fvs2py._base import FVS
+    from fvs2py.stops import StopPoint
+
+STORE_FORMAT_VERSION = 1
+# stand identifiers are FVS stand control numbers, at most 40 characters
+_KEY_DTYPE = "S40"
+_INDEX_DTYPE = np.dtype(
+    [
+        ("key", _KEY_DTYPE),
+        ("offset", np.int64),
+        ("count", np.int64),
+        ("year", np.int32),
+    ]
+)
+_META_FILE = "meta.json"
+_INDEX_FILE = "index.npy"
+_COLUMN_SUFFIX = ".f8"
+# attributes stored by default: those fvsAddTrees can put back
+_DEFAULT_ATTRS = tuple(attr for attr in TREE_ATTRS if attr in ADD_TREES_COLUMNS)
+
+
+def _stand_key(fvs: FVS) -> str:
+    """Returns the stand's control number, or its id when it has none."""
+    stand_ids = fvs.stand_ids
+    return stand_ids["stand_cn"] or stand_ids["stand_id"]
+
+
+def _current_year(fvs: FVS) -> int:
+    """Returns the simulation year FVS is stopped in."""
+    return int(fvs.get_evmon_attrs([YEAR_COLUMN_NAME])[YEAR_COLUMN_NAME])
+
+
+class StandStoreWriter:
+    """Writes stand tree lists into a new `StandStore`.
+
+    Each attribute is appended to its own file of raw float64 values, so a
+    stand's records are contiguous within every column. The index mapping
+    stands to their records is written by `close`.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        attrs: Iterable[str] | None = None,
+    ):
+        """Creates the store's directory and column files.
+
+        Args:
+            path (str | os.PathLike): directory to create the store in; it
+                must not exist or be empty.
+            attrs (Iterable[str]): tree attributes to store, defaults to the
+                attributes `FVS.add_trees` accepts.
+        """
+        self.path = Path(path)
+        self.attrs = _DEFAULT_ATTRS if attrs is None else tuple(attrs)
+        unknown = set(self.attrs) - set(TREE_ATTRS)
+        if unknown:
+            msg = f"Unknown tree attributes: {sorted(unknown)}"
+            raise ValueError(msg)
+        self.path.mkdir(parents=True, exist_ok=True)
+        if any(self.path.iterdir()):
+            msg = f"{self.path} is not empty"
+            raise FileExistsError(msg)
+        self._columns = {
+            attr: open(self.path / f"{attr}{_COLUMN_SUFFIX}", "wb")
+            for attr in self.attrs
+        }
+        self._index: list[tuple[bytes, int, int, int]] = []
+        self._nrows = 0
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def add(
+        self,
+        stand_cn: str,
+        trees: Mapping[str, np.ndarray],
+        year: int = 0,
+    ) -> None:
+        """Appends one stand's tree list.
+
+        Args:
+            stand_cn (str): identifier the stand is looked up by.
+            trees (Mapping): equal-length arrays for every stored attribute.
+            year (int): simulation year the tree list is from, or 0 when
+                unknown.
+        """
+        key = stand_cn.encode()
+        if len(key) > np.dtype(_KEY_DTYPE).itemsize:
+            msg = f"Stand identifier {stand_cn!r} is longer than 40 bytes"
+            raise ValueError(msg)
+        columns = {
+            attr: np.ascontiguousarray(trees[attr], dtype=np.float64)
+            for attr in self.attrs
+        }
+        counts = {len(values) for values in columns.values()}
+        if len(counts) > 1:
+            msg = "Tree attribute arrays must all have the same length"
+            raise ValueError(msg)
+        count = counts.pop() if counts else 0
+        for attr, values in columns.items():
+            values.tofile(self._columns[attr])
+        self._index.append((key, self._nrows, count, year))
+        self._nrows += count
+
+        return
+
+    def add_fvs(
+        self, fvs: FVS, stand_cn: str | None = None, year: int | None = None
+    ) -> None:
+        """Appends the tree list FVS currently holds.
+
+        Args:
+            fvs (FVS): an FVS instance stopped within a stand.
+            stand_cn (str): identifier to store the stand under, defaults to
+                its control number (or stand id when it has none).
+            year (int): simulation year the tree list is from, defaults to
+                the Event Monitor's `year`, i.e. the year FVS is stopped in.
+        """
+        self.add(
+            _stand_key(fvs) if stand_cn is None else stand_cn,
+            fvs.get_tree_attrs(self.attrs),
+            _current_year(fvs) if year is None else year,
+        )
+
+        return
+
+    def close(self) -> None:
+        """Flushes the columns and writes the index, completing the store.
+
+        Raises:
+            ValueError: if a stand identifier was added more than once.
+        """
+        if self._columns is None:
+            return
+        for f in self._columns.values():
+            f.close()
+        self._columns = None
+
+        index = np.array(self._index, dtype=_INDEX_DTYPE)
+        index.sort(order="key", kind="stable")
+        duplicated = index["key"][1:][index["key"][1:] == index["key"][:-1]]
+        if len(duplicated):
+            msg = (
+                "Stands added more than once: "
+                f"{sorted({key.decode() for key in duplicated})}"
+            )
+            raise ValueError(msg)
+        np.save(self.path / _INDEX_FILE, index)
+        (self.path / _META_FILE).write_text(
+            json.dumps(
+                {
+                    "version": STORE_FORMAT_VERSION,
+                    "attrs": list(self.attrs),
+                    "nstands": len(index),
+                    "nrows": self._nrows,
+                }
+            )
+        )
+        logging.debug(
+            f"Wrote {len(index)} stands ({self._nrows} trees) to {self.path}"
+        )
+
+        return
+
+
+class StandStore:
+    """Read-only, memory-mapped tree lists keyed by stand control number.
+
+    Columns are mapped rather than read, so opening a store is cheap however
+    large the inventory, and worker processes that open the same store share
+    its pages through the OS page cache. Look-ups are a binary search of the
+    sorted index, and return views into the mapped columns.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        """Opens a store written by `StandStoreWriter`.
+
+        Args:
+            path (str | os.PathLike): directory of the store.
+        """
+        self.path = Path(path)
+        meta = json.loads((self.path / _META_FILE).read_text())
+        if meta["version"] != STORE_FORMAT_VERSION:
+            msg = f"Unsupported stand store version {meta['version']}"
+            raise ValueError(msg)
+        self.attrs = tuple(meta["attrs"])
+        self._index = np.load(self.path / _INDEX_FILE)
+        nrows = meta["nrows"]
+        self._columns = {
+            attr: (
+                np.memmap(
+                    self.path / f"{attr}{_COLUMN_SUFFIX}",
+                    dtype=np.float64,
+                    mode="r",
+                    shape=(nrows,),
+                )
+                if nrows
+                else np.zeros(0, dtype=np.float64)
+            )
+            for attr in self.attrs
+        }
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, stand_cn: str) -> bool:
+        return self._find(stand_cn) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (key.decode() for key in self._index["key"])
+
+    def _find(self, stand_cn: str) -> int | None:
+        key = stand_cn.encode()
+        i = int(np.searchsorted(self._index["key"], key))
+        if i < len(self._index) and self._index["key"][i] == key:
+            return i
+        return None
+
+    def year(self, stand_cn: str) -> int:
+        """Returns the simulation year a stand's tree list was stored from."""
+        return int(self._index["year"][self._entry(stand_cn)])
+
+    def _entry(self, stand_cn: str) -> int:
+        i = self._find(stand_cn)
+        if i is None:
+            msg = f"Stand {stand_cn!r} is not in {self.path}"
+            raise KeyError(msg)
+        return i
+
+    def get(self, stand_cn: str) -> dict[str, np.ndarray]:
+        """Returns a stand's tree list as read-only views of the columns.
+
+        Raises:
+            KeyError: if the stand is not in the store.
+        """
+        entry = self._index[self._entry(stand_cn)]
+        start = int(entry["offset"])
+        stop = start + int(entry["count"])
+        return {
+            attr: values[start:stop] for attr, values in self._columns.items()
+        }
+
+    def inject(self, fvs: FVS, stand_cn: str | None = None) -> int:
+        """Adds a stored tree list to the stand FVS is stopped in.
+
+        Call this at stop point 7 (just after input is read), typically for
+        a stand whose keyfile has no tree records, so the stand starts from
+        the stored trees instead. The stand has to start in the year the
+        trees were stored from, e.g. through its keyfile's `INVYEAR`, or
+        they would be grown over the same years again.
+
+        Only the attributes in `fvs2py.constants.ADD_TREES_COLUMNS` are
+        added; anything else FVS held for the stored trees, such as their
+        age or plot-level data, is dropped.
+
+        Args:
+            fvs (FVS): an FVS instance stopped within a stand.
+            stand_cn (str): stand to inject, defaults to the current stand's
+                control number (or stand id when it has none).
+
+        Returns:
+            the number of trees added.
+
+        Raises:
+            KeyError: if the stand is not in the store.
+            ValueError: if FVS is in a different year than the stored trees.
+        """
+        stand_cn = _stand_key(fvs) if stand_cn is None else stand_cn
+        stored, current = self.year(stand_cn), _current_year(fvs)
+        if stored and stored != current:
+            msg = (
+                f"Stand {stand_cn!r} was stored in {stored} but FVS is in "
+                f"{current}; start the stand in {stored} to inject it"
+            )
+            raise ValueError(msg)
+        trees = self.get(stand_cn)
+        fvs.add_trees(
+            {
+                attr: values
+                for attr, values in trees.items()
+                if attr in ADD_TREES_COLUMNS
+            }
+        )
+        return len(next(iter(trees.values()), ()))
+
+
+def build_stand_store(
+    fvs: FVS,
+    path: str | os.PathLike,
+    stop: StopPoint | tuple[int, int] = (STOP_POINT_AFTER_INPUT, 0),
+    attrs: Iterable[str] | None = None,
+) -> StandStore:
+    """Runs every stand of the loaded keyfile, storing each at one stop.
+
+    Args:
+        fvs (FVS): an FVS instance with a keyfile loaded.
+        path (str | os.PathLike): directory to write the store to.
+        stop (StopPoint | tuple): where to capture each stand's tree list,
+            as `(stop_point_code, stop_point_year)`; defaults to just after
+            input is read. Stands the stop is never reached in are skipped.
+            Each stand is stored with the year FVS reached.
+        attrs (Iterable[str]): tree attributes to store.
+
+    Returns:
+        the new store, opened for reading.
+
+    Raises:
+        ValueError: if the stop is made in every cycle, since each stand
+            can only be stored once.
+    """
+    plan = StopPlan([stop])
+    if plan.every_cycle:
+        msg = "build_stand_store needs a stop in a single year, not -1"
+        raise ValueError(msg)
+    with StandStoreWriter(path, attrs) as writer:
+        for _ in fvs.run_plan(plan):
+            writer.add_fvs(fvs)
+
+    return StandStore(path)
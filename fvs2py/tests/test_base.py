@@ -1,9 +1,13 @@
 import importlib.resources
 import os
 
+import numpy as np
 import pytest
 
 from fvs2py._base import FVS
+from fvs2py.report import SummaryRecord, run_with_report
+from fvs2py.store import build_stand_store
+from fvs2py.transport import SlabRing
 
 TEST_DLL = "/usr/local/lib/FVSso.so"
 TEST_KEYFILE_PATH = importlib.resources.files("fvs2py.tests.keyfiles").joinpath(
@@ -270,3 +274,162 @@ def test_stand_ids(tmp_path):
     assert fvs.stand_ids["mgmt_id"] == NEW_MGMT_ID
     assert fvs.stand_ids["stand_id"] == NEW_STAND_ID
     fvs._close()
+
+
+def test_tree_list_and_summary(tmp_path):
+    fvs = FVS(TEST_DLL)
+    keyfile_to_run = tmp_path / "test_keyfile.key"
+    keyfile_to_run.write_text(TEST_KEYFILE_PATH.read_text())
+    fvs.load_keyfile(keyfile_to_run)
+    fvs.run(-1)
+
+    trees = fvs.tree_list(["dbh", "tpa"])
+    assert list(trees.columns) == ["dbh", "tpa"]
+    assert len(trees) == fvs.dims["ntrees"]
+    with pytest.raises(ValueError, match="Invalid tree attribute: nope"):
+        fvs.get_tree_attrs(["nope"])
+
+    fvs.run(0, 0)
+    summary = fvs.summary
+    assert len(summary) == fvs.dims["ncycles"] + 1
+    assert summary["year"].is_monotonic_increasing
+    fvs._close()
+
+
+def test_collect_tree_lists(tmp_path):
+    fvs = FVS(TEST_DLL)
+    keyfile_to_run = tmp_path / "test_keyfile.key"
+    keyfile_to_run.write_text(TEST_KEYFILE_PATH.read_text())
+    fvs.load_keyfile(keyfile_to_run)
+
+    trees = fvs.collect_tree_lists(["dbh", "tpa"]).to_frame()
+    assert trees["cycle"].unique().tolist() == list(range(1, 11))
+    assert trees["year"].is_monotonic_increasing
+    assert (trees["stand_id"] == SO_KEYFILE_STAND_IDS["stand_id"]).all()
+    assert fvs.itrncd == FVS_ITRNCD_FINISHED_ALL_STANDS
+    fvs._close()
+
+
+def test_run_plan(tmp_path):
+    fvs = FVS(TEST_DLL)
+    keyfile_to_run = tmp_path / "test_keyfile.key"
+    keyfile_to_run.write_text(TEST_KEYFILE_PATH.read_text())
+    fvs.load_keyfile(keyfile_to_run)
+
+    for stop in fvs.run_plan([(5, 2050), (2, 2030)], include_stand_end=True):
+        assert fvs.restart_code == stop.code
+        if stop.code != FVS_RESTART_CODE_DONE_RUNNING_STAND:
+            assert fvs.get_evmon_attrs(["year"])["year"] == stop.year
+    assert fvs.itrncd == FVS_ITRNCD_FINISHED_ALL_STANDS
+    fvs._close()
+
+
+def test_refresh_state(tmp_path):
+    fvs = FVS(TEST_DLL)
+    keyfile_to_run = tmp_path / "test_keyfile.key"
+    keyfile_to_run.write_text(TEST_KEYFILE_PATH.read_text())
+    fvs.load_keyfile(keyfile_to_run)
+
+    generations = set()
+    for _ in fvs.run_plan([(2, 2030), (2, 2040)]):
+        state = fvs.refresh_state()
+        assert state.dims == fvs.dims
+        assert state.stand_ids == fvs.stand_ids
+        assert state.restart_code == fvs.restart_code
+        assert state.cycle_changed
+        generations.add(state.generation)
+    assert len(generations) == 2
+    fvs._close()
+
+
+def test_write_fvs_to_slab_ring(tmp_path):
+    fvs = FVS(TEST_DLL)
+    keyfile_to_run = tmp_path / "test_keyfile.key"
+    keyfile_to_run.write_text(TEST_KEYFILE_PATH.read_text())
+    fvs.load_keyfile(keyfile_to_run)
+    fvs.run(0, 0)
+    assert fvs.restart_code == FVS_RESTART_CODE_DONE_RUNNING_STAND
+
+    with SlabRing.from_dims(fvs.dims, ["dbh", "tpa"], nslabs=1) as ring:
+        with ring.read(ring.write_fvs(fvs, meta=fvs.stand_ids)) as view:
+            trees = fvs.get_tree_attrs(["dbh", "tpa"])
+            np.testing.assert_array_equal(view.trees["dbh"], trees["dbh"])
+            np.testing.assert_array_equal(view.summary, fvs.get_summary())
+            assert view.meta == fvs.stand_ids
+    fvs._close()
+
+
+def test_suppressed_output(tmp_path):
+    fvs = FVS(TEST_DLL)
+    keyfile_to_run = tmp_path / "test_keyfile.key"
+    keyfile_to_run.write_text(TEST_KEYFILE_PATH.read_text())
+
+    with fvs.suppressed_output():
+        fvs.load_keyfile(keyfile_to_run)
+        fvs.run()
+        fvs.run()
+        assert fvs.itrncd == FVS_ITRNCD_FINISHED_ALL_STANDS
+        assert "STAND ID" in fvs.report.upper()
+    assert not keyfile_to_run.with_suffix(".out").exists()
+    fvs._close()
+
+
+def test_run_with_report(tmp_path):
+    fvs = FVS(TEST_DLL)
+    keyfile_to_run = tmp_path / "test_keyfile.key"
+    keyfile_to_run.write_text(TEST_KEYFILE_PATH.read_text())
+    fvs.load_keyfile(keyfile_to_run)
+
+    records = list(run_with_report(fvs, every_cycle=True))
+    assert fvs.itrncd == FVS_ITRNCD_FINISHED_ALL_STANDS
+    years = [r.year for r in records if isinstance(r, SummaryRecord)]
+    assert years == sorted(years)
+    assert len(years) == len(fvs.summary)
+    fvs._close()
+
+
+def test_run_pipelined(tmp_path):
+    fvs = FVS(TEST_DLL)
+    keyfile_to_run = tmp_path / "test_keyfile.key"
+    keyfile_to_run.write_text(TEST_KEYFILE_PATH.read_text())
+    fvs.load_keyfile(keyfile_to_run)
+
+    captured = list(fvs.run_pipelined([(2, 2030)]))
+    assert [c.stop for c in captured] == [(2, 2030), (100, 0)]
+    assert all(len(c.trees["dbh"]) > 0 for c in captured)
+    assert fvs.itrncd == FVS_ITRNCD_FINISHED_ALL_STANDS
+    fvs._close()
+
+
+def test_tree_mutation(tmp_path):
+    fvs = FVS(TEST_DLL)
+    keyfile_to_run = tmp_path / "test_keyfile.key"
+    keyfile_to_run.write_text(TEST_KEYFILE_PATH.read_text())
+    fvs.load_keyfile(keyfile_to_run)
+    fvs.run(5, 2030)
+
+    before = fvs.get_tree_attrs(["tpa", "dg"])
+    fvs.scale_tpa(0.5)
+    fvs.scale_increments(dg=0.0, mask=before["dg"] > 0)
+    after = fvs.get_tree_attrs(["tpa", "dg"])
+    np.testing.assert_allclose(after["tpa"], before["tpa"] * 0.5)
+    assert (after["dg"] == 0).all()
+    fvs.run(0, 0)
+    fvs.run(0, 0)
+    assert fvs.itrncd == FVS_ITRNCD_FINISHED_ALL_STANDS
+    fvs._close()
+
+
+def test_stand_store(tmp_path):
+    fvs = FVS(TEST_DLL)
+    keyfile_to_run = tmp_path / "test_keyfile.key"
+    keyfile_to_run.write_text(TEST_KEYFILE_PATH.read_text())
+    fvs.load_keyfile(keyfile_to_run)
+
+    store = build_stand_store(fvs, tmp_path / "store")
+    assert fvs.itrncd == FVS_ITRNCD_FINISHED_ALL_STANDS
+    assert len(store) == 1
+    (stand_cn,) = store
+    assert len(store.get(stand_cn)["dbh"]) > 0
+    assert store.year(stand_cn) > 0
+    fvs._close()
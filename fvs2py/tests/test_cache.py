@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pytest
+
+from fvs2py._base import FVS
+from fvs2py.cache import ResultCache, cache_key
+from fvs2py.jobs import JobSpec, run_job
+
+TABLES = {
+    "summary": {"stand_id": ["a", "a"], "year": [2020, 2030]},
+    "tree_list": {"dbh": [1.5, 2.5, 3.5]},
+}
+
+
+@pytest.fixture
+def fake_lib(tmp_path):
+    lib = tmp_path / "FVSso.so"
+    lib.write_bytes(b"not really a library")
+    return lib
+
+
+def test_cache_key_depends_on_content(fake_lib, tmp_path):
+    key = cache_key("PROCESS\n", fake_lib, {"a.tre": "1"}, [(2, 2030)])
+
+    assert key == cache_key("PROCESS\n", fake_lib, {"a.tre": "1"}, [(2, 2030)])
+    assert key != cache_key("PROCESS\n", fake_lib, {"a.tre": "2"}, [(2, 2030)])
+    assert key != cache_key("PROCESS\n", fake_lib, {"a.tre": "1"}, [(5, 2030)])
+    assert key != cache_key("STOP\n", fake_lib, {"a.tre": "1"}, [(2, 2030)])
+    stops = [(5, 2040), (2, 2030), (7, 2030), (2, -1)]
+    assert cache_key("PROCESS\n", fake_lib, stops=stops) == cache_key(
+        "PROCESS\n", fake_lib, stops=[(7, 0), (2, -1), (2, 2030), (5, 2040)]
+    )
+
+    copy = tmp_path / "FVSso_copy.so"
+    copy.write_bytes(fake_lib.read_bytes())
+    assert key == cache_key("PROCESS\n", copy, {"a.tre": "1"}, [(2, 2030)])
+    copy.write_bytes(b"rebuilt library")
+    assert key != cache_key("PROCESS\n", copy, {"a.tre": "1"}, [(2, 2030)])
+
+
+def test_cache_round_trip(tmp_path):
+    cache = ResultCache(tmp_path / "cache")
+    assert cache.get("ab12") is None
+    cache.put("ab12", TABLES)
+
+    assert "ab12" in cache
+    tables = cache.get("ab12")
+    assert tables["summary"]["stand_id"].tolist() == ["a", "a"]
+    np.testing.assert_array_equal(tables["tree_list"]["dbh"], [1.5, 2.5, 3.5])
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert ResultCache(tmp_path / "cache").size == cache.size > 0
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path / "cache")
+    for i, key in enumerate(["aa", "bb", "cc"]):
+        cache.put(key, TABLES)
+        os.utime(cache._path(key), (i, i))
+    cache.get("aa")  # now the most recently used
+
+    cache.evict(target_bytes=cache.size - 1)
+    assert "bb" not in cache
+    assert "aa" in cache
+    assert "cc" in cache
+
+    cache.max_bytes = 1
+    cache.put("dd", TABLES)
+    assert cache.size == 0
+    assert "dd" not in cache
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_run_job_uses_cache(fake_lib, tmp_path, mocker):
+    cache = ResultCache(tmp_path / "cache")
+    fvs = FVS(fake_lib)
+    job = JobSpec(variant="SO", keyfile="PROCESS\n")
+    key = cache_key(job.keyfile, fake_lib, job.inputs, job.stops, job.outputs)
+    cache.put(key, TABLES)
+    load_keyfile = mocker.spy(fvs, "load_keyfile")
+
+    result = run_job(fvs, job, tmp_path / "work", cache=cache)
+    assert result.cached
+    assert result.tables["summary"]["year"] == [2020, 2030]
+    load_keyfile.assert_not_called()
+
+    other = JobSpec(variant="SO", keyfile="STOP\n")
+    result = run_job(fvs, other, tmp_path / "work", cache=cache)
+    assert not result.cached
+    load_keyfile.assert_called_once()
+    assert cache_key(other.keyfile, fake_lib, outputs=other.outputs) in cache
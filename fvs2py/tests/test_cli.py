@@ -0,0 +1,66 @@
+import functools
+import json
+
+import pytest
+
+from fvs2py import cli
+from fvs2py.pool import FvsWorkerPool
+
+
+@pytest.fixture
+def keyfiles(tmp_path):
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / "keyfiles" / f"{name}.key"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(f"STDIDENT\n{name}\nPROCESS\nSTOP\n")
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_cli_run(keyfiles, tmp_path, mocker, capsys):
+    mocker.patch.object(
+        cli,
+        "FvsWorkerPool",
+        functools.partial(FvsWorkerPool, mp_context="fork"),
+    )
+    argv = ["run", "--variant", "SO", "-j", "2", "--out", str(tmp_path / "out")]
+
+    timings = tmp_path / "timings.json"
+    argv += ["--lib-dir", str(tmp_path), "--timings", str(timings)]
+
+    assert cli.main([*argv, *keyfiles]) == 0
+    err = capsys.readouterr().err
+    assert err.count(" done in ") == len(keyfiles)
+    assert "3 of 3 keyfiles succeeded" in err
+    assert len(json.loads(timings.read_text())["history"]) == len(keyfiles)
+
+
+def test_cli_run_rejects_duplicate_names(keyfiles, tmp_path):
+    other = tmp_path / "a.key"
+    other.write_text("PROCESS\n")
+    argv = ["run", "--variant", "SO", "--out", str(tmp_path / "out")]
+
+    assert cli.main([*argv, *keyfiles, str(other)]) == 2
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("2", (2, -1)), ("2:-1", (2, -1)), ("5:2030", (5, 2030)), ("7", (7, -1))],
+)
+def test_cli_stop(value, expected):
+    assert cli._stop(value) == expected
+
+
+@pytest.mark.parametrize("value", ["2:0", "2:-5", "9:2030", "x"])
+def test_cli_rejects_bad_stop(keyfiles, capsys, value):
+    with pytest.raises(SystemExit):
+        cli.main(["run", "--variant", "SO", "--stop", value, *keyfiles])
+    assert "--stop" in capsys.readouterr().err
+
+
+def test_cli_requires_variant(keyfiles, capsys):
+    with pytest.raises(SystemExit):
+        cli.main(["run", "--out", "out", *keyfiles])
+    assert "--variant" in capsys.readouterr().err
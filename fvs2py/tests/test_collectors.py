@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fvs2py.collectors import TreeListCollector
+
+
+class FakeFVS:
+    """Stands in for an FVS instance stopped at a cycle."""
+
+    def __init__(self, stand_id, cycle, ntrees):
+        self.stand_ids = {"stand_id": stand_id, "stand_cn": "", "mgmt_id": "A"}
+        self.cycle = cycle
+        self.ntrees = ntrees
+
+    def get_evmon_attrs(self, names):
+        values = {"cycle": self.cycle, "year": 2000 + 10 * self.cycle}
+        return {name: float(values[name]) for name in names}
+
+    def get_tree_attrs(self, attrs):
+        return {
+            attr: np.arange(self.ntrees, dtype=float) + self.cycle
+            for attr in attrs
+        }
+
+
+def _collect(collector):
+    for stand_id, ntrees in (("s1", 3), ("s2", 2000)):
+        for cycle in range(1, 4):
+            collector.collect(FakeFVS(stand_id, cycle, ntrees))
+
+
+def test_tree_list_collector():
+    collector = TreeListCollector(["dbh", "tpa"])
+    _collect(collector)
+    trees = collector.to_frame()
+
+    assert len(collector) == len(trees) == 3 * 3 + 3 * 2000
+    assert list(trees.columns) == [
+        "stand_id",
+        "stand_index",
+        "cycle",
+        "year",
+        "dbh",
+        "tpa",
+    ]
+    assert [s["stand_id"] for s in collector.stands] == ["s1", "s2"]
+    first = trees[trees["stand_index"] == 0]
+    assert first["cycle"].tolist() == [1, 1, 1, 2, 2, 2, 3, 3, 3]
+    assert first["year"].tolist()[-1] == 2030
+    assert first["dbh"].tolist()[:3] == [1.0, 2.0, 3.0]
+    assert (trees["stand_id"] == "s2").sum() == 6000
+
+
+def test_tree_list_collector_new_stand_same_id():
+    collector = TreeListCollector(["dbh"])
+    collector.collect(FakeFVS("s1", 1, 1))
+    collector.collect(FakeFVS("s1", 2, 1))
+    collector.collect(FakeFVS("s1", 1, 1))
+
+    assert collector.to_frame()["stand_index"].tolist() == [0, 0, 1]
+
+
+def test_tree_list_collector_spills(tmp_path):
+    in_memory = TreeListCollector(["dbh", "tpa"])
+    spilling = TreeListCollector(
+        ["dbh", "tpa"], max_bytes=50_000, spill_dir=tmp_path
+    )
+    _collect(in_memory)
+    initial = spilling.nbytes
+    for stand_id, ntrees in (("s1", 3), ("s2", 2000)):
+        for cycle in range(1, 4):
+            spilling.collect(FakeFVS(stand_id, cycle, ntrees))
+            assert spilling.nbytes <= 50_000
+
+    assert len(spilling.spilled) > 1
+    assert spilling.nbytes == initial  # grown columns were given back
+    pd.testing.assert_frame_equal(spilling.to_frame(), in_memory.to_frame())
+    spilling.cleanup()
+    assert list(tmp_path.iterdir()) == []
+    assert tmp_path.exists()
+
+
+def test_tree_list_collector_removes_own_spill_dir():
+    collector = TreeListCollector(["dbh"], max_bytes=1)
+    _collect(collector)
+    spill_dir = collector.spill_dir
+
+    assert spill_dir.is_dir()
+    collector.cleanup()
+    assert not spill_dir.exists()
+
+
+def test_tree_list_collector_empty():
+    trees = TreeListCollector(["dbh"]).to_frame()
+    assert trees.empty
+    assert "stand_id" in trees.columns
+
+
+def test_tree_list_collector_to_arrow():
+    pa = pytest.importorskip("pyarrow")
+    collector = TreeListCollector(["dbh"])
+    _collect(collector)
+    table = collector.to_arrow()
+    assert isinstance(table, pa.Table)
+    assert table.num_rows == len(collector)
+    assert table.column_names == list(collector.to_frame().columns)
+    assert table.column("stand_id").to_pylist()[-1] == "s2"
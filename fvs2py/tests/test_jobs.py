@@ -0,0 +1,92 @@
+import pandas as pd
+import pytest
+
+from fvs2py._base import FVS
+from fvs2py.enums import FvsVariant
+from fvs2py.jobs import JobResult, JobSpec, run_job
+
+
+def test_job_spec_round_trip():
+    job = JobSpec(
+        variant="SO",
+        keyfile="STDIDENT\n12345\nPROCESS\nSTOP\n",
+        inputs={"stand.tre": "1 2 3\n"},
+        stops=[(2, 2030), (5, 2050)],
+        outputs=("summary", "tree_list"),
+    )
+    copy = JobSpec.from_json(job.to_json())
+
+    assert copy == job
+    assert copy.variant is FvsVariant.SOUTHERN_OREGON
+    assert copy.stops == ((2, 2030), (5, 2050))
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "match"),
+    [
+        ({"stops": [(-1, 0)]}, "Invalid value for stop_point_code"),
+        ({"stops": [(2, 0)]}, "must be a specific year"),
+        ({"outputs": ("carbon",)}, "Unknown output requested: carbon"),
+        ({"inputs": {"../x.tre": ""}}, "must not contain directories"),
+    ],
+)
+def test_job_spec_validation(kwargs, match):
+    with pytest.raises(ValueError, match=match):
+        JobSpec(variant="SO", keyfile="", **kwargs)
+
+
+def test_job_result_write(tmp_path):
+    result = JobResult(
+        job_id="abc",
+        status="done",
+        tables={"summary": {"stand_id": ["1", "1"], "year": [2020, 2030]}},
+    )
+    copy = JobResult.from_json(result.to_json())
+    (path,) = copy.write(tmp_path)
+
+    assert path == tmp_path / "abc.summary.csv"
+    pd.testing.assert_frame_equal(
+        pd.read_csv(path, dtype={"stand_id": str}),
+        pd.DataFrame({"stand_id": ["1", "1"], "year": [2020, 2030]}),
+    )
+    with pytest.raises(ValueError, match="Unknown table format"):
+        copy.write(tmp_path, fmt="xlsx")
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_run_job_cleans_up(tmp_path):
+    fvs = FVS("/not/a/real/dir/FVSso.so")
+    job = JobSpec(variant="SO", keyfile="PROCESS\n", inputs={"a.tre": "1\n"})
+    result = run_job(fvs, job, tmp_path)
+
+    assert result.ok
+    assert result.job_id == job.job_id
+    assert fvs.keyfile == "PROCESS\n"
+    assert not (tmp_path / job.job_id).exists()
+
+    run_job(fvs, job, tmp_path, keep_files=True)
+    assert (tmp_path / job.job_id / "a.tre").read_text() == "1\n"
+
+
+def test_run_job_every_cycle(tmp_path):
+    fvs = FVS("/not/a/real/dir/FVSso.so", backend="simulated")
+    job = JobSpec(
+        variant="SO",
+        keyfile=(
+            "STDIDENT\nS1\nINVYEAR         2000\nNUMCYCLE           3\n"
+            "PROCESS\nSTOP\n"
+        ),
+        stops=[(2, -1), (5, 2010)],
+        outputs=("tree_list",),
+    )
+    result = run_job(fvs, job, tmp_path)
+
+    trees = pd.DataFrame(result.tables["tree_list"])
+    stops = trees[["stop_point_code", "stop_point_year"]].drop_duplicates()
+    assert [tuple(stop) for stop in stops.to_numpy().tolist()] == [
+        (2, 2000),
+        (2, 2010),
+        (5, 2010),
+        (2, 2020),
+        (100, 0),
+    ]
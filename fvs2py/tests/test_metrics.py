@@ -0,0 +1,129 @@
+import os
+import socket
+import urllib.request
+
+import pytest
+
+from fvs2py import FVS
+from fvs2py.metrics import (
+    FvsMetrics,
+    MetricsRegistry,
+    MetricsServer,
+    variant_label,
+)
+from fvs2py.pool import FvsWorkerPool
+
+TEST_DLL = "/not/a/real/dir/FVSso.so"
+
+
+def _two_stands(_fvs, item, heartbeat):
+    heartbeat({"stand_id": f"{item}a"})
+    heartbeat({"stand_id": f"{item}b"})
+    if item == 3:
+        msg = "FVS exited with code 2."
+        raise RuntimeError(msg)
+    return item
+
+
+def test_registry_render():
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs.", ("status",))
+    counter.inc(status="done")
+    counter.inc(2, status="done")
+    assert registry.counter("jobs_total", "Jobs.", ("status",)) is counter
+    histogram = registry.histogram("seconds", "Seconds.", buckets=(1.0, 5.0))
+    for value in (0.5, 1.0, 3.0, 10.0):
+        histogram.observe(value)
+    registry.gauge("answer", "Computed.", ("x",), func=lambda: {("a",): 42})
+    with pytest.raises(ValueError, match="takes labels"):
+        counter.inc(other="x")
+
+    text = registry.render()
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{status="done"} 3.0' in text
+    assert 'seconds_bucket{le="1.0"} 2.0' in text
+    assert 'seconds_bucket{le="5.0"} 3.0' in text
+    assert 'seconds_bucket{le="+Inf"} 4.0' in text
+    assert "seconds_sum 14.5" in text
+    assert "seconds_count 4.0" in text
+    assert 'answer{x="a"} 42' in text
+
+
+def test_variant_label():
+    assert variant_label("/usr/local/lib/FVSso.so") == "SO"
+    assert variant_label("libfoo.so") == "libfoo"
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_run_records_stands():
+    fvs = FVS(TEST_DLL)
+    fvs.metrics = metrics = FvsMetrics()
+    fvs.keyfile = "test.key"
+    codes = iter([(0, 7, 0), (0, 100, 0), (1, 0, 3)])
+
+    def fvs_routine(itrncd):
+        itrncd.value, fvs._restart_code.value, fvs._exit_code.value = next(
+            codes
+        )
+
+    fvs._fvs.side_effect = fvs_routine
+    fvs._fvsGetRestartCode.side_effect = lambda _code: None
+    fvs._fvsGetRtnCode.side_effect = lambda _code: None
+    fvs._itrncd.value = 0
+
+    fvs.run(7, 0)
+    assert metrics.stands_completed.get(variant="SO") == 0
+    fvs.run(0, 0)
+    assert metrics.stands_completed.get(variant="SO") == 1
+    assert metrics.stand_seconds.get(variant="SO") == 1
+    fvs.run(0, 0)
+    fvs.run(0, 0)  # FVS does not run again after an error
+    assert metrics.stand_failures.get(variant="SO", exit_code=3, itrncd=1) == 1
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_pool_records_metrics():
+    metrics = FvsMetrics()
+    with FvsWorkerPool(
+        TEST_DLL,
+        processes=2,
+        task=_two_stands,
+        mp_context="fork",
+        metrics=metrics,
+    ) as pool:
+        results = pool.map(range(5))
+        text = metrics.render()
+
+    assert [r.ok for r in results] == [True, True, True, False, True]
+    assert metrics.stands_completed.get(variant="SO") == 9
+    assert metrics.stand_seconds.get(variant="SO") == 9
+    assert metrics.worker_recycles.get(variant="SO") == 1
+    assert metrics.queue_depth.get(queue="pool") == 0
+    assert 'fvs2py_resident_memory_bytes{process="main"}' in text
+    assert 'fvs2py_resident_memory_bytes{process="SO-worker-' in text
+
+
+def test_metrics_server(tmp_path):
+    metrics = FvsMetrics()
+    metrics.stand_finished("SO", 0.2)
+
+    with MetricsServer(metrics) as server:
+        host, port = server.address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as resp:
+            body = resp.read().decode()
+            assert resp.headers["Content-Type"].startswith("text/plain")
+        assert 'fvs2py_stands_completed_total{variant="SO"} 1.0' in body
+        with urllib.request.urlopen(f"http://{host}:{port}/healthz") as resp:
+            assert resp.read() == b"ok\n"
+
+    path = tmp_path / "metrics.sock"
+    with MetricsServer(metrics, unix_socket=path):
+        with socket.socket(socket.AF_UNIX) as sock:
+            sock.connect(os.fspath(path))
+            sock.sendall(b"GET /metrics HTTP/1.0\r\n\r\n")
+            response = b""
+            while chunk := sock.recv(65536):
+                response += chunk
+    assert response.startswith(b"HTTP/1.0 200")
+    assert b"fvs2py_stand_seconds_count" in response
+    assert not path.exists()
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from fvs2py import FVS
+
+TEST_DLL = "/not/a/real/dir/FVSxx.so"
+
+
+@pytest.fixture
+def fvs(mock_valid_fvs_dll):  # noqa: ARG001
+    """An FVS instance whose tree list lives in a dict of arrays."""
+    fvs = FVS(TEST_DLL)
+    fvs.trees = {
+        "tpa": np.array([10.0, 20.0, 30.0, 40.0]),
+        "dbh": np.array([4.0, 8.0, 12.0, 16.0]),
+        "dg": np.array([0.5, 0.5, 0.5, 0.5]),
+        "htg": np.array([2.0, 2.0, 2.0, 2.0]),
+    }
+    fvs.set_calls = []
+
+    def dim_sizes(ntrees, *_args):
+        ntrees.value = len(fvs.trees["tpa"])
+
+    def tree_attr(name, _nch, action, ntrees, values, rtn_code):
+        name = name.decode()
+        if name not in fvs.trees:
+            rtn_code.value = 1
+            return
+        rtn_code.value = 0
+        buffer = np.ctypeslib.as_array(values, shape=(ntrees.value,))
+        if action == b"get":
+            buffer[:] = fvs.trees[name]
+        else:
+            fvs.set_calls.append(name)
+            fvs.trees[name] = buffer.copy()
+
+    fvs._fvsDimSizes.side_effect = dim_sizes
+    fvs._fvsTreeAttr.side_effect = tree_attr
+    return fvs
+
+
+def test_set_tree_attrs(fvs):
+    fvs.set_tree_attrs({"dbh": [1, 2, 3, 4]})
+    assert fvs.trees["dbh"].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert fvs.get_tree_attrs(["dbh"])["dbh"].tolist() == [1, 2, 3, 4]
+
+    with pytest.raises(ValueError, match="Expected 4 values"):
+        fvs.set_tree_attrs({"dbh": [1, 2]})
+    with pytest.raises(ValueError, match="Invalid tree attribute: nope"):
+        fvs.set_tree_attrs({"nope": [1, 2, 3, 4]})
+
+
+def test_scale_tpa_and_remove_trees(fvs):
+    fvs.scale_tpa(0.5, mask=fvs.trees["dbh"] > 10)
+    assert fvs.trees["tpa"].tolist() == [10.0, 20.0, 15.0, 20.0]
+
+    fvs.remove_trees(np.array([True, False, False, False]))
+    assert fvs.trees["tpa"].tolist() == [0.0, 20.0, 15.0, 20.0]
+    assert fvs.set_calls == ["tpa", "tpa"]
+
+
+def test_scale_increments(fvs):
+    fvs.scale_increments(dg=2.0, htg=np.array([1.0, 0.5, 0.5, 1.0]))
+    assert fvs.trees["dg"].tolist() == [1.0, 1.0, 1.0, 1.0]
+    assert fvs.trees["htg"].tolist() == [2.0, 1.0, 1.0, 2.0]
+
+    fvs.scale_increments(dg=0.0, mask=[False, True, False, False])
+    assert fvs.trees["dg"].tolist() == [1.0, 0.0, 1.0, 1.0]
+    assert fvs.set_calls == ["dg", "htg", "dg"]
+
+    fvs.scale_increments()
+    assert len(fvs.set_calls) == 3
+
+
+def test_update_tree_attrs(fvs):
+    written = fvs.update_tree_attrs(
+        ["dbh", "tpa"], lambda t: {"tpa": np.where(t["dbh"] < 10, 0, t["tpa"])}
+    )
+    assert list(written) == ["tpa"]
+    assert fvs.trees["tpa"].tolist() == [0.0, 0.0, 30.0, 40.0]
@@ -0,0 +1,137 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from fvs2py.jobs import JobSpec
+from fvs2py.optimize import (
+    Activity,
+    ScheduleEvaluator,
+    _Run,
+    evaluate_schedule,
+    group_by_divergence,
+)
+
+
+class FakeFVS:
+    """Simulates one stand from 2000 to 2100, with saving and restarting."""
+
+    def __init__(self, lib_path=None):
+        self.lib_path = lib_path
+        self.itrncd = -1
+        self.exit_code = 0
+        self.stand_ids = {"stand_id": "S1"}
+
+    def _reset(self, year, save_state=None, resumed=False):
+        self.itrncd = 0
+        self.restart_code = 0
+        self.year = year
+        self.save_state = save_state
+        self.resumed = resumed
+        self.activities = []
+
+    def load_keyfile(self, _keyfile, save_state=None):
+        self._reset(2000, save_state=save_state)
+
+    def load_state(self, state_file, _keyfile):
+        self._reset(json.loads(Path(state_file).read_text()), resumed=True)
+
+    def add_activity(self, year, activity_code, parms=()):
+        self.activities.append((year, activity_code, tuple(parms)))
+
+    def run(self, stop_point_code, stop_point_year):
+        if self.itrncd != 0:
+            return
+        if self.save_state is not None:
+            _, year, path = self.save_state
+            Path(path).write_text(json.dumps(year))
+            self.itrncd = 2
+        elif self.restart_code == 100:
+            self.itrncd = 2
+            self.restart_code = 0
+        elif stop_point_code == 2 and stop_point_year >= self.year:
+            self.year = stop_point_year
+            self.restart_code = 2
+        else:
+            self.year = 2100
+            self.restart_code = 100
+
+
+def removed(fvs):
+    """Scores a stand by the parameters of its activities."""
+    assert fvs.restart_code == 100
+    return sum(sum(parms) for _, _, parms in fvs.activities) + (
+        0.5 if fvs.resumed else 0.0
+    )
+
+
+def test_group_by_divergence():
+    schedules = [
+        [Activity(2030, 1), Activity(2050, 1)],
+        [],
+        [Activity(2050, 1), Activity(2030, 2)],
+        [Activity(2040, 1)],
+    ]
+    assert group_by_divergence(schedules) == {
+        2030: [0, 2],
+        None: [1],
+        2040: [3],
+    }
+
+
+def test_evaluate_schedule(tmp_path):
+    fvs = FakeFVS()
+    heartbeats = []
+    run = _Run(
+        keyfile=tmp_path / "base.key",
+        schedule=(Activity(2030, 224, (10.0,)), Activity(2050, 224, (5.0,))),
+        objective=removed,
+    )
+    assert evaluate_schedule(fvs, run, heartbeats.append) == 15.0
+    assert fvs.itrncd == 2
+    assert heartbeats == [{"stand_id": "S1"}]
+    assert fvs.activities[0] == (2030, 224, (10.0,))
+
+    state_file = tmp_path / "prefix.stop"
+    evaluate_schedule(
+        fvs,
+        _Run(keyfile=run.keyfile, state_file=state_file, save_year=2030),
+        heartbeats.append,
+    )
+    assert state_file.exists()
+    run.state_file = state_file
+    assert evaluate_schedule(fvs, run, heartbeats.append) == 15.5
+
+
+@pytest.mark.parametrize("share_prefix", [True, False])
+def test_schedule_evaluator(tmp_path, mocker, share_prefix):
+    mocker.patch("fvs2py.pool.FVS", FakeFVS)
+    base = JobSpec(variant="PN", keyfile="STDIDENT\nS1\nPROCESS\nSTOP\n")
+    schedules = [[Activity(2030, 224, (float(i),))] for i in range(4)] + [
+        [],
+        [Activity(2040, 224, (1.0,))],
+    ]
+
+    with ScheduleEvaluator(
+        lib_dir=tmp_path,
+        processes=2,
+        workdir=tmp_path / "work",
+        share_prefix=share_prefix,
+        mp_context="fork",
+    ) as evaluator:
+        results = evaluator.evaluate(base, schedules, removed)
+        assert evaluator.pool("PN") is evaluator.pool(base.variant)
+
+    offset = 0.5 if share_prefix else 0.0
+    assert [r.value for r in results] == [
+        0 + offset,
+        1 + offset,
+        2 + offset,
+        3 + offset,
+        0.0,
+        1.0,
+    ]
+    prefixes = list((tmp_path / "work").glob("*/prefix_*.stop"))
+    assert [p.name for p in prefixes] == (
+        ["prefix_2030.stop"] if share_prefix else []
+    )
@@ -0,0 +1,96 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from fvs2py import FVS
+from fvs2py._base import scratch_root
+
+TEST_DLL = "/not/a/real/dir/FVSxx.so"
+
+
+@pytest.fixture
+def keyfile(tmp_path):
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    (inputs / "stand.tre").write_text("trees\n")
+    path = inputs / "stand.key"
+    path.write_text("STDIDENT\nS1\nPROCESS\nSTOP\n")
+    return path
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_suppressed_output(keyfile, monkeypatch, tmp_path):
+    monkeypatch.setenv("FVS2PY_SCRATCH_DIR", str(tmp_path))
+    monkeypatch.setenv("GFORTRAN_TMPDIR", "/elsewhere")
+    assert scratch_root() == tmp_path
+    fvs = FVS(TEST_DLL)
+
+    with fvs.suppressed_output() as redirected:
+        assert redirected is fvs
+        output_dir = fvs.output_dir
+        assert output_dir.parent == tmp_path
+        fortran_tmpdir = Path(os.environ["GFORTRAN_TMPDIR"])
+        assert fortran_tmpdir.parent == tmp_path
+        assert fortran_tmpdir.is_dir()
+
+        fvs.load_keyfile(keyfile)
+        staged = fvs.keyfile_path
+        assert staged.parent.parent == output_dir
+        assert staged.read_text() == keyfile.read_text()
+        assert staged.with_suffix(".tre").resolve() == keyfile.with_suffix(
+            ".tre"
+        )
+        cmdline = fvs._fvsSetCmdLine.call_args.args[0].decode()
+        assert cmdline == f"--keywordfile={staged}"
+
+        fvs.main_output_path.write_text("report text")  # written by FVS
+        assert fvs.report == "report text"
+
+        fvs.load_keyfile(keyfile)
+        assert not staged.parent.exists()  # previous files cleaned up
+
+    assert fvs.output_dir is None
+    assert not output_dir.exists()
+    assert os.environ["GFORTRAN_TMPDIR"] == "/elsewhere"
+    assert not fortran_tmpdir.exists()
+    assert sorted(p.name for p in keyfile.parent.iterdir()) == [
+        "stand.key",
+        "stand.tre",
+    ]
+
+    fvs.load_keyfile(keyfile)
+    assert fvs.main_output_path == keyfile.with_suffix(".out")
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_redirect_output_to_given_dir(keyfile, tmp_path):
+    fvs = FVS(TEST_DLL)
+    output_dir = tmp_path / "out"
+    fvs.redirect_output(output_dir)
+    fvs.load_keyfile(keyfile)
+    staged_dir = fvs.keyfile_path.parent
+    fvs.restore_output()
+
+    assert output_dir.exists()
+    assert not staged_dir.exists()
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_redirected_instances_share_fortran_tmpdir(monkeypatch, tmp_path):
+    monkeypatch.setenv("FVS2PY_SCRATCH_DIR", str(tmp_path))
+    monkeypatch.delenv("GFORTRAN_TMPDIR", raising=False)
+    first, second = FVS(TEST_DLL), FVS(TEST_DLL)
+
+    first.redirect_output()
+    fortran_tmpdir = os.environ["GFORTRAN_TMPDIR"]
+    second.redirect_output()
+    assert os.environ["GFORTRAN_TMPDIR"] == fortran_tmpdir
+
+    first.restore_output()
+    assert os.environ["GFORTRAN_TMPDIR"] == fortran_tmpdir
+    assert os.path.isdir(fortran_tmpdir)  # still used by the second
+
+    second.restore_output()
+    assert "GFORTRAN_TMPDIR" not in os.environ
+    assert not os.path.exists(fortran_tmpdir)
@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from fvs2py import FVS
+from fvs2py._core import LibraryGuard, synchronized
+
+TEST_DLL = "/not/a/real/dir/FVSxx.so"
+YEARS = (2000, 2010, 2020)
+
+
+class ScriptedFVS:
+    """Walks through the stop points of a number of stands, slowly."""
+
+    variant = "XX"
+
+    def __init__(self, nstands, delay=0.0):
+        self._guard = LibraryGuard()
+        self.locations = []
+        for stand in range(nstands):
+            self.locations += [(2, y, f"S{stand}") for y in YEARS]
+            self.locations.append((100, 0, f"S{stand}"))
+        self.position = -1
+        self.itrncd = 0
+        self.restart_code = 0
+        self.delay = delay
+
+    @synchronized
+    def run(self, code, year):
+        time.sleep(self.delay)
+        while True:
+            self.position += 1
+            if self.position == len(self.locations):
+                self.itrncd = 2
+                return
+            loc_code, loc_year, _ = self.locations[self.position]
+            if loc_code == 100 or (loc_code == code and loc_year == year):
+                self.restart_code = loc_code
+                return
+
+    @property
+    @synchronized
+    def stand_ids(self):
+        return {"stand_id": self.locations[self.position][2]}
+
+    @synchronized
+    def get_tree_attrs(self, attrs=None):
+        return {"year": self.locations[self.position][1]}
+
+    run_plan = FVS.run_plan
+    run_pipelined = FVS.run_pipelined
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_library_lock_serializes_calls():
+    first, second = FVS(TEST_DLL), FVS(TEST_DLL)
+    assert first.lock is second.lock
+    active, overlaps = [], []
+
+    def dim_sizes(*_args):
+        active.append(1)
+        overlaps.append(len(active))
+        time.sleep(0.01)
+        active.pop()
+
+    first._fvsDimSizes.side_effect = dim_sizes
+    second._fvsDimSizes.side_effect = dim_sizes
+    threads = [
+        threading.Thread(target=lambda fvs=fvs: [fvs.dims for _ in range(5)])
+        for fvs in (first, second)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert overlaps == [1] * 10
+
+
+def test_run_pipelined():
+    fvs = ScriptedFVS(nstands=2)
+    captured = list(fvs.run_pipelined([(2, 2010), (2, 2020)], maxsize=1))
+
+    assert [(c.stop, c.stand_ids["stand_id"]) for c in captured] == [
+        ((2, 2010), "S0"),
+        ((2, 2020), "S0"),
+        ((100, 0), "S0"),
+        ((2, 2010), "S1"),
+        ((2, 2020), "S1"),
+        ((100, 0), "S1"),
+    ]
+    assert captured[1].trees == {"year": 2020}
+    assert fvs.itrncd == 2
+    assert fvs._guard.driver is None
+
+
+def test_run_pipelined_guards_library():
+    fvs = ScriptedFVS(nstands=3, delay=0.01)
+    captured = fvs.run_pipelined([(2, 2010)])
+    next(captured)
+    with pytest.raises(RuntimeError, match="driven by a pipelined run"):
+        fvs.stand_ids  # noqa: B018
+    with pytest.raises(RuntimeError, match="already driving"):
+        next(fvs.run_pipelined([(2, 2010)]))
+    captured.close()  # abandons the simulation
+
+    assert fvs._guard.driver is None
+    assert fvs.stand_ids["stand_id"].startswith("S")
+
+
+def test_run_pipelined_reraises_capture_errors():
+    def capture(_fvs, stop):
+        if stop.year == 2020:
+            msg = "bad stop"
+            raise ValueError(msg)
+        return stop
+
+    fvs = ScriptedFVS(nstands=1)
+    captured = []
+    with pytest.raises(ValueError, match="bad stop"):
+        captured.extend(fvs.run_pipelined([(2, 2010), (2, 2020)], capture))
+    assert captured == [(2, 2010)]
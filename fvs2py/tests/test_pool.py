@@ -0,0 +1,143 @@
+import os
+import time
+
+import pytest
+
+from fvs2py.pool import FvsWorkerPool
+
+TEST_DLL = "/not/a/real/dir/FVSxx.so"
+
+
+def _double(_fvs, item, heartbeat):
+    heartbeat({"stand_id": str(item)})
+    return item * 2
+
+
+def _crash_on_three(_fvs, item, heartbeat):
+    heartbeat({"stand_id": str(item)})
+    if item == 3:
+        os._exit(17)  # mimic a Fortran STOP killing the process
+    return item
+
+
+def _hang_on_three(_fvs, item, heartbeat):
+    heartbeat({"stand_id": str(item)})
+    if item == 3:
+        time.sleep(60)
+    return item
+
+
+def _raise_on_three(_fvs, item, _heartbeat):
+    if item == 3:
+        msg = "FVS detected an error and must be reset (itrncd=1)."
+        raise RuntimeError(msg)
+    return os.getpid()
+
+
+def _crash_always(_fvs, _item, _heartbeat):
+    os._exit(1)
+
+
+def _crash_once(_fvs, item, _heartbeat):
+    marker = item / "crashed"
+    if not marker.exists():
+        marker.touch()
+        os._exit(1)
+    return "recovered"
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_pool_map_preserves_order():
+    with FvsWorkerPool(
+        TEST_DLL, processes=2, task=_double, mp_context="fork"
+    ) as pool:
+        results = pool.map(range(6))
+
+    assert [r.value for r in results] == [0, 2, 4, 6, 8, 10]
+    assert all(r.ok for r in results)
+    assert results[4].stand_ids == {"stand_id": "4"}
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_pool_survives_crashed_worker():
+    with FvsWorkerPool(
+        TEST_DLL,
+        processes=2,
+        task=_crash_on_three,
+        max_retries=1,
+        mp_context="fork",
+    ) as pool:
+        results = pool.map(range(5))
+
+    assert [r.ok for r in results] == [True, True, True, False, True]
+    assert results[3].quarantined
+    assert results[3].attempts == 2
+    assert results[3].stand_ids == {"stand_id": "3"}
+    assert "exited with code 17" in results[3].error
+    assert pool.quarantined == [results[3]]
+    assert pool.recycles == 2
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_pool_kills_hung_worker():
+    with FvsWorkerPool(
+        TEST_DLL,
+        processes=2,
+        task=_hang_on_three,
+        timeout=0.5,
+        max_retries=0,
+        mp_context="fork",
+    ) as pool:
+        results = pool.map(range(5))
+
+    assert [r.ok for r in results] == [True, True, True, False, True]
+    assert "timed out" in results[3].error
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_pool_recycles_after_fvs_error():
+    with FvsWorkerPool(
+        TEST_DLL, processes=1, task=_raise_on_three, mp_context="fork"
+    ) as pool:
+        results = pool.map(range(5))
+
+    assert results[3].attempts == 1  # FVS errors are not retried
+    assert results[3].error.startswith("RuntimeError: FVS detected an error")
+    assert results[2].value != results[4].value  # fresh worker process
+    assert pool.recycles == 1
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_pool_retries_crash(tmp_path):
+    with FvsWorkerPool(
+        TEST_DLL, processes=1, task=_crash_once, mp_context="fork"
+    ) as pool:
+        (result,) = pool.map([tmp_path])
+
+    assert result.ok
+    assert result.value == "recovered"
+    assert result.attempts == 2
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_pool_quarantine_dir(tmp_path):
+    keyfile = tmp_path / "bad.key"
+    keyfile.write_text("STDIDENT\n")
+    quarantine = tmp_path / "quarantine"
+    with FvsWorkerPool(
+        TEST_DLL,
+        processes=1,
+        task=_crash_always,
+        max_retries=0,
+        quarantine_dir=quarantine,
+        mp_context="fork",
+    ) as pool:
+        (result,) = pool.map([keyfile])
+
+    assert result.quarantined
+    assert (quarantine / "bad.key").read_text() == "STDIDENT\n"
+
+
+def test_pool_rejects_zero_processes():
+    with pytest.raises(ValueError, match="processes must be at least 1"):
+        FvsWorkerPool(TEST_DLL, processes=0)
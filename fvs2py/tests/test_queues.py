@@ -0,0 +1,124 @@
+import time
+
+import pytest
+
+from fvs2py.cli import main
+from fvs2py.distributed import Coordinator, Worker
+from fvs2py.enums import FvsVariant
+from fvs2py.jobs import JobResult, JobSpec
+from fvs2py.metrics import FvsMetrics
+from fvs2py.queues import SQLiteQueue, open_queue
+
+
+def _jobs(*variants):
+    return [JobSpec(variant=v, keyfile="PROCESS\n") for v in variants]
+
+
+def test_sqlite_queue_claims_in_order(tmp_path):
+    queue = SQLiteQueue(tmp_path / "jobs.db")
+    jobs = _jobs("SO", "PN", "SO")
+    assert queue.submit(jobs) == len(jobs)
+
+    assert queue.claim("w1", variants=["PN"]).job_id == jobs[1].job_id
+    assert queue.claim("w1").job_id == jobs[0].job_id
+    assert queue.claim("w2").job_id == jobs[2].job_id
+    assert queue.claim("w2") is None
+    assert queue.counts() == {"pending": 0, "running": 3, "finished": 0}
+
+    queue.complete(JobResult(job_id=jobs[2].job_id, status="done"))
+    queue.complete(JobResult(job_id=jobs[2].job_id, status="done"))
+    results, cursor = queue.results()
+    assert [r.job_id for r in results] == [jobs[2].job_id]
+    assert queue.results(cursor) == ([], cursor)
+    queue.close()
+
+
+def test_sqlite_queue_requeues_stale_jobs(tmp_path):
+    queue = open_queue(f"sqlite:///{tmp_path}/jobs.db")
+    (job,) = _jobs("SO")
+    queue.submit([job])
+    queue.claim("w1")
+    time.sleep(0.05)
+
+    assert queue.requeue_stale(lease=0.01, max_attempts=2) == [job.job_id]
+    assert queue.claim("w2").job_id == job.job_id
+    time.sleep(0.05)
+    assert queue.requeue_stale(lease=0.01, max_attempts=2) == [job.job_id]
+
+    (result,), _ = queue.results()
+    assert not result.ok
+    assert "did not finish" in result.error
+    assert queue.counts()["finished"] == 1
+
+
+def test_open_queue_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown queue backend: redis"):
+        open_queue("redis://localhost")
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_worker_and_coordinator(tmp_path, mocker):
+    mocker.patch("fvs2py.distributed.FVS._close")
+    queue = SQLiteQueue(tmp_path / "jobs.db")
+    coordinator = Coordinator(queue)
+    jobs = _jobs("SO", "PN", "SO")
+    coordinator.submit(jobs)
+
+    metrics = FvsMetrics()
+    worker = Worker(
+        queue, lib_dir=tmp_path, workdir=tmp_path / "work", metrics=metrics
+    )
+    assert worker.run(exit_when_empty=True) == len(jobs)
+    assert set(worker._fvs) == {
+        FvsVariant.SOUTHERN_OREGON,
+        FvsVariant.PACIFIC_COAST,
+    }
+
+    results = list(coordinator.stream(poll_interval=0))
+    assert sorted(r.job_id for r in results) == sorted(j.job_id for j in jobs)
+    assert all(r.ok and r.worker_id == worker.worker_id for r in results)
+    worker.close()
+    assert worker._fvs == {}
+    assert metrics.worker_recycles.get(variant="SO") == 0
+
+    mocker.patch("fvs2py.distributed.run_job", side_effect=RuntimeError("x"))
+    coordinator.submit(_jobs("SO"))
+    assert worker.run(exit_when_empty=True) == 1
+    assert metrics.worker_recycles.get(variant="SO") == 1
+    assert metrics.worker_recycles.get(variant="PN") == 0
+
+
+def test_library_path(monkeypatch):
+    assert FvsVariant.PACIFIC_COAST.library_path("/opt/fvs").as_posix() == (
+        "/opt/fvs/FVSpn.so"
+    )
+    monkeypatch.setenv("FVS2PY_LIB_DIR", "/srv/lib")
+    assert FvsVariant("SO").library_path().as_posix() == "/srv/lib/FVSso.so"
+
+
+def test_cli_submit(tmp_path, capsys):
+    keyfile = tmp_path / "stand.key"
+    keyfile.write_text("PROCESS\n")
+    db = tmp_path / "jobs.db"
+
+    assert (
+        main(
+            [
+                "queue",
+                "submit",
+                str(db),
+                str(keyfile),
+                "--variant",
+                "SO",
+                "--stop",
+                "2:2030",
+                "--output",
+                "tree_list",
+            ]
+        )
+        == 0
+    )
+    assert capsys.readouterr().out == "submitted 1 jobs\n"
+    job = SQLiteQueue(db).claim("w1")
+    assert job.stops == ((2, 2030),)
+    assert job.outputs == ("tree_list",)
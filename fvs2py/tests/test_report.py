@@ -0,0 +1,127 @@
+import pytest
+
+from fvs2py.report import (
+    ActivityRecord,
+    FvsReportError,
+    MessageRecord,
+    ReportParser,
+    ReportTail,
+    SummaryRecord,
+    run_with_report,
+)
+
+STAND_REPORT = """\
+                 OPTIONS SELECTED BY INPUT
+STDIDENT
+          STAND ID= S248112
+********   FVS20 WARNING:  SITE INDEX WAS NOT SPECIFIED.
+
+                                                   ACTIVITY SUMMARY
+ STAND ID= S248112            MGMT ID= NONE
+ CYCLE  DATE  EXTENSION  KEYWORD   DATE  PARAMETERS:
+ -----  ----  ---------  --------  ----  ---------------------------------
+     1  2000
+                 BASE       THINBBA   2000    0.00  100.00    1.00
+     2  2010
+                 BASE       THINBBA   NOT DONE    0.00   80.00
+       SUMMARY STATISTICS (PER ACRE OR STAND BASED ON TOTAL STAND AREA)
+YEAR AGE  TREES  BA  SDI  CCF HT  QMD  CU FT CU FT BD FT TREES CU FT
+---- --- ----- --- ---- --- --- ---- ----- ----- ----- ----- -----
+2000  60   536 154  326 165  67  7.3  3502  2581  8894     0     0     0     0 154  326 165  67  7.3   10   96   35  43.0 201 22
+2010  70   480 170  350 180  75  8.1  4100  3200  11000  100  500   400  1500 150  300 160  74  8.4   10   90   30  45.0 201 23
+2020  80   450 180  360 190  80  8.6  4600  3600  13000
+"""
+
+
+def _records(text, chunk=7):
+    parser = ReportParser()
+    records = []
+    for i in range(0, len(text), chunk):
+        records.extend(parser.feed(text[i : i + chunk]))
+    records.extend(parser.close())
+    return records
+
+
+def test_report_parser():
+    records = _records(STAND_REPORT)
+
+    messages = [r for r in records if isinstance(r, MessageRecord)]
+    assert messages == [
+        MessageRecord(
+            "S248112", "WARNING", "FVS20", "SITE INDEX WAS NOT SPECIFIED."
+        )
+    ]
+
+    activities = [r for r in records if isinstance(r, ActivityRecord)]
+    assert activities == [
+        ActivityRecord(
+            "S248112", 1, 2000, "BASE", "THINBBA", 2000, (0.0, 100.0, 1.0)
+        ),
+        ActivityRecord(
+            "S248112", 2, 2010, "BASE", "THINBBA", None, (0.0, 80.0)
+        ),
+    ]
+
+    summary = [r for r in records if isinstance(r, SummaryRecord)]
+    assert [r.year for r in summary] == [2000, 2010, 2020]
+    assert summary[0].values["qmd"] == 7.3
+    assert summary[0].values["fortyp"] == 201
+    assert summary[0].values["sizecls"] == 2
+    assert summary[1].values["stkcls"] == 3
+    assert "rtpa" not in summary[2].values
+    assert summary[2].values["bdft"] == 13000
+
+
+def test_report_parser_chunking_matches_whole():
+    assert _records(STAND_REPORT, chunk=1) == _records(
+        STAND_REPORT, chunk=len(STAND_REPORT)
+    )
+
+
+def test_report_tail(tmp_path):
+    path = tmp_path / "stand.out"
+    tail = ReportTail(path, chunk_size=16)
+    assert list(tail.poll()) == []
+
+    head, rest = STAND_REPORT[:300], STAND_REPORT[300:]
+    path.write_text(head)
+    first = list(tail.poll())
+    with path.open("a") as f:
+        f.write(rest)
+    second = list(tail.poll(final=True))
+
+    assert first + second == _records(STAND_REPORT)
+
+
+class FakeFVS:
+    """Appends one stand's report to the main output on each run."""
+
+    def __init__(self, path, stands):
+        self.main_output_path = path
+        self.stands = list(stands)
+        self.itrncd = 0
+
+    def run(self, stop_point_code, stop_point_year):
+        assert (stop_point_code, stop_point_year) == (0, 0)
+        if not self.stands:
+            self.itrncd = 2
+            return
+        with self.main_output_path.open("a") as f:
+            f.write(self.stands.pop(0))
+
+
+def test_run_with_report(tmp_path):
+    error = "********   FVS01 ERROR:  INVALID KEYWORD WAS SPECIFIED.\n"
+    fvs = FakeFVS(tmp_path / "a.out", [STAND_REPORT, error, STAND_REPORT])
+
+    records = run_with_report(fvs)
+    with pytest.raises(FvsReportError, match="INVALID KEYWORD") as exc_info:
+        for _ in records:
+            pass
+    assert exc_info.value.record.code == "FVS01"
+    assert len(fvs.stands) == 1  # the last stand was never run
+
+    fvs = FakeFVS(tmp_path / "b.out", [STAND_REPORT, error, STAND_REPORT])
+    records = list(run_with_report(fvs, abort_on_error=False))
+    assert fvs.itrncd == 2
+    assert sum(isinstance(r, SummaryRecord) for r in records) == 6
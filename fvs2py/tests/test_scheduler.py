@@ -0,0 +1,93 @@
+import functools
+
+from fvs2py import FVS
+from fvs2py.constants import BACKEND_ENV_VAR
+from fvs2py.jobs import JobSpec, run_job_task
+from fvs2py.pool import FvsWorkerPool
+from fvs2py.scheduler import (
+    CostModel,
+    JobFeatures,
+    imap_longest_first,
+    job_digest,
+    job_features,
+)
+
+TEST_DLL = "/not/a/real/dir/FVSso.so"
+
+TREES = "0101 100    501  1 51\n"
+
+
+def make_job(ntrees, ncycles=None, variant="SO", inline=True):
+    keyfile = "STDIDENT\nS1\n"
+    if ncycles is not None:
+        keyfile += f"NUMCYCLE{float(ncycles):>12}\n"
+    inputs = {}
+    if inline:
+        keyfile += "TREEDATA        15.0\n" + TREES * ntrees + "-999\n"
+    else:
+        keyfile += "TREEDATA\n"
+        inputs["s1.tre"] = TREES * ntrees
+    keyfile += "PROCESS\nSTOP\n"
+    return JobSpec(variant=variant, keyfile=keyfile, inputs=inputs)
+
+
+def test_job_features():
+    assert job_features(make_job(3, 5)) == JobFeatures("SO", 1, 3, 5)
+    assert job_features(make_job(4, inline=False)) == JobFeatures(
+        "SO", 1, 4, 10
+    )
+    assert JobFeatures("SO", 2, 5000, 10).work(maxtrees=2000) == 40000.0
+    assert JobFeatures("SO", 1, 0, 10).work() == 10.0
+
+
+def test_cost_model_orders_and_learns(tmp_path):
+    small, medium, large = make_job(2), make_job(20), make_job(200, 2)
+    model = CostModel(tmp_path / "timings.json")
+    # untrained, jobs are ordered by tree-cycles
+    assert model.order([small, large, medium]) == [large, medium, small]
+
+    model.observe(small, 1.0)
+    model.observe(medium, 10.0)
+    assert model.predict(small) == 1.0
+    assert abs(model.predict(make_job(10)) - 5.0) < 1e-6
+    # the large job is seen to be slow, e.g. because of its extensions
+    model.observe(large, 100.0)
+    model.observe(large, 60.0)
+    assert model.predict(large) == 80.0
+    model.save()
+
+    reloaded = CostModel(tmp_path / "timings.json")
+    assert reloaded.predict(large) == 80.0
+    assert reloaded.order([small, medium, large]) == [large, medium, small]
+
+    bounded = CostModel(max_history=1)
+    bounded.observe(small, 1.0)
+    bounded.observe(medium, 10.0)
+    assert len(bounded._history) == 1
+
+
+def test_cost_model_ignores_unreadable_file(tmp_path):
+    path = tmp_path / "timings.json"
+    path.write_text("not json")
+    model = CostModel(path)
+    assert model.predict(make_job(1)) == 10.0
+
+
+def test_imap_longest_first_learns_from_job_results(monkeypatch, tmp_path):
+    monkeypatch.setenv(BACKEND_ENV_VAR, "simulated")
+    jobs = [make_job(2, 2), make_job(5, 2)]
+    model = CostModel()
+    with FvsWorkerPool(
+        TEST_DLL,
+        processes=1,
+        task=functools.partial(run_job_task, workdir=tmp_path),
+        mp_context="fork",
+    ) as pool:
+        results = list(imap_longest_first(pool, jobs, model))
+
+    assert all(result.ok for result in results)
+    assert model.maxtrees == {"SO": FVS(TEST_DLL).dims["maxtrees"]}
+    for result in results:
+        # the first job's dispatch includes starting the worker
+        assert model._history[job_digest(result.item)] == result.value.elapsed
+        assert result.value.elapsed <= result.elapsed
@@ -0,0 +1,207 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from fvs2py import FVS
+from fvs2py.constants import BACKEND_ENV_VAR, SUMMARY_COLUMNS
+from fvs2py.pool import FvsWorkerPool
+from fvs2py.report import SummaryRecord, run_with_report
+from fvs2py.simulated import SimulatedFvsLibrary, parse_keyfile
+
+TEST_DLL = "/not/a/real/dir/FVSso.so"
+TEST_KEYFILE_PATH = Path(__file__).parent / "keyfiles" / "SO.key"
+
+TWO_STANDS = """\
+STDIDENT
+STAND-A
+STANDCN
+CN-A
+INVYEAR         2010
+NUMCYCLE           3
+TREEDATA          15
+0101 100    501  1 51
+0101 101    501  2 41
+0101 102    501  3 41
+-999
+PROCESS
+STDIDENT
+STAND-B
+TIMEINT            0         5
+PROCESS
+STOP
+"""
+
+
+@pytest.fixture
+def keyfile(tmp_path):
+    path = tmp_path / "stands.key"
+    path.write_text(TWO_STANDS)
+    return path
+
+
+def _run_keyfile(fvs, item, heartbeat):
+    fvs.load_keyfile(item)
+    fvs.run()
+    heartbeat(fvs.stand_ids)
+    return fvs.summary["tpa"].tolist()
+
+
+def test_parse_keyfile():
+    first, second = parse_keyfile(TWO_STANDS)
+
+    assert (first.stand_id, first.stand_cn) == ("STAND-A", "CN-A")
+    assert (first.inv_year, first.ncycles, first.ntrees) == (2010, 3, 3)
+    assert second.stand_id == "STAND-B"
+    assert (second.inv_year, second.ncycles) == (2010, 3)
+    assert (second.cycle_length, second.ntrees) == (5, None)
+
+
+def test_routines_and_backend_selection():
+    fvs = FVS(TEST_DLL, backend="simulated")
+
+    assert fvs.variant == "SO"
+    assert isinstance(fvs._lib, SimulatedFvsLibrary)
+    assert fvs.dims["maxtrees"] == 3000
+    with pytest.raises(ValueError, match="Unknown FVS backend"):
+        FVS(TEST_DLL, backend="fortran")
+
+
+def test_stop_points_and_stands(keyfile):
+    fvs = FVS(TEST_DLL, backend="simulated")
+    fvs.load_keyfile(keyfile)
+
+    fvs.run(7, 0)
+    assert (fvs.itrncd, fvs.restart_code) == (0, 7)
+    assert fvs.stand_ids == {
+        "stand_id": "STAND-A",
+        "stand_cn": "CN-A",
+        "mgmt_id": "NONE",
+    }
+    assert fvs.dims["ntrees"] == 3
+    assert fvs.get_evmon_attrs(["year", "cycle"]) == {
+        "year": 2010.0,
+        "cycle": 1.0,
+    }
+
+    fvs.run(2, 2020)
+    assert fvs.restart_code == 2
+    assert fvs.get_evmon_attrs(["year", "cycle"]) == {
+        "year": 2020.0,
+        "cycle": 2.0,
+    }
+    fvs.run(0, 0)
+    assert fvs.restart_code == 100
+    summary = fvs.summary
+    assert summary["year"].tolist() == [2010, 2020, 2030, 2040]
+    assert (summary["tpa"].diff().dropna() <= 0).all()
+
+    fvs.run(0, 0)
+    assert fvs.stand_ids["stand_id"] == "STAND-B"
+    assert fvs.summary["year"].tolist() == [2010, 2015, 2020, 2025]
+    fvs.run(0, 0)
+    assert (fvs.itrncd, fvs.restart_code) == (2, 0)
+
+
+def test_runs_are_deterministic(keyfile):
+    runs = []
+    for _ in range(2):
+        fvs = FVS(TEST_DLL, backend="simulated")
+        fvs.load_keyfile(keyfile)
+        fvs.run(7, 0)
+        runs.append(fvs.get_tree_attrs(["dbh", "ht"]))
+
+    np.testing.assert_array_equal(runs[0]["dbh"], runs[1]["dbh"])
+    assert np.all(runs[0]["ht"] > 4.5)
+
+
+def test_set_tree_attrs_changes_growth(keyfile):
+    fvs = FVS(TEST_DLL, backend="simulated")
+    fvs.load_keyfile(keyfile)
+    fvs.run(5, 2010)
+    before = fvs.get_tree_attrs(["dbh", "dg"])
+    fvs.set_tree_attrs({"dg": np.full(3, 2.0), "mortpa": np.zeros(3)})
+    tpa = fvs.get_tree_attrs(["tpa"])["tpa"]
+    fvs.run(6, 2010)
+
+    after = fvs.get_tree_attrs(["dbh", "tpa"])
+    np.testing.assert_allclose(after["dbh"], before["dbh"] + 2.0)
+    np.testing.assert_allclose(after["tpa"], tpa)
+    with pytest.raises(ValueError, match="Invalid tree attribute"):
+        fvs.set_tree_attrs({"tcuft": np.zeros(3)})
+
+
+def test_add_trees_and_activities(keyfile):
+    fvs = FVS(TEST_DLL, backend="simulated")
+    fvs.load_keyfile(keyfile)
+    fvs.run(7, 0)
+    fvs.add_trees({"species": [1, 2], "tpa": [10, 20], "dbh": [4, 5]})
+
+    trees = fvs.get_tree_attrs(["id", "tpa", "dbh"])
+    assert trees["id"].tolist() == [1, 2, 3, 4, 5]
+    assert trees["tpa"][-2:].tolist() == [10, 20]
+    fvs.add_activity(2020, 94, [0, 100])
+    assert fvs._lib.activities == [[2020, 94, [0.0, 100.0]]]
+    with pytest.raises(ValueError, match="did not accept activity 94"):
+        fvs.add_activity(2000, 94, [])
+
+
+def test_summary_columns_and_report(keyfile):
+    fvs = FVS(TEST_DLL, backend="simulated")
+    fvs.load_keyfile(keyfile)
+
+    records = [r for r in run_with_report(fvs) if isinstance(r, SummaryRecord)]
+    assert [r.stand_id for r in records] == ["STAND-A"] * 4 + ["STAND-B"] * 4
+    assert records[0].values["prdlen"] == 10
+    assert "prdlen" not in records[3].values
+    assert list(fvs.summary.columns) == list(SUMMARY_COLUMNS)
+    assert records[-1].values["tpa"] == fvs.summary["tpa"].iloc[-1]
+
+
+def test_save_and_restart(keyfile, tmp_path):
+    state = tmp_path / "stand.state"
+    fvs = FVS(TEST_DLL, backend="simulated")
+    fvs.load_keyfile(keyfile, save_state=(3, 2020, state))
+    fvs.run(0, 0)
+    assert fvs.itrncd == 2
+    assert state.exists()
+
+    resumed = FVS(TEST_DLL, backend="simulated")
+    resumed.load_state(state, keyfile)
+    resumed.run(0, 0)
+    assert resumed.restart_code == 3
+    assert resumed.get_evmon_attrs(["year"]) == {"year": 2020.0}
+    resumed.run(0, 0)
+    assert resumed.restart_code == 100
+
+    fresh = FVS(TEST_DLL, backend="simulated")
+    fresh.load_keyfile(keyfile)
+    fresh.run(0, 0)
+    assert resumed.summary.equals(fresh.summary)
+
+
+def test_missing_keyfile_is_an_error(tmp_path):
+    fvs = FVS(TEST_DLL, backend="simulated")
+    fvs._set_cmdline(f"--keywordfile={tmp_path / 'missing.key'}")
+
+    assert fvs.itrncd == 1
+    assert fvs.exit_code == 2
+
+
+def test_pool_uses_backend_from_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv(BACKEND_ENV_VAR, "simulated")
+    keyfiles = []
+    for i in range(3):
+        path = tmp_path / f"SO{i}.key"
+        shutil.copy(TEST_KEYFILE_PATH, path)
+        keyfiles.append(path)
+
+    with FvsWorkerPool(
+        TEST_DLL, processes=2, task=_run_keyfile, mp_context="fork"
+    ) as pool:
+        results = pool.map(keyfiles)
+
+    assert all(r.ok for r in results)
+    assert results[0].value == results[2].value
+    assert len(results[0].value) == 11
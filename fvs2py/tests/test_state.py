@@ -0,0 +1,90 @@
+import ctypes as ct
+
+import pytest
+
+from fvs2py import FVS
+from fvs2py.state import RunState
+
+TEST_DLL = "/not/a/real/dir/FVSxx.so"
+DIMS = (10, 4, 2, 3000, 23, 100, 40)
+
+
+def test_run_state_change_tracking():
+    state = RunState()
+    assert state.update(DIMS, 0, 2, 0, ("S1", "", "A"), 1)
+    assert state.stand_changed
+    assert state.generation == 1
+
+    assert not state.update(DIMS, 0, 3, 0, ("S1", "", "A"), 1)
+    assert not state.stand_changed
+    assert state.generation == 1
+    assert state.restart_code == 3
+
+    assert state.update(DIMS, 0, 2, 0, ("S1", "", "A"), 2)
+    assert state.cycle_changed
+    assert not state.stand_changed
+    assert state.generation == 2
+
+    # consecutive stands may share identifiers; the cycle resets
+    assert state.update(DIMS, 0, 2, 0, ("S1", "", "A"), 1)
+    assert state.stand_changed
+    assert state.generation == 3
+
+    assert state.update(DIMS, 0, 2, 0, ("S2", "", "A"), 1)
+    assert state.stand_changed
+    assert state.stand_ids == {
+        "stand_id": "S2",
+        "stand_cn": "",
+        "mgmt_id": "A",
+    }
+    assert state.dims["ntrees"] == 10
+    assert state.dims["maxcycles"] == 40
+
+
+@pytest.fixture
+def fvs(mock_valid_fvs_dll):  # noqa: ARG001
+    fvs = FVS(TEST_DLL)
+
+    def dim_sizes(*args):
+        for arg, value in zip(args, DIMS):
+            arg.value = value
+
+    def stand_id(sid, cn, mgmt, *_lengths):
+        sid.value = fvs.fake_stand_id.encode()
+        cn.value = b"cn"
+        mgmt.value = b"A"
+
+    def evmon_attr(_name, _nch, _action, value, rtn_code):
+        value.value = fvs.fake_cycle
+        rtn_code.value = 0
+
+    fvs.fake_stand_id = "LONG_STAND_ID"
+    fvs.fake_cycle = 1
+    fvs._fvsDimSizes.side_effect = dim_sizes
+    fvs._fvsStandID.side_effect = stand_id
+    fvs._fvsEvmonAttr.side_effect = evmon_attr
+    return fvs
+
+
+def test_refresh_state(fvs):
+    state = fvs.refresh_state()
+    assert state is fvs.state
+    assert state.dims == fvs.dims
+    assert state.stand_id == ""  # not read before FVS has been run
+    assert state.cycle is None
+
+    fvs._stop_point_code = ct.c_int(2)
+    fvs.refresh_state()
+    assert state.stand_id == "LONG_STAND_ID"
+    assert state.cycle == 1
+    assert state.stand_changed
+
+    buffer = fvs._stand_id
+    fvs.fake_stand_id = "S2"
+    fvs.refresh_state()
+    assert fvs._stand_id is buffer
+    assert state.stand_id == "S2"  # no stale characters from the longer id
+    assert state.stand_changed
+
+    fvs.refresh_state()
+    assert not state.cycle_changed
@@ -0,0 +1,128 @@
+import pytest
+
+from fvs2py._base import FVS
+from fvs2py.stops import StopPlan, StopPoint
+
+YEARS = (2000, 2010, 2020)
+
+
+class ScriptedFVS:
+    """Mimics how FVS walks through stop points for a number of stands."""
+
+    def __init__(self, nstands):
+        self.locations = []
+        for _ in range(nstands):
+            self.locations.append((7, 0))
+            self.locations += [(c, y) for y in YEARS for c in range(1, 7)]
+            self.locations.append((100, 0))
+        self.position = -1
+        self.itrncd = 0
+        self.restart_code = 0
+        self.calls = 0
+
+    def run(self, code, year):
+        self.calls += 1
+        while True:
+            self.position += 1
+            if self.position == len(self.locations):
+                self.itrncd = 2
+                return
+            loc_code, loc_year = self.locations[self.position]
+            if loc_code == 100 or (
+                loc_code == code and (year in (-1, loc_year) or code == 7)
+            ):
+                self.restart_code = loc_code
+                return
+
+    def get_evmon_attrs(self, names):
+        return {"year": float(self.locations[self.position][1])}
+
+    run_plan = FVS.run_plan
+    _run_cycles = FVS._run_cycles
+
+
+def test_stop_plan_orders_and_dedupes():
+    plan = StopPlan([(5, 2050), (2, 2030), (7, 1999), (2, 2030), (1, 2050)])
+
+    assert list(plan) == [
+        StopPoint(7, 0),
+        StopPoint(2, 2030),
+        StopPoint(1, 2050),
+        StopPoint(5, 2050),
+    ]
+    assert len(plan) == 4
+    assert plan == StopPlan(plan.stops)
+    assert plan.with_stop(3, 2040).stops[2] == StopPoint(3, 2040)
+    assert repr(StopPlan([(2, 2030)])) == "StopPlan([(2, 2030)])"
+
+
+@pytest.mark.parametrize(
+    ("stops", "match"),
+    [
+        ([(0, 2030)], "Invalid value for stop_point_code"),
+        ([(-1, 2030)], "Invalid value for stop_point_code"),
+        ([(2, 0)], "must be a specific year"),
+        ([(2, -2)], "must be a specific year"),
+    ],
+)
+def test_stop_plan_validation(stops, match):
+    with pytest.raises(ValueError, match=match):
+        StopPlan(stops)
+
+
+def test_run_plan_only_stops_where_planned():
+    fvs = ScriptedFVS(nstands=2)
+    stops = list(fvs.run_plan([(5, 2020), (2, 2010)], include_stand_end=True))
+
+    assert stops == [(2, 2010), (5, 2020), (100, 0)] * 2
+    assert fvs.itrncd == 2
+    assert fvs.calls == 3 * 2 + 1
+
+
+def test_run_plan_skips_unreached_stops():
+    fvs = ScriptedFVS(nstands=1)
+    stops = list(fvs.run_plan([(2, 2010), (2, 2090), (3, 2095)]))
+
+    assert stops == [(2, 2010)]
+    assert fvs.itrncd == 2
+
+
+def test_stop_plan_every_cycle():
+    plan = StopPlan([(2, -1), (5, 2010), (7, 2000)])
+
+    assert plan.every_cycle
+    assert plan.cycle_codes == (2, 5)
+    assert (2, 2090) in plan
+    assert (5, 2010) in plan
+    assert (5, 2020) not in plan
+    assert (7, 1999) in plan
+    assert not StopPlan([(2, 2010)]).every_cycle
+
+
+def test_run_plan_every_cycle():
+    fvs = ScriptedFVS(nstands=2)
+    stops = list(
+        fvs.run_plan([(2, -1), (5, 2010), (7, 0)], include_stand_end=True)
+    )
+
+    assert (
+        stops
+        == [
+            (7, 0),
+            (2, 2000),
+            (2, 2010),
+            (5, 2010),
+            (2, 2020),
+            (100, 0),
+        ]
+        * 2
+    )
+    assert fvs.itrncd == 2
+
+
+def test_run_plan_empty_plan():
+    fvs = ScriptedFVS(nstands=2)
+    assert list(fvs.run_plan(StopPlan(), include_stand_end=True)) == [
+        (100, 0),
+        (100, 0),
+    ]
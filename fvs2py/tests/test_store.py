@@ -0,0 +1,167 @@
+import ctypes as ct
+
+import numpy as np
+import pytest
+
+from fvs2py import FVS
+from fvs2py.constants import ADD_TREES_COLUMNS
+from fvs2py.store import StandStore, StandStoreWriter, build_stand_store
+
+TEST_DLL = "/not/a/real/dir/FVSxx.so"
+TWO_STANDS = """\
+STDIDENT
+S1
+STANDCN
+CN1
+INVYEAR         2000
+NUMCYCLE           3
+TREEDATA          15
+0101 100    501  1 51
+0101 101    501  2 41
+-999
+PROCESS
+STDIDENT
+S2
+STANDCN
+CN2
+PROCESS
+STOP
+"""
+
+
+@pytest.fixture
+def fvs(mock_valid_fvs_dll):  # noqa: ARG001
+    """An FVS instance whose tree list lives in a dict of arrays."""
+    fvs = FVS(TEST_DLL)
+    fvs.stand_cn = "CN1"
+    fvs.trees = {
+        "plot": np.array([1.0, 1.0, 2.0]),
+        "species": np.array([3.0, 5.0, 3.0]),
+        "tpa": np.array([10.0, 20.0, 30.0]),
+        "dbh": np.array([4.0, 8.0, 12.0]),
+        "dg": np.array([0.5, 0.4, 0.3]),
+        "ht": np.array([30.0, 50.0, 70.0]),
+        "htg": np.array([2.0, 2.0, 2.0]),
+        "cratio": np.array([40.0, 50.0, 60.0]),
+    }
+    fvs.added = []
+    fvs.year = 2020
+
+    def dim_sizes(ntrees, *_args):
+        ntrees.value = len(fvs.trees["tpa"])
+
+    def stand_id(sid, cn, mgmt, *_lengths):
+        sid.value = b"S1"
+        cn.value = fvs.stand_cn.encode()
+        mgmt.value = b"NONE"
+
+    def tree_attr(name, _nch, _action, ntrees, values, rtn_code):
+        rtn_code.value = 0
+        buffer = np.ctypeslib.as_array(values, shape=(ntrees.value,))
+        buffer[:] = fvs.trees[name.decode()]
+
+    def evmon_attr(_name, _nch, _action, value, rtn_code):
+        rtn_code.value = 0
+        value.value = fvs.year
+
+    def add_trees(records, nrows, rtn_code):
+        rtn_code.value = 0
+        flat = np.ctypeslib.as_array(
+            records, shape=(nrows.value * len(ADD_TREES_COLUMNS),)
+        )
+        fvs.added.append(flat.reshape(nrows.value, -1, order="F").copy())
+
+    fvs.keyfile = "test.key"
+    fvs._stop_point_code = ct.c_int(7)
+    fvs._fvsDimSizes.side_effect = dim_sizes
+    fvs._fvsStandID.side_effect = stand_id
+    fvs._fvsTreeAttr.side_effect = tree_attr
+    fvs._fvsEvmonAttr.side_effect = evmon_attr
+    fvs._fvsAddTrees.side_effect = add_trees
+    return fvs
+
+
+def test_stand_store_round_trip(fvs, tmp_path):
+    path = tmp_path / "store"
+    with StandStoreWriter(path) as writer:
+        writer.add_fvs(fvs)
+        fvs.stand_cn = "CN0"
+        fvs.trees = {k: v[:1] * 2 for k, v in fvs.trees.items()}
+        writer.add_fvs(fvs, year=2030)
+        writer.add("EMPTY", {attr: [] for attr in writer.attrs})
+
+    store = StandStore(path)
+    assert len(store) == 3
+    assert list(store) == ["CN0", "CN1", "EMPTY"]
+    assert "CN1" in store
+    assert "CN2" not in store
+    assert store.year("CN1") == 2020
+    assert store.year("CN0") == 2030
+    assert store.year("EMPTY") == 0
+
+    trees = store.get("CN1")
+    assert isinstance(trees["tpa"], np.memmap)
+    np.testing.assert_array_equal(trees["dbh"], [4.0, 8.0, 12.0])
+    np.testing.assert_array_equal(store.get("CN0")["dbh"], [8.0])
+    assert len(store.get("EMPTY")["tpa"]) == 0
+    with pytest.raises(KeyError):
+        store.get("CN2")
+
+    fvs.stand_cn = "CN1"
+    assert store.inject(fvs) == 3
+    (records,) = fvs.added
+    assert records.shape == (3, len(ADD_TREES_COLUMNS))
+    np.testing.assert_array_equal(
+        records[:, ADD_TREES_COLUMNS.index("ht")], [30.0, 50.0, 70.0]
+    )
+    np.testing.assert_array_equal(
+        records[:, ADD_TREES_COLUMNS.index("ipvars1")], 0.0
+    )
+
+    fvs.stand_cn = "CN0"
+    with pytest.raises(ValueError, match="stored in 2030 but FVS is in 2020"):
+        store.inject(fvs)
+    assert len(fvs.added) == 1
+
+
+def test_stand_store_writer_errors(tmp_path):
+    with pytest.raises(ValueError, match="Unknown"):
+        StandStoreWriter(tmp_path / "a", attrs=["dbh", "not_an_attr"])
+
+    writer = StandStoreWriter(tmp_path / "b", attrs=["dbh"])
+    writer.add("CN1", {"dbh": [1.0]})
+    writer.add("CN1", {"dbh": [2.0]})
+    with pytest.raises(ValueError, match="more than once"):
+        writer.close()
+
+    with pytest.raises(FileExistsError):
+        StandStoreWriter(tmp_path / "b")
+
+
+def test_add_trees_checks_lengths(fvs):
+    with pytest.raises(ValueError, match="same length"):
+        fvs.add_trees({"tpa": [1.0, 2.0], "dbh": [1.0]})
+    fvs._fvsAddTrees.side_effect = lambda _records, _nrows, rtn: setattr(
+        rtn, "value", 1
+    )
+    with pytest.raises(ValueError, match="could not add"):
+        fvs.add_trees({"tpa": [1.0]})
+
+
+def test_build_stand_store_records_years(tmp_path):
+    keyfile = tmp_path / "stands.key"
+    keyfile.write_text(TWO_STANDS)
+    fvs = FVS(TEST_DLL, backend="simulated")
+
+    fvs.load_keyfile(keyfile)
+    with pytest.raises(ValueError, match="single year"):
+        build_stand_store(fvs, tmp_path / "every", stop=(2, -1))
+    assert not (tmp_path / "every").exists()
+
+    store = build_stand_store(fvs, tmp_path / "inventory")
+    assert [store.year(cn) for cn in store] == [2000, 2000]
+
+    fvs.load_keyfile(keyfile)
+    store = build_stand_store(fvs, tmp_path / "grown", stop=(2, 2010))
+    assert [store.year(cn) for cn in store] == [2010, 2010]
+    assert len(store.get("CN1")["tpa"]) == 2
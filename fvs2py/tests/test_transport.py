@@ -0,0 +1,153 @@
+import functools
+import os
+
+import numpy as np
+import pytest
+
+from fvs2py import FVS, transport
+from fvs2py.constants import BACKEND_ENV_VAR
+from fvs2py.pool import FvsWorkerPool
+from fvs2py.transport import SlabRing, run_keyfile_shared
+
+TEST_DLL = "/not/a/real/dir/FVSxx.so"
+DIMS = {"maxtrees": 100, "maxcycles": 4}
+THREE_STANDS = """\
+STDIDENT
+S1
+INVYEAR         2000
+NUMCYCLE           2
+PROCESS
+STDIDENT
+S2
+PROCESS
+STDIDENT
+S3
+PROCESS
+STOP
+"""
+
+
+def _write_trees(_fvs, item, heartbeat, ring):
+    heartbeat({"stand_id": str(item)})
+    trees = {attr: np.arange(item, dtype=float) for attr in ring.attrs}
+    summary = np.full((2, 20), item, dtype=np.int32)
+    return ring.write(trees, summary, meta={"item": item}, timeout=5)
+
+
+def _crash_writing(_fvs, _item, _heartbeat, ring):
+    ring._acquire(timeout=5)
+    os._exit(1)
+
+
+def test_slab_ring_round_trip():
+    with SlabRing.from_dims(DIMS, ["dbh", "tpa"], nslabs=2) as ring:
+        ref = ring.write(
+            {"dbh": [1.0, 2.0, 3.0], "tpa": [4.0, 5.0, 6.0]},
+            summary=np.ones((3, 20), dtype=np.int32),
+            meta={"stand_id": "S1"},
+        )
+        assert ref.ntrees == 3
+        assert ref.nsummary == 3
+
+        view = ring.read(ref)
+        assert view.meta == {"stand_id": "S1"}
+        assert view.trees["tpa"].tolist() == [4.0, 5.0, 6.0]
+        assert np.shares_memory(view.trees["dbh"], ring._slab_arrays(0)[0])
+        assert view.to_frame()["dbh"].tolist() == [1.0, 2.0, 3.0]
+        assert view.summary_frame().shape == (3, 20)
+
+        ring.write({"dbh": [1.0], "tpa": [1.0]})
+        with pytest.raises(TimeoutError, match="No free slab"):
+            ring.write({"dbh": [1.0], "tpa": [1.0]}, timeout=0.1)
+        view.release()
+        assert ring.write({"dbh": [], "tpa": []}, timeout=1).index == ref.index
+
+
+def test_slab_ring_reclaims_dead_writers():
+    with SlabRing(10, 2, ["dbh"], nslabs=1) as ring:
+        ring._acquire(timeout=1)
+        assert ring.reclaim() == 0  # held by this live process
+        ring._header(0)[2] = 2**22 + 12345  # pid of a writer that died
+        assert ring.reclaim() == 1
+        assert ring.write({"dbh": [2.0]}, timeout=1).index == 0
+
+
+def test_slab_ring_reclaim_keeps_other_users_writers(monkeypatch):
+    def kill(_pid, _signal):
+        raise PermissionError
+
+    with SlabRing(10, 2, ["dbh"], nslabs=1) as ring:
+        ring._acquire(timeout=1)
+        monkeypatch.setattr(transport.os, "kill", kill)
+        assert ring.reclaim() == 0
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_slab_ring_with_pool():
+    with (
+        SlabRing.from_dims(DIMS, ["dbh"], nslabs=2, mp_context="fork") as ring,
+        FvsWorkerPool(
+            TEST_DLL,
+            processes=2,
+            task=functools.partial(_write_trees, ring=ring),
+            mp_context="fork",
+        ) as pool,
+    ):
+        seen = {}
+        for result in pool.imap_unordered(range(1, 7)):
+            assert result.ok, result.error
+            with ring.read(result.value) as view:
+                seen[view.meta["item"]] = (
+                    view.trees["dbh"].sum(),
+                    int(view.summary[0, 0]),
+                )
+
+    assert seen == {n: (n * (n - 1) / 2, n) for n in range(1, 7)}
+
+
+@pytest.mark.usefixtures("mock_valid_fvs_dll")
+def test_pool_reclaims_slabs_of_crashed_workers():
+    with (
+        SlabRing.from_dims(DIMS, ["dbh"], nslabs=1, mp_context="fork") as ring,
+        FvsWorkerPool(
+            TEST_DLL,
+            processes=1,
+            task=functools.partial(_crash_writing, ring=ring),
+            max_retries=0,
+            mp_context="fork",
+            ring=ring,
+        ) as pool,
+    ):
+        (result,) = pool.map(["a"])
+        assert result.quarantined
+        assert ring.write({"dbh": [1.0]}, timeout=1).index == 0
+
+
+def test_run_keyfile_shared_with_more_stands_than_slabs(monkeypatch, tmp_path):
+    monkeypatch.setenv(BACKEND_ENV_VAR, "simulated")
+    keyfile = tmp_path / "stands.key"
+    keyfile.write_text(THREE_STANDS)
+    dims = FVS(TEST_DLL).dims
+    seen = []
+
+    def consume(item, ref):
+        assert item == keyfile
+        with ring.read(ref) as view:
+            seen.append((view.meta["stand_id"], len(view.summary)))
+
+    with (
+        SlabRing.from_dims(dims, ["dbh"], nslabs=2, mp_context="fork") as ring,
+        FvsWorkerPool(
+            TEST_DLL,
+            processes=1,
+            task=functools.partial(run_keyfile_shared, ring=ring, timeout=10),
+            mp_context="fork",
+            on_output=consume,
+            ring=ring,
+        ) as pool,
+    ):
+        (result,) = pool.map([keyfile])
+
+    assert result.ok, result.error
+    assert result.value == []
+    assert seen == [("S1", 3), ("S2", 3), ("S3", 3)]
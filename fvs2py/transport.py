@@ -0,0 +1,363 @@
+"""Shared-memory transport of FVS outputs from worker processes."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing as mp
+import os
+import queue
+from collections.abc import Iterable, Mapping
+from multiprocessing import resource_tracker, shared_memory
+from typing import TYPE_CHECKING, Any, NamedTuple, Self
+
+import numpy as np
+import pandas as pd
+
+from fvs2py.constants import (
+    FVS_ITRNCD_GOOD_RUNNING_STATE,
+    STOP_POINT_AFTER_INPUT,
+    STR_MAXCYCLES,
+    STR_MAXTREES,
+    SUMMARY_COLUMNS,
+    TREE_ATTRS,
+)
+from fvs2py.pool import Heartbeat, check_fvs_status, send_output
+
+if TYPE_CHECKING:
+    from fvs2py._base import FVS
+
+# each slab starts with a header of int64 values
+_HEADER = ("ntrees", "nsummary", "state")
+_HEADER_BYTES = 8 * len(_HEADER)
+# values of the header's state field other than the pid of a writer
+_SLAB_FREE = 0
+_SLAB_READY = -1
+
+
+class SlabRef(NamedTuple):
+    """A handle on a filled slab, small enough to send between processes."""
+
+    index: int
+    ntrees: int
+    nsummary: int
+    meta: dict
+
+
+class SlabView:
+    """Zero-copy NumPy views of a filled slab.
+
+    The views are only valid until `release` is called, after which the slab
+    may be overwritten by a worker. Copy anything that has to outlive it,
+    e.g. with `to_frame`.
+    """
+
+    def __init__(self, ring: SlabRing, ref: SlabRef):
+        self.ring = ring
+        self.ref = ref
+        self.meta = ref.meta
+        trees, summary = ring._slab_arrays(ref.index)
+        self.trees = {
+            attr: trees[i, : ref.ntrees] for i, attr in enumerate(ring.attrs)
+        }
+        self.summary = summary[: ref.nsummary]
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    def to_frame(self) -> pd.DataFrame:
+        """Copies the tree list into a DataFrame."""
+        return pd.DataFrame({k: v.copy() for k, v in self.trees.items()})
+
+    def summary_frame(self) -> pd.DataFrame:
+        """Copies the summary table into a DataFrame."""
+        return pd.DataFrame(self.summary.copy(), columns=list(SUMMARY_COLUMNS))
+
+    def release(self) -> None:
+        """Hands the slab back to the ring for reuse."""
+        if self.ring is not None:
+            self.trees = {}
+            self.summary = None
+            self.ring.release(self.ref)
+            self.ring = None
+
+        return
+
+
+class SlabRing:
+    """A ring of fixed-size shared-memory slabs holding FVS outputs.
+
+    Each slab has room for one tree list (every attribute in `attrs` for up to
+    `maxtrees` records, stored attribute by attribute) and one summary table
+    (up to `maxcycles + 1` rows). Workers take a free slab, have FVS write
+    into it directly, and send back a small `SlabRef`; the parent reads the
+    slab through NumPy views without copying and releases it once consumed,
+    returning it to the free list.
+
+    The ring is created in the parent and handed to workers when they start,
+    e.g. by binding it to a `FvsWorkerPool` task with `functools.partial`.
+    Workers wait for a free slab when all are in use, so the parent has to
+    release views as it goes: have tasks send each `SlabRef` as soon as it is
+    written (see `run_keyfile_shared`) rather than return them all at the
+    end, and pass the ring to the pool so slabs of crashed workers are
+    reclaimed.
+    """
+
+    def __init__(
+        self,
+        maxtrees: int,
+        maxcycles: int,
+        attrs: Iterable[str] | None = None,
+        nslabs: int = 8,
+        mp_context: str | None = "spawn",
+    ):
+        """Allocates the shared memory for the ring.
+
+        Args:
+            maxtrees (int): tree records each slab holds, see `FVS.dims`.
+            maxcycles (int): cycles each slab holds summary rows for.
+            attrs (Iterable[str]): tree attributes to transport, defaults to
+                `fvs2py.constants.TREE_ATTRS`.
+            nslabs (int): number of slabs in the ring.
+            mp_context (str): multiprocessing start method of the processes
+                that will use the ring.
+        """
+        if nslabs < 1:
+            msg = "nslabs must be at least 1"
+            raise ValueError(msg)
+        self.maxtrees = maxtrees
+        self.maxcycles = maxcycles
+        self.attrs = TREE_ATTRS if attrs is None else tuple(attrs)
+        self.nslabs = nslabs
+        self._tree_bytes = 8 * len(self.attrs) * maxtrees
+        self._summary_bytes = 4 * (maxcycles + 1) * len(SUMMARY_COLUMNS)
+        self.slab_bytes = _HEADER_BYTES + self._tree_bytes + self._summary_bytes
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=self.slab_bytes * nslabs
+        )
+        self._owner = True
+        self._free = mp.get_context(mp_context).Queue()
+        for index in range(nslabs):
+            self._header(index)[:] = (0, 0, _SLAB_FREE)
+            self._free.put(index)
+        logging.debug(
+            f"Created slab ring {self.name} of {nslabs} x {self.slab_bytes} "
+            "bytes."
+        )
+
+    @classmethod
+    def from_dims(
+        cls,
+        dims: Mapping[str, int],
+        attrs: Iterable[str] | None = None,
+        **kwargs,
+    ) -> SlabRing:
+        """Creates a ring sized for an FVS library, given its `FVS.dims`."""
+        return cls(dims[STR_MAXTREES], dims[STR_MAXCYCLES], attrs, **kwargs)
+
+    @property
+    def name(self) -> str:
+        """Name of the shared memory block."""
+        return self._shm.name
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_shm"]
+        state["_owner"] = False
+        state["_name"] = self._shm.name
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        name = state.pop("_name")
+        self.__dict__.update(state)
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # no `track` before Python 3.13
+            self._shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _header(self, index: int) -> np.ndarray:
+        return np.ndarray(
+            len(_HEADER),
+            dtype=np.int64,
+            buffer=self._shm.buf,
+            offset=index * self.slab_bytes,
+        )
+
+    def _slab_arrays(self, index: int) -> tuple[np.ndarray, np.ndarray]:
+        offset = index * self.slab_bytes + _HEADER_BYTES
+        trees = np.ndarray(
+            (len(self.attrs), self.maxtrees),
+            dtype=np.float64,
+            buffer=self._shm.buf,
+            offset=offset,
+        )
+        summary = np.ndarray(
+            (self.maxcycles + 1, len(SUMMARY_COLUMNS)),
+            dtype=np.int32,
+            buffer=self._shm.buf,
+            offset=offset + self._tree_bytes,
+        )
+        return trees, summary
+
+    def _acquire(self, timeout: float | None) -> int:
+        try:
+            index = self._free.get(timeout=timeout)
+        except queue.Empty:
+            msg = (
+                f"No free slab within {timeout}s, release consumed slabs or "
+                "create the ring with more of them"
+            )
+            raise TimeoutError(msg) from None
+        self._header(index)[2] = os.getpid()
+        return index
+
+    def _publish(
+        self, index: int, ntrees: int, nsummary: int, meta: dict | None
+    ) -> SlabRef:
+        self._header(index)[:] = (ntrees, nsummary, _SLAB_READY)
+        return SlabRef(index, ntrees, nsummary, meta or {})
+
+    def write(
+        self,
+        trees: Mapping[str, np.ndarray],
+        summary: np.ndarray | None = None,
+        meta: dict | None = None,
+        timeout: float | None = None,
+    ) -> SlabRef:
+        """Copies arrays into a free slab.
+
+        Args:
+            trees (Mapping): tree attribute vectors keyed by name, for every
+                attribute of the ring.
+            summary (np.ndarray): optional summary rows.
+            meta (dict): small picklable data sent along with the handle,
+                such as stand identifiers.
+            timeout (float): seconds to wait for a free slab.
+
+        Returns:
+            a `SlabRef` to send to the process that reads the slab.
+
+        Raises:
+            TimeoutError: if no slab became free in time.
+        """
+        index = self._acquire(timeout)
+        slab_trees, slab_summary = self._slab_arrays(index)
+        ntrees = 0
+        for i, attr in enumerate(self.attrs):
+            values = np.asarray(trees[attr])
+            ntrees = len(values)
+            slab_trees[i, :ntrees] = values
+        nsummary = 0
+        if summary is not None:
+            nsummary = len(summary)
+            slab_summary[:nsummary] = summary
+        return self._publish(index, ntrees, nsummary, meta)
+
+    def write_fvs(
+        self,
+        fvs: FVS,
+        meta: dict | None = None,
+        timeout: float | None = None,
+    ) -> SlabRef:
+        """Has FVS write its current tree list and summary into a free slab.
+
+        Values go straight from FVS into shared memory, without intermediate
+        arrays. See `write` for the arguments.
+        """
+        index = self._acquire(timeout)
+        slab_trees, slab_summary = self._slab_arrays(index)
+        trees = fvs.get_tree_attrs(
+            self.attrs,
+            out={attr: slab_trees[i] for i, attr in enumerate(self.attrs)},
+        )
+        ntrees = len(next(iter(trees.values()), ()))
+        summary = fvs.get_summary(out=slab_summary)
+        return self._publish(index, ntrees, len(summary), meta)
+
+    def read(self, ref: SlabRef) -> SlabView:
+        """Returns zero-copy views of a slab written by a worker."""
+        return SlabView(self, ref)
+
+    def release(self, ref: SlabRef | int) -> None:
+        """Returns a consumed slab to the free list."""
+        index = ref if isinstance(ref, int) else ref.index
+        self._header(index)[:] = (0, 0, _SLAB_FREE)
+        self._free.put(index)
+
+        return
+
+    def reclaim(self) -> int:
+        """Frees slabs held by writers that died before publishing them.
+
+        Returns:
+            the number of slabs reclaimed.
+        """
+        reclaimed = 0
+        for index in range(self.nslabs):
+            pid = int(self._header(index)[2])
+            if pid <= 0:
+                continue
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                self.release(index)
+                reclaimed += 1
+            except PermissionError:
+                pass  # alive, owned by another user
+        return reclaimed
+
+    def close(self) -> None:
+        """Unmaps the ring, and frees it when called from its creator."""
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+            self._free.close()
+
+        return
+
+
+def run_keyfile_shared(
+    fvs: FVS,
+    keyfile: str | os.PathLike,
+    heartbeat: Heartbeat,
+    ring: SlabRing,
+    timeout: float | None = None,
+) -> list[SlabRef]:
+    """Runs every stand in a keyfile, writing each one's outputs to `ring`.
+
+    A `FvsWorkerPool` task; bind `ring` with `functools.partial`. The tree
+    list and summary of each stand are written to a slab when the stand
+    finishes, with the stand identifiers as the slab's `meta`, and its
+    `SlabRef` is sent to the pool's `on_output` right away, so the parent can
+    read and release it while later stands run. Keyfiles can then have more
+    stands than the ring has slabs.
+
+    Returns:
+        the `SlabRef`s that could not be sent as they were written, for the
+        parent to `read` and `release`; none when run in a `FvsWorkerPool`.
+    """
+    fvs.load_keyfile(keyfile)
+    refs = []
+    while fvs.itrncd == FVS_ITRNCD_GOOD_RUNNING_STATE:
+        fvs.run(stop_point_code=STOP_POINT_AFTER_INPUT, stop_point_year=0)
+        if fvs.itrncd != FVS_ITRNCD_GOOD_RUNNING_STATE:
+            break
+        stand_ids = fvs.stand_ids
+        heartbeat(stand_ids)
+        fvs.run(stop_point_code=0, stop_point_year=0)
+        check_fvs_status(fvs)
+        ref = ring.write_fvs(fvs, meta=stand_ids, timeout=timeout)
+        if not send_output(heartbeat, ref):
+            refs.append(ref)
+    check_fvs_status(fvs)
+
+    return refs